@@ -0,0 +1,421 @@
+"""Canonical aura states and memoized aura transitions.
+
+An aura list is frozen into a tuple of `AuraKey`s (in list order, since
+check_reaction takes the first aura that reacts). `aura_transition` maps
+(state, incoming element, units) to the reaction, the resulting state and the
+gauge consumed, covering everything a hit does to a target's auras: reaction
+detection, composite auras, refresh/add, Frost-Twined and reaction consumption.
+Transitions are pure, so they are cached and each hit costs one lookup.
+
+`AuraStore` is the compact aura container every Character starts with:
+per-element arrays of units and durations plus tag and source-element
+bitmasks. The list form still works everywhere (`apply_aura_transition`,
+combine/refresh/consume and `transposition.aura_key` accept both), so a unit
+can be given a plain list of `Aura`s and behaves the same.
+"""
+
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+from typing import Optional
+from core import (Aura, AuraTag, Element, NON_PERSISTENT_AURAS, REACTIONS_WITH_AURA, SPECIAL_AURA_TAGS,
+                  combine_with_auras, refresh_aura)
+
+AuraKey = namedtuple("AuraKey", "name element units duration decay_rate locked source_elements tags")
+
+AuraTransition = namedtuple("AuraTransition", "reaction reacted state consumed_units")
+AuraTransition.__doc__ = """Result of one elemental application.
+
+reaction: reaction name or None.
+reacted: index (into the old state) of the aura that reacted, "Quicken" for
+    Aggravate/Spread, or None.
+state: the aura state after the hit.
+consumed_units: gauge removed from the reacted aura by the reaction.
+"""
+
+def freeze_aura(aura: Aura) -> AuraKey:
+    # create_aura leaves source_elements as None and Aura() defaults it to an
+    # empty set; both freeze to frozenset() so equal auras get equal keys
+    return AuraKey(
+        aura.name, aura.element, aura.units, aura.duration, aura.decay_rate, aura.locked,
+        frozenset(aura.source_elements or ()), frozenset(aura.tags),
+    )
+
+def freeze_auras(auras: list) -> tuple:
+    return tuple(freeze_aura(aura) for aura in auras)
+
+def thaw_aura(key: AuraKey) -> Aura:
+    return Aura(
+        name=key.name, element=key.element, units=key.units, duration=key.duration,
+        decay_rate=key.decay_rate, locked=key.locked,
+        source_elements=key.source_elements, tags=set(key.tags),
+    )
+
+def thaw_auras(state: tuple) -> list:
+    return [thaw_aura(key) for key in state]
+
+@lru_cache(maxsize=65536)
+def aura_transition(state: tuple, element: Element, units: float = 1.0) -> AuraTransition:
+    import reaction_logic
+    auras = thaw_auras(state)
+
+    reaction, reacted = reaction_logic.check_reaction(element, auras)
+    reacted_index = None
+    if isinstance(reacted, Aura):
+        reacted_index = next(i for i, aura in enumerate(auras) if aura is reacted)
+    elif reacted is not None:
+        reacted_index = reacted
+
+    combined = combine_with_auras(auras, element)
+    if combined:
+        auras = combined[0]
+    elif element not in NON_PERSISTENT_AURAS:
+        auras = refresh_aura(auras, element, units)[0]
+
+    if reaction == "Rimegrass":
+        auras.append(Aura(element=Element.CRYO, name="Frost-Twined", units=5))
+
+    consumed = 0.0
+    if reacted is not None and reaction_logic.is_consuming_reaction(reaction):
+        consumed = reaction_logic.consume_from_auras(auras, reacted.element, reaction=reaction)
+
+    return AuraTransition(reaction, reacted_index, freeze_auras(auras), consumed)
+
+def apply_aura_transition(unit, element: Element, units: float = 1.0) -> tuple[AuraTransition, Optional[object]]:
+    """Apply `element` to `unit`'s auras through the transition cache.
+
+    Returns the transition and the aura object that reacted (or "Quicken"),
+    taken from the unit's auras before the hit. The aura list is only rebuilt
+    when the state actually changes.
+    """
+    old_auras = unit.auras
+    if isinstance(old_auras, AuraStore):
+        state = old_auras.state_key()
+        transition = aura_transition(state, element, units)
+        reacted = transition.reacted
+        if isinstance(reacted, int):
+            reacted = thaw_aura(state[reacted])
+        if transition.state != state:
+            unit.own("auras").load_state(transition.state)
+        return transition, reacted
+
+    state = freeze_auras(old_auras)
+    transition = aura_transition(state, element, units)
+
+    reacted = transition.reacted
+    if isinstance(reacted, int):
+        reacted = old_auras[reacted]
+
+    if transition.state != state:
+        unit.auras = thaw_auras(transition.state)
+    return transition, reacted
+
+# Only persistent elements can hold an aura, so only they get a slot
+SLOT_ELEMENTS = tuple(element for element in Element if element not in NON_PERSISTENT_AURAS)
+SLOT_OF = {element: slot for slot, element in enumerate(SLOT_ELEMENTS)}
+AURA_SLOTS = len(SLOT_ELEMENTS)
+
+# Offsets into AuraStore.floats / AuraStore.ints; each field takes AURA_SLOTS entries
+UNITS, DECAY_RATE = 0, AURA_SLOTS
+DURATION, ORDER, TAG_MASK, SOURCE_MASK = 0, AURA_SLOTS, 2 * AURA_SLOTS, 3 * AURA_SLOTS
+
+@lru_cache(maxsize=None)
+def element_mask(elements: frozenset) -> int:
+    mask = 0
+    for element in elements or ():
+        mask |= 1 << element.value
+    return mask
+
+@lru_cache(maxsize=None)
+def elements_from_mask(mask: int) -> frozenset:
+    return frozenset(element for element in Element if mask & (1 << element.value))
+
+@lru_cache(maxsize=None)
+def tag_mask(tags: frozenset) -> int:
+    mask = 0
+    for tag in tags:
+        mask |= 1 << tag.value
+    return mask
+
+@lru_cache(maxsize=None)
+def tags_from_mask(mask: int) -> frozenset:
+    return frozenset(tag for tag in AuraTag if mask & (1 << tag.value))
+
+class AuraStore:
+    """Array-backed aura storage, one slot per persistent face-up element.
+
+    Units and decay rates live in one float array; durations, application
+    order, tag bitmasks and source-element bitmasks in one int array. It stands
+    in for the `Character.auras` list: it iterates, indexes, appends and
+    removes like one (yielding `AuraSlot` views in application order), while
+    decay, consumption, composite auras and refreshes work on the arrays. The
+    frozen state is cached between mutations, so repeated hits on an unchanged
+    target skip rebuilding it.
+    """
+    __slots__ = ("names", "floats", "ints", "locked_mask", "next_order", "cached_state", "cached_hash")
+
+    def __init__(self):
+        self.names = [None] * AURA_SLOTS  # None marks an empty slot
+        self.floats = array("d", bytes(8 * 2 * AURA_SLOTS))
+        self.ints = array("i", bytes(4 * 4 * AURA_SLOTS))
+        self.locked_mask = 0
+        self.next_order = 0
+        self.cached_state = ()
+        self.cached_hash = ((), hash(()))  # (state, its hash), valid while state is cached_state
+
+    def __copy__(self) -> "AuraStore":
+        store = AuraStore.__new__(AuraStore)
+        store.names = self.names[:]
+        store.floats = self.floats[:]
+        store.ints = self.ints[:]
+        store.locked_mask = self.locked_mask
+        store.next_order = self.next_order
+        store.cached_state = self.cached_state
+        store.cached_hash = self.cached_hash
+        return store
+
+    @classmethod
+    def from_auras(cls, auras) -> "AuraStore":
+        store = cls()
+        for aura in auras:
+            store.append(aura)
+        return store
+
+    # --- list interface ---
+
+    def slots(self) -> list[int]:
+        """Occupied slots in the order their auras were applied."""
+        occupied = [slot for slot in range(AURA_SLOTS) if self.names[slot] is not None]
+        if len(occupied) > 1:
+            occupied.sort(key=lambda slot: self.ints[ORDER + slot])
+        return occupied
+
+    def __len__(self) -> int:
+        return AURA_SLOTS - self.names.count(None)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self):
+        return iter([AuraSlot(self, slot) for slot in self.slots()])
+
+    def __getitem__(self, index: int) -> "AuraSlot":
+        return AuraSlot(self, self.slots()[index])
+
+    def append(self, aura):
+        """Store `aura`, replacing any aura with the same face-up element."""
+        self.set_slot(
+            SLOT_OF[aura.element], aura.name, aura.units, aura.duration, aura.decay_rate, aura.locked,
+            element_mask(frozenset(aura.source_elements or ())), tag_mask(frozenset(aura.tags)),
+        )
+
+    def remove(self, aura):
+        slot = SLOT_OF[aura.element]
+        if self.names[slot] is None:
+            raise ValueError(f"no {aura.element.name} aura stored")
+        self.clear_slot(slot)
+
+    def clear(self):
+        self.names = [None] * AURA_SLOTS
+        self.locked_mask = 0
+        self.cached_state = ()
+
+    # --- slot access ---
+
+    def set_slot(self, slot: int, name: str, units: float, duration: int, decay_rate: float = 0.3,
+                 locked: bool = False, source_mask: int = 0, tags: int = 0):
+        ints = self.ints
+        if self.names[slot] is None:
+            ints[ORDER + slot] = self.next_order
+            self.next_order += 1
+        self.names[slot] = name
+        self.floats[UNITS + slot] = units
+        self.floats[DECAY_RATE + slot] = decay_rate
+        ints[DURATION + slot] = duration
+        ints[SOURCE_MASK + slot] = source_mask
+        ints[TAG_MASK + slot] = tags
+        if locked:
+            self.locked_mask |= 1 << slot
+        else:
+            self.locked_mask &= ~(1 << slot)
+        self.cached_state = None
+
+    def clear_slot(self, slot: int):
+        self.names[slot] = None
+        self.locked_mask &= ~(1 << slot)
+        self.cached_state = None
+
+    # --- ported aura operations ---
+
+    def decay(self) -> list[str]:
+        """Tick every aura once (see `Aura.decay`) and return the names of those that expired."""
+        expired = []
+        occupied = self.slots()
+        if not occupied:
+            return expired
+        floats, ints = self.floats, self.ints
+        for slot in occupied:
+            if ints[DURATION + slot] > 0:
+                ints[DURATION + slot] -= 1
+            else:
+                floats[UNITS + slot] = max(0.0, floats[UNITS + slot] - floats[DECAY_RATE + slot])
+            if floats[UNITS + slot] <= 0.0 or ints[DURATION + slot] <= 0:
+                expired.append(self.names[slot])
+                self.clear_slot(slot)
+        self.cached_state = None
+        return expired
+
+    def consume(self, element: Element, amount: float) -> float:
+        """Take `amount` units from the aura of `element`, dropping it if emptied. Returns units consumed."""
+        slot = SLOT_OF.get(element)
+        if slot is None or self.names[slot] is None:
+            return 0.0
+        current = self.floats[UNITS + slot]
+        remaining = max(0.0, current - amount)
+        if remaining <= 0:
+            self.clear_slot(slot)
+        else:
+            self.floats[UNITS + slot] = remaining
+            self.cached_state = None
+        return min(current, amount)
+
+    def combine(self, element: Element):
+        """Array form of `core.combine_with_auras`."""
+        for slot in self.slots():
+            if self.floats[UNITS + slot] <= 0:
+                continue
+            key = frozenset({element, SLOT_ELEMENTS[slot]})
+            reaction_data = REACTIONS_WITH_AURA.get(key)
+            if reaction_data is None:
+                continue
+            for contributing in key:
+                if self.names[SLOT_OF[contributing]] is not None:
+                    self.clear_slot(SLOT_OF[contributing])
+            aura_slot = SLOT_OF[reaction_data["aura_element"]]
+            tag = SPECIAL_AURA_TAGS.get(reaction_data["aura_name"])
+            self.set_slot(
+                aura_slot, reaction_data["aura_name"], reaction_data["units"], 2,
+                source_mask=element_mask(key), tags=(1 << tag.value) if tag else 0,
+            )
+            return self, reaction_data["reaction_name"], AuraSlot(self, aura_slot)
+        return None
+
+    def refresh(self, element: Element, units: float):
+        """Array form of `core.refresh_aura`."""
+        slot = SLOT_OF[element]
+        if self.names[slot] is not None:
+            self.floats[UNITS + slot] = max(self.floats[UNITS + slot], units)
+            self.ints[DURATION + slot] = 2
+            self.cached_state = None
+        else:
+            self.set_slot(slot, element.name, units, 2)
+        return self, AuraSlot(self, slot)
+
+    # --- frozen states ---
+
+    def state_key(self) -> tuple:
+        """The aura state as `freeze_auras` would build it for the equivalent list."""
+        if self.cached_state is None:
+            floats, ints = self.floats, self.ints
+            self.cached_state = tuple(
+                AuraKey(
+                    self.names[slot], SLOT_ELEMENTS[slot], floats[UNITS + slot], ints[DURATION + slot],
+                    floats[DECAY_RATE + slot], bool(self.locked_mask & (1 << slot)),
+                    elements_from_mask(ints[SOURCE_MASK + slot]), tags_from_mask(ints[TAG_MASK + slot]),
+                )
+                for slot in self.slots()
+            )
+        return self.cached_state
+
+    def state_hash(self) -> int:
+        """hash(self.state_key()), computed once per aura state."""
+        state = self.state_key()
+        if self.cached_hash[0] is not state:
+            self.cached_hash = (state, hash(state))
+        return self.cached_hash[1]
+
+    def load_state(self, state: tuple):
+        self.clear()
+        for key in state:
+            self.set_slot(
+                SLOT_OF[key.element], key.name, key.units, key.duration, key.decay_rate, key.locked,
+                element_mask(key.source_elements), tag_mask(key.tags),
+            )
+        self.cached_state = state
+
+class AuraSlot:
+    """Live view of one `AuraStore` slot with the attribute interface of `Aura`."""
+    __slots__ = ("store", "slot")
+
+    def __init__(self, store: AuraStore, slot: int):
+        self.store = store
+        self.slot = slot
+
+    def __repr__(self):
+        return f"AuraSlot(name={self.name!r}, element={self.element}, units={self.units}, duration={self.duration})"
+
+    @property
+    def name(self) -> str:
+        return self.store.names[self.slot]
+
+    @property
+    def element(self) -> Element:
+        return SLOT_ELEMENTS[self.slot]
+
+    @property
+    def units(self) -> float:
+        return self.store.floats[UNITS + self.slot]
+
+    @units.setter
+    def units(self, value: float):
+        self.store.floats[UNITS + self.slot] = value
+        self.store.cached_state = None
+
+    @property
+    def duration(self) -> int:
+        return self.store.ints[DURATION + self.slot]
+
+    @duration.setter
+    def duration(self, value: int):
+        self.store.ints[DURATION + self.slot] = value
+        self.store.cached_state = None
+
+    @property
+    def decay_rate(self) -> float:
+        return self.store.floats[DECAY_RATE + self.slot]
+
+    @property
+    def locked(self) -> bool:
+        return bool(self.store.locked_mask & (1 << self.slot))
+
+    @property
+    def source(self):
+        return None
+
+    @property
+    def source_elements(self) -> frozenset:
+        return elements_from_mask(self.store.ints[SOURCE_MASK + self.slot])
+
+    @property
+    def tags(self) -> frozenset:
+        return tags_from_mask(self.store.ints[TAG_MASK + self.slot])
+
+    def is_expired(self) -> bool:
+        return self.units <= 0.0 or self.duration <= 0
+
+    def is_composite(self) -> bool:
+        return bin(self.store.ints[SOURCE_MASK + self.slot]).count("1") > 1
+
+    def add_tag(self, tag: AuraTag):
+        self.store.ints[TAG_MASK + self.slot] |= 1 << tag.value
+        self.store.cached_state = None
+
+    def remove_tag(self, tag: AuraTag):
+        self.store.ints[TAG_MASK + self.slot] &= ~(1 << tag.value)
+        self.store.cached_state = None
+
+    def has_tag(self, tag: AuraTag) -> bool:
+        return bool(self.store.ints[TAG_MASK + self.slot] & (1 << tag.value))
+
+    def has_any_tag(self, tag_set: set[AuraTag]) -> bool:
+        return any(self.has_tag(tag) for tag in tag_set)
@@ -0,0 +1,300 @@
+"""Snapshot, restore and fork of a battle in progress.
+
+A fork copies everything a turn can change: the turn manager (timeline,
+unit list, team index, spatial index, buff timers, field objects), every
+unit's HP, buffs, stat modifiers, ICD trackers, summons, combo index and any
+ad-hoc attributes such as Furina's fanfare_points. A character's
+value-only containers (core.COPY_ON_WRITE_FIELDS: base and final stats,
+cooldowns, energy, an AuraStore, resistances and damage bonuses) are
+shared copy-on-write instead: both sides mark them shared, and whichever
+writes first copies it through Character.own(). Buffs, stat modifiers and
+ICD trackers are still copied up front, since they hold objects (buff
+sources, defenders) that the fork replaces with its own copies.
+
+Everything else is shared with the original:
+
+- values that cannot change: numbers, strings, enum members, positions,
+  frozensets, and tuples whose items are all shared;
+- battle configuration: Talents, Passives, DamageInstances and normal
+  attack chains, which are set up before a battle and never edited during
+  one;
+- functions. A closure is rebuilt only if a variable it captured is itself
+  forked (a buff effect closing over its owner, say), so that it acts on
+  the copy; closures over configuration keep pointing at the same cells.
+
+Containers and objects keyed by id() (the timeline index, team index and
+spatial grid) are re-keyed for the copies. Module-level globals are not
+part of the state: a function that reaches a unit through a global name
+still sees the original.
+"""
+
+import itertools
+import random
+import types
+from array import array
+from collections import defaultdict
+from enum import Enum
+from uuid import UUID
+
+from aura_state import AuraStore
+from core import COPY_ON_WRITE_FIELDS, Character, DamageInstance, NormalAttackChain, Passive, Position, Talent
+from spatial_index import SpatialGrid
+from turn import TurnManager
+
+SHARED_TYPES = {
+    type(None), bool, int, float, complex, str, bytes, range, UUID, Position,
+    type, types.ModuleType, types.BuiltinFunctionType, types.CodeType,
+    Talent, Passive, DamageInstance, NormalAttackChain,
+}
+
+class BattleState:
+    """A battle in progress: its turn manager and the two team lists passed to play_turn."""
+    __slots__ = ("turn_manager", "player_team", "enemy_team")
+
+    def __init__(self, turn_manager: TurnManager, player_team: list[Character], enemy_team: list[Character]):
+        self.turn_manager = turn_manager
+        self.player_team = player_team
+        self.enemy_team = enemy_team
+
+    def fork(self) -> 'BattleState':
+        """An independent copy; playing either one leaves the other untouched."""
+        return Forker().fork(self)
+
+    def snapshot(self) -> 'BattleSnapshot':
+        return BattleSnapshot(self)
+
+class BattleSnapshot:
+    """A frozen copy of a battle (and of the `random` state) that can be restored any number of times."""
+
+    def __init__(self, state: BattleState):
+        self.state = state.fork()
+        self.rng_state = random.getstate()
+
+    def restore(self, restore_rng: bool = True) -> BattleState:
+        """A new copy of the battle as it was when the snapshot was taken."""
+        if restore_rng:
+            random.setstate(self.rng_state)
+        return self.state.fork()
+
+def split_counter(owner, name: str) -> itertools.count:
+    """A copy of the itertools.count stored at owner.<name>, leaving the original's next value unchanged."""
+    value = next(getattr(owner, name))
+    setattr(owner, name, itertools.count(value))
+    return itertools.count(value)
+
+class Forker:
+    """One fork of a battle. `memo` maps id(original) to its copy so shared references stay shared."""
+
+    def __init__(self):
+        self.memo = {}
+        self.slot_names = {}
+
+    def fork(self, obj):
+        cls = type(obj)
+        if cls in SHARED_TYPES:
+            return obj
+        copied = self.memo.get(id(obj))
+        if copied is not None:
+            return copied
+
+        handler = FORK_HANDLERS.get(cls)
+        if handler is not None:
+            return handler(self, obj)
+        if issubclass(cls, Enum):
+            SHARED_TYPES.add(cls)
+            return obj
+        if issubclass(cls, tuple):
+            return self.fork_tuple(obj)
+        if issubclass(cls, dict):
+            return self.fork_dict(obj)
+        return self.fork_object(obj)
+
+    def fork_tuple(self, obj: tuple):
+        items = [self.fork(item) for item in obj]
+        if all(new is old for new, old in zip(items, obj)):
+            copied = obj
+        elif hasattr(obj, "_make"):
+            copied = obj._make(items)
+        else:
+            copied = type(obj)(items)
+        self.memo[id(obj)] = copied
+        return copied
+
+    def fork_list(self, obj: list):
+        copied = []
+        self.memo[id(obj)] = copied
+        copied.extend([self.fork(item) for item in obj])
+        return copied
+
+    def fork_set(self, obj: set):
+        copied = set()
+        self.memo[id(obj)] = copied
+        copied.update(self.fork(item) for item in obj)
+        return copied
+
+    def fork_frozenset(self, obj: frozenset):
+        items = [self.fork(item) for item in obj]
+        copied = obj if all(new is old for new, old in zip(items, obj)) else frozenset(items)
+        self.memo[id(obj)] = copied
+        return copied
+
+    def fork_dict(self, obj: dict):
+        if isinstance(obj, defaultdict):
+            copied = type(obj)(obj.default_factory)
+        else:
+            copied = type(obj)()
+        self.memo[id(obj)] = copied
+        fork = self.fork
+        for key, value in obj.items():
+            copied[fork(key)] = fork(value)
+        if type(obj) not in (dict, defaultdict):
+            self.copy_attributes(obj, copied)
+        return copied
+
+    def fork_array(self, obj: array):
+        copied = obj[:]
+        self.memo[id(obj)] = copied
+        return copied
+
+    def fork_function(self, obj: types.FunctionType):
+        if not obj.__closure__:
+            return obj
+        contents = []
+        changed = False
+        for cell in obj.__closure__:
+            try:
+                value = cell.cell_contents
+            except ValueError:  # not assigned yet
+                contents.append(cell)
+                continue
+            copied = self.fork(value)
+            changed = changed or copied is not value
+            contents.append(types.CellType(copied))
+        if not changed:
+            copied = obj
+        else:
+            copied = types.FunctionType(obj.__code__, obj.__globals__, obj.__name__, obj.__defaults__, tuple(contents))
+            copied.__kwdefaults__ = obj.__kwdefaults__
+            copied.__dict__.update(obj.__dict__)
+        self.memo[id(obj)] = copied
+        return copied
+
+    def fork_method(self, obj: types.MethodType):
+        copied = types.MethodType(self.fork(obj.__func__), self.fork(obj.__self__))
+        self.memo[id(obj)] = copied
+        return copied
+
+    def fork_object(self, obj):
+        cls = type(obj)
+        copied = cls.__new__(cls)
+        self.memo[id(obj)] = copied
+        self.copy_attributes(obj, copied)
+        return copied
+
+    def fork_character(self, unit: Character):
+        copied = Character.__new__(Character)
+        self.memo[id(unit)] = copied
+        instance_dict = vars(unit)
+        copied_dict = copied.__dict__
+        copied_dict.update(instance_dict)
+        shared = set()
+        for name in COPY_ON_WRITE_FIELDS:
+            # An aura list holds mutable Aura objects, so only a store is shared
+            if name != "auras" or isinstance(instance_dict[name], AuraStore):
+                shared.add(name)
+        fork = self.fork
+        for name, value in instance_dict.items():
+            if name not in shared:
+                copied_dict[name] = fork(value)
+        unit.shared_fields |= shared
+        copied.shared_fields = shared
+        return copied
+
+    def copy_attributes(self, obj, copied):
+        # The copy starts out pointing at the original's values, so it can already be hashed
+        # (e.g. as an icd_trackers key) if a reference cycle reaches it before it is finished
+        fork = self.fork
+        instance_dict = getattr(obj, "__dict__", None)
+        if instance_dict is not None:
+            copied_dict = copied.__dict__
+            copied_dict.update(instance_dict)
+            for name, value in instance_dict.items():
+                copied_dict[name] = fork(value)
+        slot_values = []
+        for name in self.slots_of(type(obj)):
+            try:
+                value = getattr(obj, name)
+            except AttributeError:  # unset slot
+                continue
+            object.__setattr__(copied, name, value)
+            slot_values.append((name, value))
+        for name, value in slot_values:
+            object.__setattr__(copied, name, fork(value))
+
+    def slots_of(self, cls) -> tuple:
+        names = self.slot_names.get(cls)
+        if names is None:
+            names = tuple(
+                name
+                for klass in cls.__mro__
+                for name in getattr(klass, "__slots__", ())
+                if name not in ("__dict__", "__weakref__")
+            )
+            self.slot_names[cls] = names
+        return names
+
+    def fork_turn_manager(self, manager: TurnManager):
+        copied = TurnManager.__new__(TurnManager)
+        self.memo[id(manager)] = copied
+        fork = self.fork
+        rekeyed = ("timeline_entries", "team_ids", "team_views", "counter", "entry_seq")
+        copied.__dict__.update({name: fork(value) for name, value in vars(manager).items() if name not in rekeyed})
+
+        # Heap entries are tuples, so the memo hands the index the same copies the heap holds
+        copied.timeline_entries = {}
+        for entry in manager.timeline_entries.values():
+            new_entry = fork(entry)
+            copied.timeline_entries[id(new_entry[3])] = new_entry
+        copied.team_ids = {id(fork(unit)): manager.team_ids[id(unit)] for unit in manager.units
+                           if id(unit) in manager.team_ids}
+        copied.team_views = {}
+        copied.counter = split_counter(manager, "counter")
+        copied.entry_seq = split_counter(manager, "entry_seq")
+        return copied
+
+    def fork_spatial_grid(self, grid: SpatialGrid):
+        copied = SpatialGrid.__new__(SpatialGrid)
+        self.memo[id(grid)] = copied
+        copied.cell_size = grid.cell_size
+        copied.bounds = grid.bounds
+        copied.cells = defaultdict(dict)
+        copied.locations = {}
+        for cell, bucket in grid.cells.items():
+            new_bucket = copied.cells[cell]
+            for seq, obj in bucket.values():
+                new_obj = self.fork(obj)
+                new_bucket[id(new_obj)] = (seq, new_obj)
+                copied.locations[id(new_obj)] = (cell, seq)
+        copied.counter = split_counter(grid, "counter")
+        return copied
+
+    def fork_battle_state(self, state: BattleState):
+        copied = BattleState(self.fork(state.turn_manager), self.fork(state.player_team), self.fork(state.enemy_team))
+        self.memo[id(state)] = copied
+        return copied
+
+FORK_HANDLERS = {
+    tuple: Forker.fork_tuple,
+    list: Forker.fork_list,
+    set: Forker.fork_set,
+    frozenset: Forker.fork_frozenset,
+    dict: Forker.fork_dict,
+    defaultdict: Forker.fork_dict,
+    array: Forker.fork_array,
+    types.FunctionType: Forker.fork_function,
+    types.MethodType: Forker.fork_method,
+    TurnManager: Forker.fork_turn_manager,
+    Character: Forker.fork_character,
+    SpatialGrid: Forker.fork_spatial_grid,
+    BattleState: Forker.fork_battle_state,
+}
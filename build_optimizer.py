@@ -0,0 +1,232 @@
+"""Substat build optimizer.
+
+Distributes a budget of substat rolls over one character's base stats to
+maximize the damage of a fixed rotation. The rotation is played once in
+expected-damage mode with the turn manager recording a HitTrace per hit:
+everything about the hit that does not depend on the character's base
+stats (talent multipliers, DMG bonus, DEF/RES, the stat modifiers active at
+the time, which reaction it triggered). Every candidate build is then
+re-evaluated from the traces in numpy, a chunk of builds at a time, using
+the same operations in the same order as calculate_damage. Builds never
+replay the battle.
+
+The rotation is fixed, so a stat that only changes the turn order (SPD)
+or energy (ENERGY_RECHARGE) adds no rotation damage. Such stats are scored
+as secondary objectives instead, and the result is the Pareto set of
+(damage, secondary stats). Damage is the sum of the player team's hits,
+which is what the engine applies to the enemies and what
+sensitivity.perturbed_damage measures; teammates' hits and Dendro Core
+bursts are constant across builds.
+
+    python build_optimizer.py --character Gaming --rolls 20 --floor SPD=130
+"""
+
+import argparse
+import itertools
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+from combat_helpers import HitTrace
+from core import Character, StatType
+from damage_kernel import amplifying_multiplier_batch, quicken_bonus_batch, transformative_damage_batch
+from engine import ActionPolicy, SimplePolicy, get_living, play_turn, quiet_output
+
+# What one substat roll adds to a base stat; ATK, HP and DEF rolls are a fraction of the character's base value
+SUBSTAT_ROLLS = {
+    StatType.ATK: 0.0496,
+    StatType.HP: 0.0496,
+    StatType.DEF: 0.062,
+    StatType.EM: 19.82,
+    StatType.CRIT_RATE: 0.0331,
+    StatType.CRIT_DMG: 0.0662,
+    StatType.ENERGY_RECHARGE: 0.0551,
+    StatType.SPD: 2.6,
+}
+PERCENT_ROLLS = {StatType.ATK, StatType.HP, StatType.DEF}
+DEFAULT_STATS = (StatType.ATK, StatType.HP, StatType.EM, StatType.CRIT_RATE, StatType.CRIT_DMG, StatType.SPD)
+SECONDARY_STATS = (StatType.SPD, StatType.ENERGY_RECHARGE)
+
+@dataclass
+class Build:
+    rolls: dict
+    damage: float
+    stats: dict = field(default_factory=dict)  # base stats after the rolls
+
+def roll_values(character: Character, stats) -> np.ndarray:
+    base = character.base_stats
+    return np.array([SUBSTAT_ROLLS[stat] * (base.get(stat, 0) if stat in PERCENT_ROLLS else 1) for stat in stats])
+
+def allocations(rolls: int, parts: int) -> np.ndarray:
+    """Every way to split `rolls` into `parts` non-negative counts, one row per split."""
+    if parts == 1:
+        return np.array([[rolls]])
+    # Stars and bars: choose where the parts - 1 bars go among rolls + parts - 1 slots
+    bars = np.array(list(itertools.combinations(range(rolls + parts - 1), parts - 1)), dtype=np.int64)
+    edges = np.hstack([np.full((len(bars), 1), -1), bars, np.full((len(bars), 1), rolls + parts - 1)])
+    return np.diff(edges, axis=1) - 1
+
+def record_traces(scenario: Callable, horizon: float, policy: Optional[ActionPolicy] = None):
+    """Play `scenario` in expected-damage mode up to `horizon` AV; return (the player team's HitTraces, player team)."""
+    from rotation_optimizer import start_battle
+    policy = policy or SimplePolicy()
+    with quiet_output(False):
+        state = start_battle(scenario)
+        state.turn_manager.hit_traces = []
+        while get_living(state.player_team) and get_living(state.enemy_team):
+            upcoming = state.turn_manager.peek_timeline()
+            if upcoming is None or upcoming[0] > horizon:
+                break
+            play_turn(state.turn_manager, state.player_team, state.enemy_team, policy)
+    player_team = state.player_team
+    return [trace for trace in state.turn_manager.hit_traces if trace.attacker in player_team], player_team
+
+class BuildEvaluator:
+    """Rotation damage as a function of one character's base stats, evaluated for many builds at once."""
+
+    def __init__(self, traces: list[HitTrace], character: Character):
+        self.character = character
+        self.base_stats = dict(character.base_stats)
+        self.traces = [trace for trace in traces if trace.attacker is character]
+        other = [trace for trace in traces if trace.attacker is not character]
+        self.fixed_damage = sum(
+            float(self.trace_damage(trace, dict(trace.attacker.base_stats), {})[0]) for trace in other
+        )
+
+    def stat(self, trace: HitTrace, stat: StatType, base_stats: dict, cache: dict):
+        """The stat the hit saw: base plus the modifiers active at the time, added in Character.recompute_stat's order."""
+        key = (id(trace.modifiers), stat)
+        value = cache.get(key)
+        if value is None:
+            base = np.atleast_1d(np.asarray(base_stats.get(stat, 0), dtype=float))
+            value = base
+            for modifier in trace.modifiers:
+                if modifier.stat == stat:
+                    value = value + (base * modifier.amount if modifier.percent else modifier.amount)
+            cache[key] = value
+        return value
+
+    def trace_damage(self, trace: HitTrace, base_stats: dict, cache: dict) -> np.ndarray:
+        if trace.kind == "transformative":
+            return transformative_damage_batch(trace.reaction, self.stat(trace, StatType.EM, base_stats, cache))
+
+        instance = trace.instance
+        damage = self.stat(trace, instance.scaling_stat, base_stats, cache) * instance.multiplier * instance.base_dmg_multiplier
+        damage = damage + instance.additive_base_dmg_bonus
+        damage = damage * trace.bonus_multiplier
+        crit_rate = self.stat(trace, StatType.CRIT_RATE, base_stats, cache)
+        damage = damage * (1 + np.clip(crit_rate, 0.0, 1.0) * self.stat(trace, StatType.CRIT_DMG, base_stats, cache))
+        damage = damage * trace.def_res_mult
+        if trace.kind == "amplifying":
+            damage = damage * amplifying_multiplier_batch(trace.reaction, self.stat(trace, StatType.EM, base_stats, cache))
+        elif trace.kind == "quicken":
+            damage = damage + quicken_bonus_batch(trace.reaction, self.stat(trace, StatType.EM, base_stats, cache))
+        return np.round(damage)
+
+    def damage(self, base_stats: dict) -> np.ndarray:
+        """Total rotation damage for each build; `base_stats` maps StatType to per-build arrays (or scalars)."""
+        stats = dict(self.base_stats)
+        stats.update(base_stats)
+        cache = {}
+        total = np.float64(self.fixed_damage)
+        for trace in self.traces:
+            total = total + self.trace_damage(trace, stats, cache)
+        return total
+
+def pareto_front(damage: np.ndarray, secondary: np.ndarray) -> np.ndarray:
+    """Indices of the builds no other build beats on damage and every secondary column at once."""
+    if secondary.shape[1] == 0:
+        return np.array([int(np.argmax(damage))])
+    # Builds with the same secondary values compete on damage alone
+    _, inverse = np.unique(secondary, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.lexsort((-damage, inverse))
+    first = order[np.r_[True, inverse[order][1:] != inverse[order][:-1]]]
+    front = []
+    for index in sorted(first, key=lambda i: -damage[i]):
+        if not any(np.all(secondary[kept] >= secondary[index]) for kept in front):
+            front.append(index)
+    return np.array(front)
+
+def optimize_build(scenario: Callable, character_name: str, rolls: int, horizon: float,
+                   stats=DEFAULT_STATS, policy: Optional[ActionPolicy] = None,
+                   min_rolls: Optional[dict] = None, max_rolls: Optional[dict] = None,
+                   floors: Optional[dict] = None, chunk_size: int = 65536) -> list[Build]:
+    """Pareto set of ways to spend `rolls` substat rolls on `stats` for `character_name`.
+
+    `min_rolls`/`max_rolls` bound the rolls per stat; `floors` sets a minimum
+    base value per stat after rolls (e.g. {StatType.SPD: 130}). Builds are
+    ranked by the damage of the rotation `policy` plays up to `horizon` AV,
+    with SPD and ENERGY_RECHARGE (if in `stats`) as further objectives.
+    Returned best damage first.
+    """
+    stats = tuple(stats)
+    traces, player_team = record_traces(scenario, horizon, policy)
+    character = next(unit for unit in player_team if unit.name == character_name)
+    evaluator = BuildEvaluator(traces, character)
+
+    counts = allocations(rolls, len(stats))
+    for bounds, keep in ((min_rolls, np.greater_equal), (max_rolls, np.less_equal)):
+        for stat, limit in (bounds or {}).items():
+            counts = counts[keep(counts[:, stats.index(stat)], limit)]
+    increments = roll_values(character, stats)
+    values = character.base_stats
+    final = np.array([values.get(stat, 0) for stat in stats]) + counts * increments
+    for stat, floor in (floors or {}).items():
+        feasible = final[:, stats.index(stat)] >= floor
+        counts, final = counts[feasible], final[feasible]
+    if not len(counts):
+        return []
+
+    damage = np.empty(len(counts))
+    for start in range(0, len(counts), chunk_size):
+        chunk = final[start:start + chunk_size]
+        damage[start:start + chunk_size] = evaluator.damage({stat: chunk[:, i] for i, stat in enumerate(stats)})
+
+    secondary = [i for i, stat in enumerate(stats) if stat in SECONDARY_STATS]
+    front = pareto_front(damage, final[:, secondary])
+    return [
+        Build(
+            rolls={stat: int(counts[index, i]) for i, stat in enumerate(stats)},
+            damage=float(damage[index]),
+            stats={stat: float(final[index, i]) for i, stat in enumerate(stats)},
+        )
+        for index in front
+    ]
+
+def parse_stat_values(items: list[str]) -> dict:
+    return {StatType[name.upper()]: float(value) for name, value in (item.split("=") for item in items)}
+
+def main():
+    import characters
+    import lorelaiimpact
+    from montecarlo import TeamScenario
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--character", default="Gaming")
+    parser.add_argument("--rolls", type=int, default=20, help="substat rolls to distribute")
+    parser.add_argument("--stats", nargs="+", default=[stat.name for stat in DEFAULT_STATS])
+    parser.add_argument("--horizon", type=float, default=1000, help="action value the rotation covers")
+    parser.add_argument("--floor", nargs="*", default=[], metavar="STAT=VALUE", help="minimum base stat after rolls")
+    parser.add_argument("--max-rolls", nargs="*", default=[], metavar="STAT=N", help="cap on rolls per stat")
+    args = parser.parse_args()
+
+    scenario = TeamScenario(
+        [characters.shinobu, characters.rosaria, characters.yanfei, characters.gaming],
+        lorelaiimpact.dummies,
+    )
+    stats = [StatType[name.upper()] for name in args.stats]
+    max_rolls = {stat: int(limit) for stat, limit in parse_stat_values(args.max_rolls).items()}
+    builds = optimize_build(scenario, args.character, args.rolls, args.horizon, stats,
+                            max_rolls=max_rolls, floors=parse_stat_values(args.floor))
+    if not builds:
+        print("No build satisfies the constraints.")
+        return
+    print(f"Pareto builds for {args.character} ({args.rolls} rolls, {args.horizon:g} AV):")
+    for build in builds:
+        rolls = ", ".join(f"{stat.name} {count}" for stat, count in build.rolls.items() if count)
+        print(f"  {build.damage:>12,.0f} DMG  SPD {build.stats.get(StatType.SPD, 0):.1f}  [{rolls}]")
+
+if __name__ == "__main__":
+    main()
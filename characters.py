@@ -9,6 +9,7 @@ from typing import Optional, Callable
 from core import Character, StatType, Element, DamageInstance, DamageType, Talent, NormalAttackChain, Passive
 from turn import TurnManager, Buff
 from combat import summon_salon_members, heal, get_allies
+from event_system import HpChangeEvent
 
 #yanfei core
 yanfei = Character("Yanfei",
@@ -172,10 +173,7 @@ def decrement_summon_duration(furina: Character, turn_manager: TurnManager):
             for summon in list(furina.summons):
                 print(f"{summon.name} expires as Furina's counter ends.")
                 furina.summons.remove(summon)
-                if summon in turn_manager.units:
-                    turn_manager.units.remove(summon)
-                turn_manager.timeline = [(t, o, c) for (t, o, c) in turn_manager.timeline if c != summon]
-                heapq.heapify(turn_manager.timeline)
+                turn_manager.remove_unit(summon)
 
 soloists_solicitation = NormalAttackChain(
     name="Soloist's Solicitation",
@@ -252,7 +250,8 @@ salon_solitaire = Talent(
 
 furina.fanfare_points = 0
 
-def gain_fanfare_from_hp_change(observer: Character, unit: Character, old_hp: int, new_hp: int):
+def gain_fanfare_from_hp_change(observer: Character, event: HpChangeEvent):
+    unit, old_hp, new_hp = event.unit, event.old_hp, event.new_hp
     if not hasattr(observer, "fanfare_points") or not getattr(observer, "revelry_active", False):
         return
 
@@ -276,7 +275,6 @@ def gain_fanfare_from_hp_change(observer: Character, unit: Character, old_hp: in
 def update_party_revelry_bonuses(buff: Buff, unit: Character, **kwargs):
     source = buff.source
     if not hasattr(source, "fanfare_points"):
-        print(f"[DEBUG] {unit.name} → missing source fanfare.")
         return
 
     bonus_pct = source.fanfare_points * 0.0023  
@@ -285,7 +283,6 @@ def update_party_revelry_bonuses(buff: Buff, unit: Character, **kwargs):
     print(f"{unit.name} receives {bonus_pct*100:.1f}% DMG bonus from Universal Revelry.")
 
 def refresh_universal_revelry_bonuses(furina: Character):
-    print(f"[DEBUG] refresh_universal_revelry_bonuses called for {furina.name}")
     if not getattr(furina, "revelry_active", False):
         return
 
@@ -298,7 +295,7 @@ def expire_universal_revelry(furina: Character):
     print(f"Universal Revelry has expired.")
 
     for unit in getattr(furina, "revelry_units", []):
-        unit.buffs = [b for b in unit.buffs if not (b.name == "Universal Revelry" and b.source == furina)]
+        unit.set_buffs([b for b in unit.buffs if not (b.name == "Universal Revelry" and b.source == furina)])
         unit.general_dmg_bonus = 0
 
     furina.fanfare_points = 0
@@ -316,7 +313,7 @@ def apply_universal_revelry(attacker: Character, defender: Character, turn_manag
         if unit.current_hp <= 0:
             continue
 
-        unit.buffs = [b for b in unit.buffs if not (b.name == "Universal Revelry" and b.source == attacker)]
+        unit.set_buffs([b for b in unit.buffs if not (b.name == "Universal Revelry" and b.source == attacker)])
 
         buff = Buff(
             name="Universal Revelry",
@@ -329,7 +326,7 @@ def apply_universal_revelry(attacker: Character, defender: Character, turn_manag
             reversible=True
         )
 
-        unit.buffs.append(buff)
+        unit.add_buff(buff)
         attacker.revelry_units.append(unit)
 
     # Add shared timer
@@ -366,7 +363,8 @@ fanfare_tracker = Passive(
     name="Fanfare Tracker",
     description="Gain Fanfare when party HP changes.",
     trigger="on_hp_change",
-    effect=gain_fanfare_from_hp_change
+    effect=gain_fanfare_from_hp_change,
+    delivery="action"
 )
 
 furina.set_normal_attack_chain(soloists_solicitation)
@@ -13,8 +13,14 @@ from dendro_core import spawn_dendro_core
 from combat_helpers import *
 from event_system import *
 
-def get_targets_in_radius(center: Character, candidates: list[Character], radius: float) -> list[Character]:
-    return [unit for unit in candidates if unit != center and distance(center, unit) <= radius]
+damage_listeners = []
+
+def add_damage_listener(listener: Callable):
+    damage_listeners.append(listener)
+
+def remove_damage_listener(listener: Callable):
+    if listener in damage_listeners:
+        damage_listeners.remove(listener)
 
 def heal(target: Character, amount: int, source: Optional[Character] = None, team: Optional[list[Character]] = None):
     if team is None:
@@ -43,6 +49,9 @@ def take_damage(target: Character, amount: int, source: Optional[Character] = No
     if taken_summary is not None:
         taken_summary[target.name] += amount
 
+    for listener in damage_listeners:
+        listener(source, target, amount)
+
     notify_hp_change(target, old_hp, target.current_hp, team)
 
     return amount
@@ -73,7 +82,10 @@ def salon_attack_action(summon: 'Summon', enemy_team: list[Character]):
     if not enemy_team:
         return
 
-    target = random.choice(enemy_team)
+    if getattr(getattr(summon, "turn_manager", None), "expected_damage", False):
+        target = enemy_team[0]
+    else:
+        target = random.choice(enemy_team)
     owner = summon.owner
     drained_allies = 0
     damage_multiplier = summon.stats.get("multiplier", 0.1)
@@ -103,7 +115,7 @@ def salon_attack_action(summon: 'Summon', enemy_team: list[Character]):
     )
 
     # Correctly unpack from dict
-    result = calculate_damage(owner, target, damage_instance)
+    result = calculate_damage(owner, target, damage_instance, getattr(summon, "turn_manager", None))
     damage = result["damage"]
     reactions = result["reactions"]
 
@@ -2,10 +2,20 @@ from core import *
 from reaction_logic import *
 from constants import *
 import random
+from collections import namedtuple
 from reaction_constants import *
 from position_utils import *
+from aura_state import apply_aura_transition
+
+# One hit of a recorded rotation: damage if it does not crit, damage if it does, and the crit chance
+HitOutcome = namedtuple("HitOutcome", "source target damage crit_damage crit_rate")
+# The inputs of one hit that depend on anything but the attacker's base stats, so the hit can be
+# re-evaluated for other base stats. Transformative reaction hits have only attacker, modifiers and reaction.
+HitTrace = namedtuple("HitTrace", "attacker target instance modifiers bonus_multiplier def_res_mult reaction kind")
 
 class ICDTracker:
+    __slots__ = ("hit_counter", "tag", "interval")
+
     def __init__(self, tag=None, interval=3):
         self.hit_counter = 0
         self.tag = tag
@@ -21,11 +31,13 @@ class ICDTracker:
                 self.hit_counter = 0
             return False
 
-def calculate_dmg_bonus(attacker: Character, instance: DamageInstance) -> float:
+def calculate_dmg_bonus(attacker: Character, instance: DamageInstance, element=INSTANCE_ELEMENT) -> float:
+    if element is INSTANCE_ELEMENT:
+        element = instance.element
     bonus = 0.0
 
     bonus += attacker.general_dmg_bonus
-    bonus += attacker.elemental_bonuses.get(instance.element, 0.0)
+    bonus += attacker.elemental_bonuses.get(element, 0.0)
     bonus += attacker.type_bonuses.get(instance.damage_type, 0.0)
     # TODO: conditional bonuses, e.g., vs frozen, HP thresholds, buffs
     return bonus
@@ -46,58 +58,56 @@ def calculate_res_multiplier(defender: Character, element: Element) -> float:
     else:
         return 1 / (4 * res + 1)
 
-def calculate_damage(attacker: Character, defender: Character, instance: DamageInstance, turn_manager: TurnManager):
+def calculate_damage(attacker: Character, defender: Character, instance: DamageInstance, turn_manager: TurnManager,
+                     element=INSTANCE_ELEMENT):
+    """Evaluate one hit. `element` overrides the instance's element (None for a hit that applies none).
+
+    If the turn manager has `expected_damage` set, crits contribute their
+    expected value (1 + rate * crit DMG) instead of being rolled. If it also
+    has a `hit_outcomes` list, the hit's non-crit and crit damage and its
+    reaction hits are appended to it as HitOutcomes; a `hit_traces` list
+    gets them as HitTraces.
+    """
+    effective_element = instance.element if element is INSTANCE_ELEMENT else element
     base_stat = attacker.get_stat(instance.scaling_stat)
     base_damage = (base_stat * instance.multiplier * instance.base_dmg_multiplier)
     base_damage += instance.additive_base_dmg_bonus
 
-    bonus = calculate_dmg_bonus(attacker, instance)
+    bonus = calculate_dmg_bonus(attacker, instance, effective_element)
     reduction = defender.dmg_reduction_taken
     multiplier = 1 + bonus - reduction
     base_damage *= multiplier
 
     crit_rate = attacker.get_stat(StatType.CRIT_RATE)
     crit_dmg = attacker.get_stat(StatType.CRIT_DMG)
-    is_crit = random.random() < crit_rate
-    if is_crit:
-        base_damage *= (1 + crit_dmg)
+    expected = getattr(turn_manager, "expected_damage", False)
+    pre_crit_damage = base_damage
+    if expected:
+        is_crit = crit_rate >= 1
+        base_damage *= 1 + min(max(crit_rate, 0.0), 1.0) * crit_dmg
+    else:
+        is_crit = random.random() < crit_rate
+        if is_crit:
+            base_damage *= (1 + crit_dmg)
 
     def_mult = calculate_def_multiplier(attacker, defender)
-    res_mult = calculate_res_multiplier(defender, instance.element)
-    base_damage *= def_mult * res_mult
+    res_mult = calculate_res_multiplier(defender, effective_element)
+    def_res_mult = def_mult * res_mult
+    base_damage *= def_res_mult
+    reaction_bonus = 1.0
+    flat_bonus = 0.0
 
-    effective_element = instance.element
     reaction_hits = []
     applied_element = False
     reaction_name = None
     reacted_with_aura = None
 
     if effective_element:
-        # Track new elements
-        if not hasattr(defender, "_just_applied_elements"):
-            defender._just_applied_elements = set()
-        defender._just_applied_elements.add(effective_element)
-
-        reaction_info = check_reaction(
-            new_element=effective_element,
-            existing_auras=defender.auras[:],
-            just_applied_elements=defender._just_applied_elements
-        )
-
-        defender.apply_elemental_effect(
-                element=effective_element,
-                attacker=attacker,
-                units=1.0
-        )
+        transition, reacted_with_aura = apply_aura_transition(defender, effective_element, units=1.0)
+        reaction_name = transition.reaction
         applied_element = True
 
-        if reaction_info:
-            if isinstance(reaction_info, tuple):
-                reaction_name, reacted_with_aura = reaction_info
-            else:
-                reaction_name = reaction_info.get("reaction")
-                reacted_with_aura = reaction_info.get("triggering_aura")
-
+        if reaction_name:
             reaction_result_data = resolve_reaction_effect(reaction_name, attacker, defender, turn_manager)
             reaction_hits.extend(reaction_result_data)
 
@@ -107,7 +117,8 @@ def calculate_damage(attacker: Character, defender: Character, instance: DamageI
             reaction_hit_exists = any(isinstance(r, ReactionHit) and is_transformative(r.reaction) for r in reaction_result_data)
             if is_transformative(reaction_name) and not reaction_hit_exists:
                 reaction_result = calculate_transformative_damage(
-                    reaction_name, attacker, source_elements=reacted_with_aura.source_elements if reacted_with_aura else None
+                    reaction_name, attacker, source_elements=reacted_with_aura.source_elements if reacted_with_aura else None,
+                    expected=expected
                 )
                 
                 # Primary hit
@@ -122,8 +133,7 @@ def calculate_damage(attacker: Character, defender: Character, instance: DamageI
                 # AoE splash
                 aoe_radius = reaction_result.get("aoe_radius", 0.0)
                 if aoe_radius > 0:
-                    all_enemies = get_enemies(attacker, turn_manager)
-                    splash_targets = get_targets_in_radius(defender, all_enemies, aoe_radius)
+                    splash_targets = get_enemies_in_radius(attacker, defender, aoe_radius, turn_manager)
                     for target in splash_targets:
                         if target == defender:
                             continue
@@ -140,21 +150,43 @@ def calculate_damage(attacker: Character, defender: Character, instance: DamageI
                 base_damage *= reaction_bonus
 
             elif reaction_name == "Aggravate":
-                base_damage += check_aggravate(attacker, defender, effective_element)
+                flat_bonus = check_aggravate(attacker, defender, effective_element)
+                base_damage += flat_bonus
 
             elif reaction_name == "Spread":
-                base_damage += check_spread(attacker, defender, effective_element)
+                flat_bonus = check_spread(attacker, defender, effective_element)
+                base_damage += flat_bonus
 
-            # Consume aura units if appropriate
-            if reacted_with_aura and is_consuming_reaction(reaction_name):
-                consume_aura_units(defender, reacted_with_aura.element, reaction=reaction_name)
-
-
-    if hasattr(defender, "_just_applied_elements"):
-        del defender._just_applied_elements
+            if transition.consumed_units:
+                print(f"{transition.consumed_units}U of {reacted_with_aura.element.name} aura on {defender.name} consumed by {reaction_name}.")
 
     total_damage = round(base_damage)
 
+    if expected:
+        outcomes = getattr(turn_manager, "hit_outcomes", None)
+        if outcomes is not None:
+            # Same operation order as a rolled hit, so each outcome matches what RNG would give
+            outcomes.append(HitOutcome(
+                attacker, defender,
+                round(pre_crit_damage * def_res_mult * reaction_bonus + flat_bonus),
+                round(pre_crit_damage * (1 + crit_dmg) * def_res_mult * reaction_bonus + flat_bonus),
+                min(max(crit_rate, 0.0), 1.0),
+            ))
+            for hit in reaction_hits:
+                if isinstance(hit, ReactionHit):
+                    outcomes.append(HitOutcome(hit.source, hit.target, hit.damage, hit.damage, 0.0))
+        traces = getattr(turn_manager, "hit_traces", None)
+        if traces is not None:
+            modifiers = tuple(attacker.stat_modifiers)
+            kind = ("amplifying" if reaction_name and is_amplifying(reaction_name)
+                    else "quicken" if flat_bonus else None)
+            traces.append(HitTrace(attacker, defender, instance, modifiers, multiplier, def_res_mult,
+                                   reaction_name if kind else None, kind))
+            for hit in reaction_hits:
+                if isinstance(hit, ReactionHit):
+                    traces.append(HitTrace(hit.source, hit.target, None, modifiers, None, None,
+                                           reaction_name, "transformative"))
+
     return {
         "damage": total_damage,
         "crit": is_crit,
@@ -0,0 +1,17 @@
+"""Shared test fixtures. Kept at the repository root so pytest puts the flat modules on sys.path."""
+
+import pytest
+
+import characters
+import lorelaiimpact
+from montecarlo import TeamScenario
+
+@pytest.fixture
+def gaming_team() -> TeamScenario:
+    return TeamScenario([characters.shinobu, characters.rosaria, characters.yanfei, characters.gaming],
+                        lorelaiimpact.dummies)
+
+@pytest.fixture
+def furina_team() -> TeamScenario:
+    return TeamScenario([characters.furina, characters.shinobu, characters.rosaria, characters.yanfei],
+                        lorelaiimpact.dummies)
@@ -1,3 +1,4 @@
+import copy
 from dataclasses import dataclass, field
 from collections import defaultdict, namedtuple
 from typing import Optional, Callable, TYPE_CHECKING, Set
@@ -56,32 +57,81 @@ class ElementalApplicationResult:
     reaction: Optional[str] = None
     new_aura: Optional['Aura'] = None
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class Position:
     x: int
     y: int
 
+def buff_digest(buff) -> int:
+    """A buff's part of its holder's `buff_hash`: what it is and who applied it."""
+    return hash((buff.name, getattr(buff.source, "name", None)))
+
 class CombatUnit:
     def __init__(self, name: str, speed: int = 100):
         self.name = name
         self.speed = speed
         self.buffs = []
+        self.buff_hash = 0  # XOR of buff_digest over `buffs`, kept up by add_buff / set_buffs
         self.debuffs = []
         self.turn_shifted = False
+        self.event_subscriptions = {}
 
     def get_speed(self):
         return max(1, getattr(self, "speed", 100))
 
+    # Event subscriptions: event name -> (passives, buffs) listening for it, in list order.
+    # Passives and buffs must be added through add_passive / add_buff / set_buffs to be seen.
+
+    def subscribe(self, handler, kind: int):
+        """Register a passive (kind 0) or buff (kind 1) under its trigger event."""
+        subscribed = self.event_subscriptions.get(handler.trigger)
+        if subscribed is None:
+            subscribed = self.event_subscriptions[handler.trigger] = ([], [])
+        subscribed[kind].append(handler)
+
+    def rebuild_subscriptions(self):
+        self.event_subscriptions = {}
+        for passive in getattr(self, "passives", ()):
+            self.subscribe(passive, 0)
+        for buff in self.buffs:
+            self.subscribe(buff, 1)
+
+    def add_buff(self, buff):
+        self.buffs.append(buff)
+        self.buff_hash ^= buff_digest(buff)
+        self.subscribe(buff, 1)
+
+    def set_buffs(self, buffs: list):
+        self.buffs = buffs
+        self.buff_hash = 0
+        for buff in buffs:
+            self.buff_hash ^= buff_digest(buff)
+        self.rebuild_subscriptions()
+
+@dataclass(slots=True)
+class StatModifier:
+    stat: StatType
+    amount: float
+    percent: bool = True  # amount is a fraction of the base stat; otherwise a flat bonus
+    source: object = None  # whatever applied it (usually a Buff), for removal
+
 class ResistanceDict(defaultdict):
     def __missing__(self, key):
         return 0.1
 
+# Character fields holding only plain values (no units, buffs or other forked
+# objects). A fork shares them with the original until one side calls own().
+COPY_ON_WRITE_FIELDS = ("base_stats", "stats", "cooldowns", "energy_pool", "auras",
+                        "resistances", "elemental_bonuses", "type_bonuses")
+
 @dataclass(unsafe_hash=True)
 class Character(CombatUnit):
     name: str
     base_stats: dict = field(hash=False)
     element: Element
-    stats: dict = field(init=False, hash=False)
+    stats: dict = field(init=False, hash=False)  # derived: base_stats + stat_modifiers, see recompute_stat
+    stat_modifiers: list = field(default_factory=list, hash=False, repr=False)
+    stats_version: int = field(default=0, init=False, hash=False, repr=False)
 
     energy_pool: dict = field(default_factory=dict, hash=False)
     cooldowns: dict = field(default_factory=dict, hash=False)
@@ -92,6 +142,7 @@ class Character(CombatUnit):
     buffs: list = field(default_factory=list, hash=False)
     debuffs: list = field(default_factory=list, hash=False)
     summons: list = field(default_factory=list, hash=False)
+    event_subscriptions: dict = field(default_factory=dict, hash=False, repr=False)
     frozen: bool = False
     current_form: Optional[str] = None
     turn_shifted: bool = False
@@ -116,14 +167,76 @@ class Character(CombatUnit):
 
     position: Position = field(default_factory=lambda: Position(0, 0))
 
+    # Names of the COPY_ON_WRITE_FIELDS this unit still shares with a fork (see own)
+    shared_fields: set = field(default_factory=set, init=False, compare=False, hash=False, repr=False)
+    # Zobrist-style parts of transposition.fast_state_hash: XOR of hash((stat, value)) over `stats`,
+    # kept up by recompute_stat, and XOR of buff_digest over `buffs`, kept up by add_buff / set_buffs
+    stat_hash: int = field(default=0, init=False, compare=False, hash=False, repr=False)
+    buff_hash: int = field(default=0, init=False, compare=False, hash=False, repr=False)
+
     def __post_init__(self):
         self.stats = self.base_stats.copy()
+        for item in self.stats.items():
+            self.stat_hash ^= hash(item)
+        for buff in self.buffs:
+            self.buff_hash ^= buff_digest(buff)
+        for stat in {modifier.stat for modifier in self.stat_modifiers}:
+            self.recompute_stat(stat)
         self.max_hp = self.base_stats.get(StatType.HP, 15000)
         self.current_hp = self.max_hp
+        self.use_compact_auras()
+        self.rebuild_subscriptions()
 
     def get_stat(self, stat: StatType):
         return self.stats.get(stat, 0)
 
+    def own(self, name: str):
+        """The container in field `name`, copied first if a fork still shares it.
+
+        Call it before changing one of COPY_ON_WRITE_FIELDS in place; reads and
+        whole-field assignments need nothing.
+        """
+        value = getattr(self, name)
+        if name in self.shared_fields:
+            self.shared_fields.discard(name)
+            value = copy.copy(value)
+            setattr(self, name, value)
+        return value
+
+    # Final stats are cached in `stats` and only recomputed when a modifier or
+    # base stat changes; `stats_version` is bumped on every change so callers
+    # can key their own caches on it.
+
+    def recompute_stat(self, stat: StatType):
+        base = self.base_stats.get(stat, 0)
+        value = base
+        for modifier in self.stat_modifiers:
+            if modifier.stat == stat:
+                value += base * modifier.amount if modifier.percent else modifier.amount
+        stats = self.own("stats")
+        if stat in stats:
+            self.stat_hash ^= hash((stat, stats[stat]))
+        stats[stat] = value
+        self.stat_hash ^= hash((stat, value))
+        self.stats_version += 1
+
+    def add_stat_modifier(self, modifier: StatModifier):
+        self.stat_modifiers.append(modifier)
+        self.recompute_stat(modifier.stat)
+
+    def remove_stat_modifiers(self, source) -> list[StatModifier]:
+        """Remove every modifier applied by `source` and return them."""
+        removed = [m for m in self.stat_modifiers if m.source is source]
+        if removed:
+            self.stat_modifiers = [m for m in self.stat_modifiers if m.source is not source]
+            for stat in {modifier.stat for modifier in removed}:
+                self.recompute_stat(stat)
+        return removed
+
+    def set_base_stat(self, stat: StatType, value: float):
+        self.own("base_stats")[stat] = value
+        self.recompute_stat(stat)
+
     def add_talent(self, talent, category: str):
         if category == "skill":
             self.skills.append(talent)
@@ -132,6 +245,7 @@ class Character(CombatUnit):
 
     def add_passive(self, passive):
         self.passives.append(passive)
+        self.subscribe(passive, 0)
 
     def add_combo_chain(self, talents: list):
         self.combo_chain = talents
@@ -154,61 +268,44 @@ class Character(CombatUnit):
 
         result = ElementalApplicationResult()
 
-        current_auras = [a for a in self.auras if a.units > 0]
-
-        for existing in current_auras:
-            key = frozenset({element, existing.element})
-            if key in REACTIONS_WITH_AURA:
-                reaction_data = REACTIONS_WITH_AURA[key]
-
-                # Remove both contributing elements
-                self.auras = [a for a in self.auras if a.element not in key]
-
-                new_aura = create_aura(
-                    name=reaction_data["aura_name"],
-                    element=reaction_data["aura_element"],
-                    units=reaction_data["units"],
-                    duration=2,
-                    source_name=reaction_data["aura_name"],
-                    source_elements=key
-                )
-                self.auras.append(new_aura)
-                result.reaction = reaction_data["reaction_name"]
-                result.new_aura = new_aura
-                return result
+        combined = combine_with_auras(self.own("auras"), element)
+        if combined:
+            self.auras, result.reaction, result.new_aura = combined
+            return result
 
         if element in NON_PERSISTENT_AURAS:
             return result
         
         if turn_manager and element in (Element.PYRO, Element.ELECTRO):
             from dendro_core import DendroCore, trigger_hyperbloom, trigger_burgeon
-            from position_utils import distance
-            for obj in turn_manager.field_objects:
-                if isinstance(obj, DendroCore) and obj.active:
-                    if self.position and obj.position:
-                        if distance(self, obj.position) <= 1.5:
-                            if element == Element.ELECTRO:
-                                trigger_hyperbloom(obj, attacker or self, turn_manager)
-                                result.reaction = "Hyperbloom"
-                                return result
-                            elif element == Element.PYRO:
-                                trigger_burgeon(obj, attacker or self, turn_manager)
-                                result.reaction = "Burgeon"
-                                return result
-
-        existing = next((a for a in self.auras if a.element == element), None)
-        if existing:
-            existing.units = max(existing.units, units)
-            existing.duration = 2
-            result.new_aura = existing
-        else:
-            new_aura = create_aura(name=element.name, element=element, units=units, duration=2, source_name=None)
-            self.auras.append(new_aura)
-            result.new_aura = new_aura
-
+            nearby_cores = turn_manager.spatial_index.query_radius(
+                self.position, 1.5,
+                predicate=lambda obj: isinstance(obj, DendroCore) and obj.active and obj.position
+            ) if self.position else []
+            for obj in nearby_cores:
+                if element == Element.ELECTRO:
+                    trigger_hyperbloom(obj, attacker or self, turn_manager)
+                    result.reaction = "Hyperbloom"
+                    return result
+                elif element == Element.PYRO:
+                    trigger_burgeon(obj, attacker or self, turn_manager)
+                    result.reaction = "Burgeon"
+                    return result
+
+        self.auras, result.new_aura = refresh_aura(self.auras, element, units)
         return result
 
+    def use_compact_auras(self):
+        """Switch this character's auras to the array-backed `AuraStore` (done on construction)."""
+        from aura_state import AuraStore
+        if isinstance(self.auras, list):
+            self.auras = AuraStore.from_auras(self.auras)
+
     def decay_auras(self):
+        if not isinstance(self.auras, list):
+            for name in self.own("auras").decay():
+                print(f"{name} aura on {self.name} has expired.")
+            return
         remaining_auras = []
         for aura in self.auras:
             expired = aura.decay()
@@ -218,7 +315,7 @@ class Character(CombatUnit):
                 print(f"{aura.name} aura on {self.name} has expired.")
         self.auras = remaining_auras
 
-@dataclass
+@dataclass(slots=True)
 class Aura:
     name: str
     element: 'Element'  # Face-up element
@@ -286,24 +383,92 @@ def create_aura(
         aura.add_tag(tag)
     return aura
 
+def combine_with_auras(auras: list, element: Element) -> Optional[tuple[list, str, Aura]]:
+    """If `element` forms a composite aura (Quicken, Frozen, ...) with an existing aura,
+    return (new aura list, reaction name, composite aura); otherwise None."""
+    if not isinstance(auras, list):
+        return auras.combine(element)
+    for existing in auras:
+        if existing.units <= 0:
+            continue
+        key = frozenset({element, existing.element})
+        if key in REACTIONS_WITH_AURA:
+            reaction_data = REACTIONS_WITH_AURA[key]
+
+            # Remove both contributing elements
+            remaining = [a for a in auras if a.element not in key]
+
+            new_aura = create_aura(
+                name=reaction_data["aura_name"],
+                element=reaction_data["aura_element"],
+                units=reaction_data["units"],
+                duration=2,
+                source_name=reaction_data["aura_name"],
+                source_elements=key
+            )
+            remaining.append(new_aura)
+            return remaining, reaction_data["reaction_name"], new_aura
+    return None
+
+def refresh_aura(auras: list, element: Element, units: float) -> tuple[list, Aura]:
+    """Refresh the aura of `element` (or add one) in place and return (auras, aura)."""
+    if not isinstance(auras, list):
+        return auras.refresh(element, units)
+    existing = next((a for a in auras if a.element == element), None)
+    if existing:
+        existing.units = max(existing.units, units)
+        existing.duration = 2
+        return auras, existing
+
+    new_aura = create_aura(name=element.name, element=element, units=units, duration=2, source_name=None)
+    auras.append(new_aura)
+    return auras, new_aura
+
+INSTANCE_ELEMENT = object()  # calculate_damage default: hit with the instance's own element
+
 class DamageInstance:
+    """One hit of a talent. Instances are immutable and shared by every use of the
+    talent; to evaluate a hit with a different element (e.g. when ICD blocks the
+    application) pass `element=` to calculate_damage instead of copying."""
+    __slots__ = ("multiplier", "scaling_stat", "damage_type", "base_dmg_multiplier", "additive_base_dmg_bonus",
+                 "element", "description", "tag", "icd_tag", "icd_interval", "aoe_radius")
+
     def __init__(self, multiplier: float, scaling_stat: StatType, damage_type: DamageType,
                  base_dmg_multiplier: float = 1.0, additive_base_dmg_bonus: float = 0.0,
                  element: Element | None = None, description: str = "", tag: str = "",
                  icd_tag: str = "", icd_interval: int = 3, aoe_radius: float = 0.0):
-        self.multiplier = multiplier
-        self.scaling_stat = scaling_stat
-        self.damage_type = damage_type
-        self.base_dmg_multiplier = base_dmg_multiplier
-        self.additive_base_dmg_bonus = additive_base_dmg_bonus
-        self.element = element
-        self.description = description
-        self.tag = tag
-        self.icd_tag = icd_tag
-        self.icd_interval = icd_interval
-        self.aoe_radius = aoe_radius
+        set_field = object.__setattr__
+        set_field(self, "multiplier", multiplier)
+        set_field(self, "scaling_stat", scaling_stat)
+        set_field(self, "damage_type", damage_type)
+        set_field(self, "base_dmg_multiplier", base_dmg_multiplier)
+        set_field(self, "additive_base_dmg_bonus", additive_base_dmg_bonus)
+        set_field(self, "element", element)
+        set_field(self, "description", description)
+        set_field(self, "tag", tag)
+        set_field(self, "icd_tag", icd_tag)
+        set_field(self, "icd_interval", icd_interval)
+        set_field(self, "aoe_radius", aoe_radius)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"DamageInstance is immutable (tried to set {name!r})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"DamageInstance is immutable (tried to delete {name!r})")
+
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
 class Talent:
+    __slots__ = ("name", "description", "damage_instances", "energy_type", "energy_cost", "cooldown",
+                 "on_use", "form_lock", "id")
+
     def __init__(self, name, description: str = "", damage_instances=None, energy_type="normal",
                  energy_cost=0, cooldown=0, on_use=None, form_lock=None):
         self.name = name
@@ -317,11 +482,14 @@ class Talent:
         self.id = uuid.uuid4()
 
 class Passive:
-    def __init__(self, name: str, description: str, trigger, effect):
+    __slots__ = ("name", "description", "trigger", "effect", "delivery")
+
+    def __init__(self, name: str, description: str, trigger, effect, delivery: str = "hit"):
         self.name = name
         self.description = description
         self.trigger = trigger
         self.effect = effect
+        self.delivery = delivery  # "hit", or "action" to get one coalesced on_hp_change per action
 
     def activate(self, **kwargs):
         return self.effect(**kwargs)
@@ -0,0 +1,149 @@
+"""Exact damage distribution of a fixed rotation.
+
+Crits are the only randomness in a rotation whose actions and targets are
+fixed, so total damage is a constant plus a sum of independent two-point
+variables: each hit adds (crit damage - non-crit damage) with probability
+crit rate. Reaction damage is deterministic. The distribution of the sum is
+built by convolving those two-point outcomes on a grid of `bin_width`-wide
+bins. A crit bonus that falls between two bins is split across both in
+proportion, which keeps the mean exact.
+
+A rotation is recorded by playing the battle in expected-damage mode (no
+RNG, fixed targeting) with the turn manager collecting one HitOutcome per
+hit. Dendro Core bursts apply damage outside calculate_damage and are not
+recorded.
+
+    python damage_distribution.py --turns 50 --hp 5000000
+"""
+
+import argparse
+from collections import defaultdict
+from typing import Optional
+
+import numpy as np
+
+from combat_helpers import HitOutcome
+from core import Character
+from engine import ActionPolicy, SimplePolicy, get_living, play_turn, quiet_output, setup_battle
+
+DEFAULT_MAX_BINS = 1 << 16
+
+class DamageDistribution:
+    """P(total damage = offset + i * bin_width) for each bin i."""
+
+    def __init__(self, offset: float, bin_width: float, probabilities: np.ndarray):
+        self.offset = offset
+        self.bin_width = bin_width
+        self.probabilities = probabilities
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.offset + self.bin_width * np.arange(len(self.probabilities))
+
+    def mean(self) -> float:
+        return float(self.values @ self.probabilities)
+
+    def std(self) -> float:
+        deviations = self.values - self.mean()
+        return float(np.sqrt((deviations * deviations) @ self.probabilities))
+
+    def percentile(self, q: float) -> float:
+        """Smallest total reached with probability at least q / 100."""
+        cumulative = np.cumsum(self.probabilities)
+        index = int(np.searchsorted(cumulative, q / 100 - 1e-12))
+        return float(self.values[min(index, len(cumulative) - 1)])
+
+    def kill_probability(self, hp: float) -> float:
+        """P(total damage >= hp)."""
+        first = int(np.ceil((hp - self.offset) / self.bin_width - 1e-9))
+        if first <= 0:
+            return 1.0
+        return float(min(self.probabilities[first:].sum(), 1.0))
+
+    def summary(self, percentiles=(5, 25, 50, 75, 95)) -> dict:
+        result = {"mean": self.mean(), "std": self.std()}
+        for q in percentiles:
+            result[f"p{q}"] = self.percentile(q)
+        return result
+
+def damage_distribution(hits: list[HitOutcome], bin_width: Optional[float] = None,
+                        max_bins: int = DEFAULT_MAX_BINS) -> DamageDistribution:
+    """Distribution of the summed damage of independent hits.
+
+    Without `bin_width` the bins are 1 damage wide when the crit spread fits
+    in `max_bins`, and just wide enough to fit otherwise.
+    """
+    offset = float(sum(hit.damage for hit in hits))
+    random_hits = [(hit.crit_damage - hit.damage, hit.crit_rate) for hit in hits
+                   if hit.crit_rate > 0 and hit.crit_damage != hit.damage]
+    if bin_width is None:
+        spread = sum(bonus for bonus, _ in random_hits)
+        bin_width = max(1.0, spread / max(max_bins - 1 - len(random_hits), 1))
+
+    shifts = [(bonus / bin_width, rate) for bonus, rate in random_hits]
+    probabilities = np.zeros(sum(int(np.ceil(shift)) for shift, _ in shifts) + 1)
+    probabilities[0] = 1.0
+    reach = 0  # highest bin that can be non-zero so far
+    for shift, rate in shifts:
+        low = int(shift)
+        upper_share = shift - low
+        current = probabilities[:reach + 1].copy()
+        probabilities[:reach + 1] *= 1 - rate
+        probabilities[low:low + reach + 1] += current * (rate * (1 - upper_share))
+        if upper_share:
+            probabilities[low + 1:low + reach + 2] += current * (rate * upper_share)
+        reach += low + (1 if upper_share else 0)
+    return DamageDistribution(offset, bin_width, probabilities[:reach + 1])
+
+def distributions_by_target(hits: list[HitOutcome], bin_width: Optional[float] = None,
+                            max_bins: int = DEFAULT_MAX_BINS) -> dict[str, DamageDistribution]:
+    """Damage distribution taken by each target, keyed by name."""
+    by_target = defaultdict(list)
+    for hit in hits:
+        by_target[hit.target.name].append(hit)
+    return {name: damage_distribution(target_hits, bin_width, max_bins) for name, target_hits in by_target.items()}
+
+def record_rotation(player_team: list[Character], enemy_team: list[Character], max_turns: int,
+                    policy: Optional[ActionPolicy] = None) -> list[HitOutcome]:
+    """Play up to `max_turns` unit turns in expected-damage mode and return every hit's outcomes."""
+    policy = policy or SimplePolicy()
+    with quiet_output(False):
+        turn_manager = setup_battle(player_team, enemy_team)
+        turn_manager.display = False
+        turn_manager.expected_damage = True
+        turn_manager.hit_outcomes = []
+        turns = 0
+        while turns < max_turns and get_living(player_team) and get_living(enemy_team):
+            play_turn(turn_manager, player_team, enemy_team, policy)
+            turns += 1
+    return turn_manager.hit_outcomes
+
+def main():
+    import characters
+    import lorelaiimpact
+    from montecarlo import TeamScenario
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=50, help="unit turns in the rotation")
+    parser.add_argument("--hp", type=float, default=None, help="HP pool to report kill probability against "
+                                                               "(default: each target's max HP)")
+    parser.add_argument("--bin-width", type=float, default=None)
+    args = parser.parse_args()
+
+    player_team, enemy_team = TeamScenario(
+        [characters.shinobu, characters.rosaria, characters.yanfei, characters.gaming],
+        lorelaiimpact.dummies,
+    )()
+    max_hp = {enemy.name: enemy.max_hp for enemy in enemy_team}
+    hits = record_rotation(player_team, enemy_team, args.turns)
+    print(f"{len(hits)} hits over {args.turns} turns")
+
+    for name, distribution in sorted(distributions_by_target(hits, args.bin_width).items()):
+        hp = args.hp if args.hp is not None else max_hp.get(name)
+        stats = distribution.summary()
+        print(f"{name}: " + ", ".join(f"{key}={value:,.0f}" for key, value in stats.items()))
+        if hp is not None:
+            print(f"  P(damage >= {hp:,.0f}) = {distribution.kill_probability(hp):.4f}")
+
+if __name__ == "__main__":
+    main()
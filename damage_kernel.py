@@ -0,0 +1,102 @@
+"""Batched damage evaluation.
+
+`calculate_damage_batch` is the array form of the non-reaction part of
+`combat_helpers.calculate_damage`: stat scaling, DMG bonus, crit, DEF and RES
+multipliers, applied in the same order so that, given the same crit rolls, every
+element of the batch matches what the scalar path would return. The reaction
+curves at the bottom are the array forms of the EM curves in reaction_constants.
+"""
+
+import numpy as np
+from core import Character, DamageInstance, StatType
+from combat_helpers import calculate_dmg_bonus
+from reaction_constants import (AMPLIFYING_EM_SCALE, QUICKEN_BASE_DAMAGE, QUICKEN_EM_SCALE, SUPERPOSITION_EM_SCALE,
+                                TRANSFORMATIVE_BASE_DAMAGE, TRANSFORMATIVE_EM_SCALE, reaction_metadata)
+
+def def_multiplier_batch(attacker_level, defender_level, def_shred=0.0):
+    atk_level = np.asarray(attacker_level, dtype=float)
+    def_level = np.asarray(defender_level, dtype=float)
+    return (atk_level + 100) / ((atk_level + 100) + (def_level + 100) * (1 - np.asarray(def_shred, dtype=float)))
+
+def res_multiplier_batch(resistance):
+    res = np.asarray(resistance, dtype=float)
+    return np.where(res < 0, 1 - (res / 2),
+                    np.where(res < 0.75, 1 - res, 1 / (4 * res + 1)))
+
+def calculate_damage_batch(base_stat, multiplier, crit_rate, crit_dmg, resistance,
+                           base_dmg_multiplier=1.0, additive_base_dmg_bonus=0.0,
+                           dmg_bonus=0.0, dmg_reduction=0.0,
+                           attacker_level=90, defender_level=90, def_shred=0.0,
+                           rolls=None, rng=None, expected=False):
+    """Evaluate a batch of hits in one pass.
+
+    All arguments broadcast against each other. `rolls` are the uniform [0, 1)
+    draws compared against crit rate; when omitted they come from `rng` (a
+    numpy Generator, created fresh if not given). With `expected` set no rolls
+    are made and crits count at 1 + rate * crit DMG, as in the scalar path's
+    expected-damage mode. Returns (damage, is_crit) arrays, with damage rounded
+    the way the scalar path rounds it.
+    """
+    base_stat = np.asarray(base_stat, dtype=float)
+    base_damage = base_stat * np.asarray(multiplier, dtype=float) * np.asarray(base_dmg_multiplier, dtype=float)
+    base_damage = base_damage + np.asarray(additive_base_dmg_bonus, dtype=float)
+
+    base_damage = base_damage * (1 + np.asarray(dmg_bonus, dtype=float) - np.asarray(dmg_reduction, dtype=float))
+
+    crit_rate = np.asarray(crit_rate, dtype=float)
+    shape = np.broadcast_shapes(base_damage.shape, crit_rate.shape, np.shape(resistance))
+    if expected:
+        is_crit = crit_rate >= 1
+        base_damage = base_damage * (1 + np.clip(crit_rate, 0.0, 1.0) * np.asarray(crit_dmg, dtype=float))
+    else:
+        if rolls is None:
+            rng = rng if rng is not None else np.random.default_rng()
+            rolls = rng.random(shape)
+        is_crit = np.asarray(rolls, dtype=float) < crit_rate
+        base_damage = np.where(is_crit, base_damage * (1 + np.asarray(crit_dmg, dtype=float)), base_damage)
+
+    def_mult = def_multiplier_batch(attacker_level, defender_level, def_shred)
+    res_mult = res_multiplier_batch(resistance)
+    base_damage = base_damage * (def_mult * res_mult)
+
+    damage = np.broadcast_to(np.round(base_damage), shape).astype(np.int64)
+    return damage, np.broadcast_to(is_crit, shape)
+
+def gather_hit_arrays(hits: list[tuple[Character, Character, DamageInstance]]) -> dict:
+    """Collect the per-hit inputs of `calculate_damage_batch` from (attacker, defender, instance) triples."""
+    columns = {
+        "base_stat": [], "multiplier": [], "crit_rate": [], "crit_dmg": [], "resistance": [],
+        "base_dmg_multiplier": [], "additive_base_dmg_bonus": [], "dmg_bonus": [],
+        "dmg_reduction": [], "attacker_level": [], "defender_level": [],
+    }
+    for attacker, defender, instance in hits:
+        columns["base_stat"].append(attacker.get_stat(instance.scaling_stat))
+        columns["multiplier"].append(instance.multiplier)
+        columns["crit_rate"].append(attacker.get_stat(StatType.CRIT_RATE))
+        columns["crit_dmg"].append(attacker.get_stat(StatType.CRIT_DMG))
+        columns["resistance"].append(defender.resistances[instance.element])
+        columns["base_dmg_multiplier"].append(instance.base_dmg_multiplier)
+        columns["additive_base_dmg_bonus"].append(instance.additive_base_dmg_bonus)
+        columns["dmg_bonus"].append(calculate_dmg_bonus(attacker, instance))
+        columns["dmg_reduction"].append(defender.dmg_reduction_taken)
+        columns["attacker_level"].append(getattr(attacker, "level", 90))
+        columns["defender_level"].append(getattr(defender, "level", 90))
+    return {name: np.array(values, dtype=float) for name, values in columns.items()}
+
+def transformative_damage_batch(reaction: str, em):
+    """`reaction_constants.transformative_damage` over an array of EM values."""
+    em = np.asarray(em, dtype=float)
+    em_bonus = 1 + (TRANSFORMATIVE_EM_SCALE * em / (em + 2000))
+    return np.trunc(TRANSFORMATIVE_BASE_DAMAGE * em_bonus * reaction_metadata(reaction).transformative_multiplier).astype(np.int64)
+
+def amplifying_multiplier_batch(reaction: str, em):
+    """`reaction_constants.amplifying_multiplier` over an array of EM values."""
+    em = np.asarray(em, dtype=float)
+    meta = reaction_metadata(reaction)
+    em_multi = SUPERPOSITION_EM_SCALE if meta.kind == "both" else AMPLIFYING_EM_SCALE
+    return meta.amplifying_multiplier * (1 + (em_multi * (em)/(1400 + em)))
+
+def quicken_bonus_batch(reaction: str, em):
+    """`reaction_constants.quicken_bonus` over an array of EM values."""
+    em = np.asarray(em, dtype=float)
+    return reaction_metadata(reaction).quicken_multiplier * QUICKEN_BASE_DAMAGE * (1 + (QUICKEN_EM_SCALE * em / (em + 1200)))
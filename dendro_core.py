@@ -6,7 +6,6 @@ from core import Element
 
 if TYPE_CHECKING:
     from core import Character, TurnManager, Position
-    from position_utils import distance
 
 @dataclass
 class DendroCore:
@@ -17,16 +16,16 @@ class DendroCore:
 
 def spawn_dendro_core(creator: 'Character', target: 'Character', turn_manager: 'TurnManager'):
     core = DendroCore(creator=creator, position=target.position)
-    turn_manager.field_objects.append(core)
+    turn_manager.add_field_object(core)
     print(f"🌱 Dendro Core created at {core.position} by {creator.name}")
 
 def trigger_hyperbloom(core: DendroCore, attacker: 'Character', turn_manager: 'TurnManager'):
-    from combat import calculate_transformative_damage, take_damage, log_damage, get_enemies
-    enemies = get_enemies(attacker, turn_manager)
-    if not enemies:
+    from combat import calculate_transformative_damage, take_damage, log_damage
+    from position_utils import get_nearest_enemy
+    target = get_nearest_enemy(attacker, core.position, turn_manager)
+    if target is None:
         return
 
-    target = min(enemies, key=lambda u: distance(u, core.position))
     dmg = calculate_transformative_damage("Hyperbloom", attacker)["damage"]
 
     print(f"⚡ Hyperbloom from {core.creator.name} hits {target.name}!")
@@ -36,9 +35,9 @@ def trigger_hyperbloom(core: DendroCore, attacker: 'Character', turn_manager: 'T
     core.active = False
 
 def trigger_burgeon(core: DendroCore, attacker: 'Character', turn_manager: 'TurnManager'):
-    from combat import calculate_transformative_damage, take_damage, log_damage, get_enemies, get_targets_in_radius
-    enemies = get_enemies(attacker, turn_manager)
-    targets = get_targets_in_radius(core, enemies, radius=2.0)
+    from combat import calculate_transformative_damage, take_damage, log_damage
+    from position_utils import get_enemies_in_radius
+    targets = get_enemies_in_radius(attacker, core, 2.0, turn_manager)
     dmg = calculate_transformative_damage("Burgeon", attacker)["damage"]
 
     print(f"🔥 Burgeon erupts from Dendro Core at {core.position}!")
@@ -54,4 +53,10 @@ def update_dendro_cores(turn_manager: 'TurnManager'):
             core.turns_remaining -= 1
             if core.turns_remaining <= 0:
                 core.active = False
-    turn_manager.field_objects = [c for c in turn_manager.field_objects if getattr(c, "active", True)]
+    remaining = []
+    for obj in turn_manager.field_objects:
+        if getattr(obj, "active", True):
+            remaining.append(obj)
+        else:
+            turn_manager.spatial_index.remove(obj)
+    turn_manager.field_objects = remaining
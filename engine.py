@@ -0,0 +1,492 @@
+"""Headless battle engine.
+
+`run_battle` plays a full battle to completion without prompting or printing
+and returns a `BattleResult`. Every decision that used to come from `input()`
+goes through an `ActionPolicy`, so the same loop drives both the interactive
+front end in lorelaiimpact.py and bulk simulation.
+"""
+
+import contextlib
+import random
+from abc import ABC, abstractmethod
+from enum import Enum
+from dataclasses import dataclass, field
+from collections import defaultdict
+from typing import Optional
+from core import Character, Talent, Summon, DamageInstance, StatModifier
+from combat import calculate_damage, apply_icd, take_damage, resolve_reactions, trigger_event, log_damage, get_living_allies, add_damage_listener, remove_damage_listener
+from event_system import coalesced_hp_changes
+from turn import TurnManager, Buff
+from position_utils import get_enemies_in_radius
+
+@dataclass
+class BattleResult:
+    winner: Optional[str] = None  # "player", "enemy", or None if max_turns ran out
+    turns: int = 0
+    damage_dealt: dict = field(default_factory=lambda: defaultdict(int))
+    damage_taken: dict = field(default_factory=lambda: defaultdict(int))
+
+    def record_damage(self, source, target, amount):
+        if source is not None:
+            self.damage_dealt[source.name] += amount
+        self.damage_taken[target.name] += amount
+
+class ActionPolicy(ABC):
+    """Makes the decisions a player would make during a battle.
+
+    Subclasses override `choose_action`; the defaults for combo continuation
+    and enemy targeting match the original interactive loop, except that in
+    expected-damage mode enemies always target the first living candidate.
+    """
+
+    @abstractmethod
+    def choose_action(self, character: Character, options: list, turn_manager: TurnManager):
+        ...
+
+    def continue_combo(self, character: Character, turn_manager: TurnManager) -> bool:
+        return True
+
+    def choose_target(self, character: Character, candidates: list[Character], turn_manager: TurnManager) -> Character:
+        if turn_manager.expected_damage:
+            return candidates[0]
+        return random.choice(candidates)
+
+class SimplePolicy(ActionPolicy):
+    """Uses the first ready burst, then the first ready skill, then normal attacks."""
+
+    def choose_action(self, character: Character, options: list, turn_manager: TurnManager):
+        for wanted in ("burst", "skill"):
+            for action_type, talent in options:
+                if action_type == wanted and is_talent_ready(character, talent):
+                    return action_type, talent
+        for option in options:
+            if option[0] == "normal":
+                return option
+        return options[-1]
+
+class _NullWriter:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+def quiet_output(display: bool = False):
+    """Swallow everything printed inside the block unless `display` is set."""
+    if display:
+        return contextlib.nullcontext()
+    return contextlib.redirect_stdout(_NullWriter())
+
+def grant_energy(regular=0, special_type=None, special_amount=0):
+    def effect(attacker, *args, **kwargs):
+        if regular > 0:
+            attacker.own("energy_pool")["Elemental Energy"] = attacker.energy_pool.get("Elemental Energy", 0) + regular
+            print(f"{attacker.name} gains {regular} Energy.")
+        if special_type and special_amount > 0:
+            attacker.own("energy_pool")[special_type] = attacker.energy_pool.get(special_type, 0) + special_amount
+            print(f"{attacker.name} gains {special_amount} {special_type}.")
+    return effect
+
+def apply_buff_trigger(character: Character, event: str):
+    for buff in character.buffs:
+        if buff.trigger == event:
+            if buff.effect:
+                buff.effect(buff=buff, unit=character)
+            elif buff.stat and not buff.applied:  # fallback to stat buffs, applied once
+                character.add_stat_modifier(StatModifier(buff.stat, buff.amount, source=buff))
+                bonus = character.base_stats.get(buff.stat, 0) * buff.amount
+                print(f"{character.name}'s {buff.stat.name} increased by {bonus} from {buff.name}.")
+            buff.applied = True
+
+def cleanup_expired_buffs(character: Character):
+    active_buffs = []
+    for buff in character.buffs:
+        if buff.remaining_turns <= 1:
+            if buff.reversible:
+                if buff.cleanup_effect:
+                    buff.cleanup_effect(character)
+                elif buff.stat:
+                    character.remove_stat_modifiers(buff)
+                    print(f"{character.name}'s {buff.stat.name} returned to normal.")
+            print(f"{buff.name} expired on {character.name}.")
+        else:
+            buff.remaining_turns -= 1
+            active_buffs.append(buff)
+    if len(active_buffs) != len(character.buffs):
+        character.set_buffs(active_buffs)
+
+def apply_buff(character: Character, buff: Buff):
+    if not buff.applied:
+        if buff.stat is not None:
+            character.add_stat_modifier(StatModifier(buff.stat, buff.amount, source=buff))
+            print(f"{character.name} gains {buff.name}: {buff.description}")
+        elif buff.effect:  # purely functional buff
+            buff.effect(character)
+        buff.applied = True
+    character.add_buff(buff)
+
+def entropic_bind(attacker, defender, turn_manager):
+    delay_amount = 0.25  # you can make this scale with SPD, DEF, etc.
+    print(f"{attacker.name} uses Entropic Bind! Delaying {defender.name}'s next turn by {delay_amount * 100}%.")
+    turn_manager.delay_by_percent(defender, delay_amount)
+
+    return 0, []
+
+def action_advance(attacker, defender, turn_manager):
+    advance_amount = -1  # you can make this scale with SPD, DEF, etc.
+    print(f"{attacker.name} advances their action by {advance_amount * 100}%.")
+    turn_manager.delay_by_percent(attacker, advance_amount)
+
+    return 0, []
+
+def execute_damage_instance(attacker: Character, defender: Character, instance: DamageInstance, turn_manager: TurnManager,
+                            summary: dict = None, taken_summary: dict = None) -> tuple[int, list]:
+    """Hit `defender` (and every enemy within the instance's AoE radius) with one damage instance.
+
+    ICD is checked once against the primary target; a blocked application is
+    evaluated as an element override on the shared instance. Returns (damage
+    dealt to `defender`, reaction hits).
+    """
+    element = instance.element if apply_icd(attacker, defender, instance) else None
+
+    if instance.aoe_radius > 0:
+        targets = get_enemies_in_radius(attacker, defender, instance.aoe_radius, turn_manager)
+        targets.insert(0, defender)  # include primary target
+    else:
+        targets = [defender]
+
+    primary_damage = 0
+    all_reactions = []
+    for target in targets:
+        result = calculate_damage(attacker, target, instance, turn_manager, element=element)
+        if target is defender:
+            primary_damage = result["damage"]
+        all_reactions.extend(result["reactions"])
+
+        actual = take_damage(target, result["damage"], source=attacker, team=[target],
+                             summary=summary, taken_summary=taken_summary)
+
+        log_damage(
+            source=attacker,
+            target=target,
+            amount=actual,
+            element=result["element"],
+            crit=result["crit"],
+            label=result["label"],
+            applied_element=result.get("applied_element", False)
+        )
+
+    return primary_damage, all_reactions
+
+def use_normal_attack(attacker: Character, defender: Character, turn_manager: TurnManager, summary: dict = None, taken_summary: dict = None):
+    attacks = attacker.get_active_normal_chain()
+    if not attacks:
+        print(f"{attacker.name} has no normal attacks.")
+        return 0, [], False
+
+    index = attacker.combo_index
+    talent = attacks.get_talent(index)
+
+    print(f"{attacker.name} uses {attacks.name} ({talent.name})!")
+
+    total_damage = 0
+    all_reactions = []
+
+    for instance in talent.damage_instances:
+        damage, reactions = execute_damage_instance(attacker, defender, instance, turn_manager,
+                                                    summary=summary, taken_summary=taken_summary)
+        total_damage += damage
+        all_reactions.extend(reactions)
+
+    # Handle any on-use effects (list-based)
+    if talent.on_use:
+        for effect_fn in talent.on_use:
+            effect_fn(attacker, defender, turn_manager)
+
+    # Advance combo index
+    attacker.combo_index += 1
+    combo_complete = attacker.combo_index >= attacks.length()
+
+    return total_damage, all_reactions, combo_complete
+
+def use_skill(attacker: Character, defender: Character, turn_manager: TurnManager, skill_index=0):
+    reset_combo(attacker)  # Reset combo
+    skill = attacker.skills[skill_index]
+    return use_talent(attacker, defender, skill, turn_manager)
+
+def use_burst(attacker: Character, defender: Character, turn_manager: TurnManager, burst_index=0):
+    reset_combo(attacker)  # Reset combo
+    burst = attacker.bursts[burst_index]
+    return use_talent(attacker, defender, burst, turn_manager)
+
+def reset_combo(character):
+    character.combo_index = 0
+
+def use_talent(attacker: Character, defender: Character, talent: Talent, turn_manager: TurnManager, summary: dict = None, taken_summary: dict = None):
+    energy_type = talent.energy_type
+    energy_cost = talent.energy_cost
+
+    # === ENERGY CHECK ===
+    if energy_type and attacker.energy_pool.get(energy_type, 0) < energy_cost:
+        print(f"⚠️ {attacker.name} lacks {energy_type} energy to use {talent.name}.")
+        return 0, []
+
+    # === COOLDOWN CHECK ===
+    if attacker.cooldowns.get(talent.id, 0) > 0:
+        print(f"⏳ {talent.name} is on cooldown for {attacker.cooldowns[talent.id]} more turn(s).")
+        return 0, []
+
+    # Apply cooldown
+    if talent.cooldown > 0:
+        attacker.own("cooldowns")[talent.id] = talent.cooldown + 1
+
+    print(f"\n🔷 {attacker.name} uses **{talent.name}**!")
+
+    total_damage = 0
+    all_reactions = []
+
+    for instance in talent.damage_instances:
+        _, reactions = execute_damage_instance(attacker, defender, instance, turn_manager,
+                                               summary=summary, taken_summary=taken_summary)
+        all_reactions.extend(reactions)
+
+    allies = get_living_allies(attacker, turn_manager)
+
+    # === ON-USE EFFECTS (Buffs, healing, summons, etc.) ===
+    for effect_fn in talent.on_use:
+        if callable(effect_fn):
+            result = effect_fn(attacker, defender, turn_manager, team=allies)
+            if isinstance(result, tuple) and len(result) == 2:
+                extra_damage, extra_reactions = result
+                total_damage += extra_damage
+                all_reactions.extend(extra_reactions)
+
+    # === ENERGY COST ===
+    if energy_cost > 0:
+        attacker.own("energy_pool")[energy_type] -= energy_cost
+
+    return total_damage, all_reactions
+
+def is_talent_ready(character: Character, talent: Talent) -> bool:
+    if character.cooldowns.get(talent.id, 0) > 0:
+        return False
+    if talent.energy_type and character.energy_pool.get(talent.energy_type, 0) < talent.energy_cost:
+        return False
+    return True
+
+def get_action_options(character: Character) -> list:
+    """List the actions available to `character`, in the order choose_action shows them."""
+    options = []
+
+    if character.get_active_normal_chain():
+        options.append(("normal", None))
+
+    for talent in character.skills:
+        if talent.form_lock and character.current_form != talent.form_lock:
+            continue
+        options.append(("skill", talent))
+
+    for talent in character.bursts:
+        if talent.form_lock and character.current_form != talent.form_lock:
+            continue
+        options.append(("burst", talent))
+
+    options.append(("end", None))
+    return options
+
+def is_alive(character) -> bool:
+    return character.current_hp > 0
+
+def get_living(team: list) -> list:
+    return [char for char in team if is_alive(char)]
+
+def setup_battle(player_team: list[Character], enemy_team: list[Character]) -> TurnManager:
+    for unit in player_team:
+        unit.team = player_team
+    for unit in enemy_team:
+        unit.team = enemy_team
+
+    turn_manager = TurnManager(player_team + enemy_team)
+    turn_manager.player_team_size = len(player_team)
+    return turn_manager
+
+def expire_summon(turn_manager: TurnManager, summon: Summon):
+    if summon in summon.owner.summons:
+        summon.owner.summons.remove(summon)
+    turn_manager.remove_unit(summon)
+
+def take_summon_turn(turn_manager: TurnManager, summon: Summon, player_team: list[Character], enemy_team: list[Character]):
+    if summon.frozen:
+        print(f"{summon.name} is frozen and cannot act!")
+        summon.frozen = False
+        return
+
+    summon.handle_event("on_turn_start")
+    with coalesced_hp_changes(turn_manager.coalesce_hp_changes):
+        summon.handle_event("on_action", enemy_team=get_living(enemy_team if summon.owner in player_team else player_team))
+    summon.handle_event("on_turn_end")
+
+    # Check for expiration by duration
+    if summon.duration is not None:
+        summon.remaining_duration -= 1
+        if summon.remaining_duration <= 0:
+            print(f"{summon.name} has expired (duration ended).")
+            expire_summon(turn_manager, summon)
+            return
+
+    # Check for expiration by death
+    if summon.current_hp <= 0:
+        print(f"{summon.name} has expired (defeated).")
+        expire_summon(turn_manager, summon)
+
+def take_player_turn(turn_manager: TurnManager, current_char: Character, player_team: list[Character], enemy_team: list[Character], policy: ActionPolicy, summary: dict = None, taken_summary: dict = None):
+    combo_active = True
+    while combo_active:
+        options = get_action_options(current_char)
+        action_type, action = policy.choose_action(current_char, options, turn_manager)
+
+        if action_type == "end":
+            print(f"{current_char.name} ends their turn.")
+            reset_combo(current_char)
+            break
+
+        living_enemies = get_living(enemy_team)
+        if not living_enemies:
+            break
+        target = living_enemies[0]
+
+        if action_type == "normal":
+            with coalesced_hp_changes(turn_manager.coalesce_hp_changes):
+                # execute_damage_instance has already applied the damage; only the reactions are left
+                _, reactions, na_string_done = use_normal_attack(current_char, target, turn_manager)
+
+                resolve_reactions(reactions, player_team)
+
+            if na_string_done:
+                print(f"{current_char.name}'s combo string is complete.")
+                reset_combo(current_char)
+                combo_active = False
+            elif not policy.continue_combo(current_char, turn_manager):
+                reset_combo(current_char)
+                combo_active = False
+
+        else:
+            with coalesced_hp_changes(turn_manager.coalesce_hp_changes):
+                damage, reactions = use_talent(current_char, target, action, turn_manager, summary=summary, taken_summary=taken_summary)
+                take_damage(target, damage, source=current_char, team=player_team)
+
+                resolve_reactions(reactions, player_team)
+
+            reset_combo(current_char)  # Break combo
+            combo_active = False
+    trigger_event("on_turn_end", [current_char], unit=current_char)
+    cleanup_expired_buffs(current_char)
+
+    if current_char.cooldowns:
+        cooldowns = current_char.own("cooldowns")
+        for tid in list(cooldowns):
+            cooldowns[tid] -= 1
+            if cooldowns[tid] <= 0:
+                del cooldowns[tid]
+
+def take_enemy_turn(turn_manager: TurnManager, current_char: Character, player_team: list[Character], policy: ActionPolicy):
+    living_targets = get_living(player_team)
+    if not living_targets:
+        return
+    target = policy.choose_target(current_char, living_targets, turn_manager)
+
+    if current_char.skills:
+        move = current_char.skills[0]
+        print(f"{current_char.name} targets {target.name}!")
+        with coalesced_hp_changes(turn_manager.coalesce_hp_changes):
+            damage, reactions = use_talent(current_char, target, move, turn_manager)
+            take_damage(target, damage, source=current_char, team=player_team)
+            for r in reactions:
+                resolve_reactions([r], [r.target])
+    else:
+        print(f"{current_char.name} has no skills to use and skips their turn.")
+
+def play_turn(turn_manager: TurnManager, player_team: list[Character], enemy_team: list[Character], policy: ActionPolicy):
+    """Advance the battle by one timeline entry and return the unit that acted."""
+    turn_damage_summary = defaultdict(int)
+    turn_damage_taken = defaultdict(int)
+    if turn_manager.display:
+        turn_manager.preview_turn_order()
+
+    current_char = turn_manager.next_turn()
+
+    if not is_alive(current_char):
+        return current_char
+
+    trigger_event("on_turn_start", [current_char], unit=current_char)
+
+    print(f"\n=========={current_char.name}'s Turn==========")
+
+    if isinstance(current_char, Summon):
+        take_summon_turn(turn_manager, current_char, player_team, enemy_team)
+        return current_char
+
+    if current_char.energy_pool:
+        energy_status = ', '.join(f"{etype.name if isinstance(etype, Enum) else etype}: {amount}"
+                          for etype, amount in current_char.energy_pool.items())
+        print(f"Energy → {energy_status}")
+    else:
+        print(f"Energy → None")
+
+    if current_char in player_team:
+        take_player_turn(turn_manager, current_char, player_team, enemy_team, policy,
+                         summary=turn_damage_summary, taken_summary=turn_damage_taken)
+    else:
+        take_enemy_turn(turn_manager, current_char, player_team, policy)
+    current_char.decay_auras()
+
+    if turn_damage_summary:
+        print("\n📊 Damage Dealt This Turn:")
+        for name, dmg in turn_damage_summary.items():
+            print(f"  - {name}: {dmg:,} DMG")
+
+    if turn_damage_taken:
+        print("\n🩸 Damage Taken This Turn:")
+        for name, dmg in turn_damage_taken.items():
+            print(f"  - {name}: {dmg:,} DMG")
+
+    return current_char
+
+def run_battle(player_team: list[Character], enemy_team: list[Character], policy: Optional[ActionPolicy] = None,
+               max_turns: Optional[int] = None, display: bool = False,
+               coalesce_hp_changes: bool = False, expected_damage: bool = False) -> BattleResult:
+    """Run a battle to completion and return who won and how much damage went where.
+
+    `max_turns` caps the number of unit turns (buff timers tick off the timeline);
+    a capped battle has no winner. With `display` off nothing is printed. With
+    `coalesce_hp_changes` each action delivers one on_hp_change per unit to
+    subscribers that asked for per-action delivery. With `expected_damage` the
+    battle uses no RNG: crits count at their expected value and random
+    targeting is replaced by the first candidate.
+    """
+    policy = policy or SimplePolicy()
+    result = BattleResult()
+    add_damage_listener(result.record_damage)
+
+    try:
+        with quiet_output(display):
+            turn_manager = setup_battle(player_team, enemy_team)
+            turn_manager.display = display
+            turn_manager.coalesce_hp_changes = coalesce_hp_changes
+            turn_manager.expected_damage = expected_damage
+
+            while get_living(player_team) and get_living(enemy_team):
+                if max_turns is not None and result.turns >= max_turns:
+                    break
+                play_turn(turn_manager, player_team, enemy_team, policy)
+                result.turns += 1
+    finally:
+        remove_damage_listener(result.record_damage)
+
+    if not get_living(enemy_team):
+        result.winner = "player"
+    elif not get_living(player_team):
+        result.winner = "enemy"
+    result.damage_dealt = dict(result.damage_dealt)
+    result.damage_taken = dict(result.damage_taken)
+    return result
@@ -1,30 +1,146 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
 from core import Character
 from typing import Optional
 
-def trigger_event(event_name: str, team: list[Character], **kwargs):
-    for unit in team:
-        # Passives
-        for passive in getattr(unit, "passives", []):
-            if passive.trigger == event_name:
-                kwargs["observer"] = unit
-                passive.effect(**kwargs)
-
-        # Buffs
-        for buff in getattr(unit, "buffs", []):
-            if buff.trigger == event_name and buff.effect:
-                if "unit" not in kwargs:
-                    buff.effect(unit=unit, buff=buff, **kwargs)
-                else:
-                    buff.effect(buff=buff, **kwargs)
-
-def trigger_event_for_unit(event_name: str, unit: Character, **kwargs):
-    for passive in getattr(unit, "passives", []):
-        if passive.trigger == event_name:
-            passive.effect(observer=unit, **kwargs)
+@dataclass(slots=True)
+class TurnEvent:
+    unit: Character
+
+@dataclass(slots=True)
+class HpChangeEvent:
+    unit: Character
+    old_hp: int
+    new_hp: int
+
+@dataclass(slots=True)
+class DamageTakenEvent:
+    target: Character
+    amount: int
+    source: Optional[Character]
+
+EVENT_TYPES = {
+    "on_turn_start": TurnEvent,
+    "on_turn_end": TurnEvent,
+    "on_hp_change": HpChangeEvent,
+    "on_damage_taken": DamageTakenEvent,
+}
+
+# Per-event counters: how often each event was raised and how many handlers it reached
+event_counts = defaultdict(int)
+handler_counts = defaultdict(int)
+
+def reset_event_counts():
+    event_counts.clear()
+    handler_counts.clear()
+
+def trigger_event(event_name: str, team: list[Character], event=None, delivery: Optional[str] = None, **fields):
+    """Deliver `event_name` to the passives and buffs in `team` subscribed to it.
+
+    The payload is `event`, or an EVENT_TYPES[event_name] built from `fields`
+    once the first subscriber is found. Passives are called as
+    effect(observer=unit, event=payload); buffs as effect(unit=..., buff=buff,
+    event=payload), where unit is the payload's unit if it has one. With
+    `delivery` set ("hit" or "action") only subscribers asking for that
+    delivery are called.
+    """
+    event_counts[event_name] += 1
+    for observer in team:
+        subscriptions = getattr(observer, "event_subscriptions", None)
+        if not subscriptions:
+            continue
+        subscribed = subscriptions.get(event_name)
+        if subscribed is None:
+            continue
+        if event is None:
+            event = EVENT_TYPES[event_name](**fields)
+
+        passives, buffs = subscribed
+        for passive in tuple(passives):
+            if delivery is not None and passive.delivery != delivery:
+                continue
+            handler_counts[event_name] += 1
+            passive.effect(observer=observer, event=event)
+
+        for buff in tuple(buffs):
+            if buff.effect and (delivery is None or buff.delivery == delivery):
+                handler_counts[event_name] += 1
+                buff.effect(unit=getattr(event, "unit", observer), buff=buff, event=event)
+
+def trigger_event_for_unit(event_name: str, unit: Character, event=None, **fields):
+    subscribed = getattr(unit, "event_subscriptions", {}).get(event_name)
+    if subscribed is None:
+        return
+    if event is None:
+        event = EVENT_TYPES[event_name](**fields)
+    for passive in tuple(subscribed[0]):
+        handler_counts[event_name] += 1
+        passive.effect(observer=unit, event=event)
+
+class HpChangeBatch:
+    """HP changes held back for per-action ("action" delivery) subscribers.
+
+    Changes are keyed by unit and notified team; each key keeps the HP before
+    its first change and after its last, in first-change order.
+    """
+    __slots__ = ("depth", "pending")
+
+    def __init__(self):
+        self.depth = 0
+        self.pending = {}
+
+    def record(self, unit: Character, old_hp: int, new_hp: int, team: list[Character]):
+        key = (id(unit), tuple(id(member) for member in team))
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = [unit, team, old_hp, new_hp]
+        else:
+            entry[3] = new_hp
+
+    def flush(self):
+        pending, self.pending = self.pending, {}
+        for unit, team, old_hp, new_hp in pending.values():
+            if new_hp != old_hp:
+                trigger_event("on_hp_change", team, delivery="action", unit=unit, old_hp=old_hp, new_hp=new_hp)
+
+hp_changes = HpChangeBatch()
+
+@contextmanager
+def coalesced_hp_changes(enabled: bool = True):
+    """Treat the enclosed block as one action for on_hp_change.
+
+    Per-hit subscribers are still notified on every change; per-action
+    subscribers get one event per (unit, team) with the net change when the
+    outermost block exits. A block that raises drops its pending changes.
+    """
+    if not enabled:
+        yield
+        return
+    hp_changes.depth += 1
+    try:
+        yield
+    except BaseException:
+        hp_changes.depth -= 1
+        if not hp_changes.depth:
+            hp_changes.pending.clear()
+        raise
+    hp_changes.depth -= 1
+    if not hp_changes.depth:
+        hp_changes.flush()
 
 def notify_hp_change(unit: Character, old_hp: int, new_hp: int, team: list[Character]):
-    diff = abs(new_hp - old_hp)
-    if diff > 0:
+    if (old_hp > 0) != (new_hp > 0):
+        turn_manager = getattr(unit, "turn_manager", None)
+        if turn_manager is not None:
+            turn_manager.invalidate_team_views()
+
+    if new_hp == old_hp:
+        return
+    if hp_changes.depth:
+        trigger_event("on_hp_change", team, delivery="hit", unit=unit, old_hp=old_hp, new_hp=new_hp)
+        hp_changes.record(unit, old_hp, new_hp, team)
+    else:
         trigger_event("on_hp_change", team, unit=unit, old_hp=old_hp, new_hp=new_hp)
 
 def notify_damage_taken(target: Character, amount: int, source: Optional[Character], team: list[Character]):
@@ -0,0 +1,121 @@
+"""Memory footprint of a battle state.
+
+Builds a fresh copy of a team-vs-dummies battle, plays some turns headlessly
+and reports the bytes reachable from (player team, enemy team, turn manager),
+broken down by type, plus the size of one instance of each hot-path type.
+Shared objects (classes, functions, modules, enum members) are not counted.
+Run it before and after a change to compare:
+
+    python memory_benchmark.py --turns 50
+"""
+
+import argparse
+import gc
+import sys
+import types
+from collections import defaultdict
+from enum import Enum
+
+import characters
+import lorelaiimpact
+from aura_state import AuraStore, thaw_auras
+from combat_helpers import ICDTracker
+from core import Aura, DamageInstance, Element, Passive, Position, StatType, Talent
+from elemental_enums import DamageType
+from engine import SimplePolicy, play_turn, quiet_output, setup_battle
+from montecarlo import TeamScenario
+from reaction_logic import ReactionHit
+from turn import Buff, BuffTimerUnit
+
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                types.MethodType, types.CodeType, Enum)
+
+def measure(root) -> tuple[int, dict]:
+    """Total bytes reachable from `root` and a per-type breakdown {type name: [count, bytes]}.
+
+    An instance's `__dict__` is charged to the instance's type.
+    """
+    seen = set()
+    by_type = defaultdict(lambda: [0, 0])
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        referents = gc.get_referents(obj)
+        instance_dict = getattr(obj, "__dict__", None) if not isinstance(obj, dict) else None
+        if isinstance(instance_dict, dict) and id(instance_dict) not in seen:
+            seen.add(id(instance_dict))
+            size += sys.getsizeof(instance_dict)
+            referents.extend(gc.get_referents(instance_dict))
+        entry = by_type[type(obj).__name__]
+        entry[0] += 1
+        entry[1] += size
+        total += size
+        stack.extend(referents)
+    return total, by_type
+
+def build_battle_state(turns: int, list_auras: bool = False):
+    player_team, enemy_team = TeamScenario(
+        [characters.shinobu, characters.rosaria, characters.yanfei, characters.gaming],
+        lorelaiimpact.dummies,
+    )()
+    if list_auras:
+        for unit in player_team + enemy_team:
+            if isinstance(unit.auras, AuraStore):
+                unit.auras = thaw_auras(unit.auras.state_key())
+
+    policy = SimplePolicy()
+    with quiet_output(False):
+        turn_manager = setup_battle(player_team, enemy_team)
+        turn_manager.display = False
+        for _ in range(turns):
+            play_turn(turn_manager, player_team, enemy_team, policy)
+    return player_team, enemy_team, turn_manager
+
+def hot_path_samples() -> dict:
+    owner = lorelaiimpact.dummy_a
+    buff = Buff("Sample", "", stat=StatType.ATK, amount=0.2, duration=2)
+    return {
+        "DamageInstance": DamageInstance(1.0, StatType.ATK, DamageType.NORMAL_ATTACK, element=Element.PYRO),
+        "Talent": Talent("Sample"),
+        "Buff": buff,
+        "BuffTimerUnit": BuffTimerUnit(buff, owner),
+        "ReactionHit": ReactionHit(owner, owner, "Overload", 100.0, Element.PYRO),
+        "ICDTracker": ICDTracker(tag="sample"),
+        "Passive": Passive("Sample", "", "on_hit", None),
+        "Aura": Aura(name="PYRO", element=Element.PYRO),
+        "Position": Position(0, 0),
+    }
+
+def instance_bytes(obj) -> int:
+    size = sys.getsizeof(obj)
+    instance_dict = getattr(obj, "__dict__", None)
+    if isinstance(instance_dict, dict):
+        size += sys.getsizeof(instance_dict)
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=50, help="turns to play before measuring")
+    parser.add_argument("--list-auras", action="store_true", help="keep auras in plain lists instead of AuraStore")
+    parser.add_argument("--top", type=int, default=15, help="number of types to list")
+    args = parser.parse_args()
+
+    state = build_battle_state(args.turns, args.list_auras)
+    total, by_type = measure(state)
+
+    print(f"Battle state after {args.turns} turns: {total:,} bytes")
+    print(f"{'type':<24}{'count':>8}{'bytes':>12}")
+    for name, (count, size) in sorted(by_type.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{name:<24}{count:>8}{size:>12,}")
+
+    print("\nBytes per instance (object + __dict__):")
+    for name, obj in hot_path_samples().items():
+        print(f"  {name:<16}{instance_bytes(obj):>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Monte Carlo battle runner.
+
+Fans repeated headless battles of one scenario out over a process pool. Each
+trial seeds the `random` module from (seed, trial index) before it starts, so
+a trial's crits, targeting and Superposition rolls do not depend on which
+worker ran it or in what order, and the same seed always merges to the same
+summary.
+"""
+
+import copy
+import random
+from concurrent.futures import ProcessPoolExecutor
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from engine import ActionPolicy, run_battle
+
+class TeamScenario:
+    """Picklable scenario that hands every trial a fresh copy of the template teams."""
+
+    def __init__(self, player_team: list, enemy_team: list):
+        self.player_team = player_team
+        self.enemy_team = enemy_team
+
+    def __call__(self):
+        # Copy both teams together so cross-references (summon owners, teams) stay intact
+        return copy.deepcopy((self.player_team, self.enemy_team))
+
+@dataclass
+class MonteCarloSummary:
+    trials: int = 0
+    wins: int = 0
+    losses: int = 0
+    unfinished: int = 0
+    total_turns: int = 0
+    damage_dealt: dict = field(default_factory=lambda: defaultdict(int))
+    damage_taken: dict = field(default_factory=lambda: defaultdict(int))
+
+    def add_result(self, result):
+        self.trials += 1
+        if result.winner == "player":
+            self.wins += 1
+        elif result.winner == "enemy":
+            self.losses += 1
+        else:
+            self.unfinished += 1
+        self.total_turns += result.turns
+        for name, amount in result.damage_dealt.items():
+            self.damage_dealt[name] += amount
+        for name, amount in result.damage_taken.items():
+            self.damage_taken[name] += amount
+
+    def merge(self, other: 'MonteCarloSummary'):
+        self.trials += other.trials
+        self.wins += other.wins
+        self.losses += other.losses
+        self.unfinished += other.unfinished
+        self.total_turns += other.total_turns
+        for name, amount in other.damage_dealt.items():
+            self.damage_dealt[name] += amount
+        for name, amount in other.damage_taken.items():
+            self.damage_taken[name] += amount
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trials if self.trials else 0.0
+
+    @property
+    def mean_turns(self) -> float:
+        return self.total_turns / self.trials if self.trials else 0.0
+
+    def mean_damage_dealt(self) -> dict:
+        return {name: total / self.trials for name, total in sorted(self.damage_dealt.items())}
+
+    def mean_damage_taken(self) -> dict:
+        return {name: total / self.trials for name, total in sorted(self.damage_taken.items())}
+
+def trial_seed(seed: int, index: int) -> str:
+    # String seeds are hashed with SHA-512, so neighbouring indices get unrelated streams
+    return f"{seed}:{index}"
+
+def run_trials(scenario: Callable, start: int, stop: int, seed: int = 0,
+               policy: Optional[ActionPolicy] = None, max_turns: Optional[int] = None) -> MonteCarloSummary:
+    """Run trials [start, stop) in this process and return their combined summary."""
+    summary = MonteCarloSummary()
+    for index in range(start, stop):
+        random.seed(trial_seed(seed, index))
+        player_team, enemy_team = scenario()
+        summary.add_result(run_battle(player_team, enemy_team, policy=copy.deepcopy(policy), max_turns=max_turns))
+    return summary
+
+def run_monte_carlo(scenario: Callable, trials: int, seed: int = 0, policy: Optional[ActionPolicy] = None,
+                    max_turns: Optional[int] = None, workers: Optional[int] = None,
+                    chunk_size: int = 256) -> MonteCarloSummary:
+    """Run `trials` battles of `scenario` across `workers` processes.
+
+    `scenario` is a picklable zero-argument callable returning fresh
+    (player_team, enemy_team) lists, e.g. a `TeamScenario`. Pass workers=1 to
+    run everything in the current process.
+    """
+    chunks = [(start, min(start + chunk_size, trials)) for start in range(0, trials, chunk_size)]
+    summary = MonteCarloSummary()
+
+    if workers == 1:
+        for start, stop in chunks:
+            summary.merge(run_trials(scenario, start, stop, seed, policy, max_turns))
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_trials, scenario, start, stop, seed, policy, max_turns)
+                   for start, stop in chunks]
+        # Merge in chunk order, not completion order
+        for future in futures:
+            summary.merge(future.result())
+    return summary
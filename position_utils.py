@@ -5,11 +5,32 @@ def distance(a: Character, b: Character) -> float:
     dy = a.position.y - b.position.y
     return (dx ** 2 + dy ** 2) ** 0.5  # Euclidean distance
 
-def place_in_grid(units: list[Character], columns: int = 3, spacing: int = 1, start_x: int = 0, start_y: int = 0):
+def distance_sq(a_pos: Position, b_pos: Position) -> float:
+    dx = a_pos.x - b_pos.x
+    dy = a_pos.y - b_pos.y
+    return dx * dx + dy * dy
+
+def place_in_grid(units: list[Character], columns: int = 3, spacing: int = 1, start_x: int = 0, start_y: int = 0, turn_manager=None):
     for i, unit in enumerate(units):
         x = start_x + (i % columns) * spacing
         y = start_y + (i // columns) * spacing
         unit.position = Position(x=x, y=y)
+        if turn_manager is not None:
+            turn_manager.spatial_index.update(unit)
 
 def get_targets_in_radius(center: Character, candidates: list[Character], radius: float) -> list[Character]:
-    return [unit for unit in candidates if unit != center and distance(center, unit) <= radius]
+    radius_sq = radius * radius
+    return [unit for unit in candidates if unit is not center and distance_sq(center.position, unit.position) <= radius_sq]
+
+def get_enemies_in_radius(attacker: Character, center, radius: float, turn_manager) -> list[Character]:
+    """Enemy Characters of `attacker` within `radius` of `center`, excluding `center` itself."""
+    return turn_manager.spatial_index.query_radius(
+        center.position, radius,
+        predicate=lambda unit: unit is not center and isinstance(unit, Character) and not turn_manager.same_team(attacker, unit)
+    )
+
+def get_nearest_enemy(attacker: Character, position: Position, turn_manager) -> Optional[Character]:
+    return turn_manager.spatial_index.nearest(
+        position,
+        predicate=lambda unit: isinstance(unit, Character) and not turn_manager.same_team(attacker, unit)
+    )
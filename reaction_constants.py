@@ -1,39 +1,114 @@
+from collections import namedtuple
+from enum import Enum
+from functools import lru_cache
+from elemental_enums import Element
+
+class Reaction(Enum):
+    FORWARD_VAPORIZE = "Forward Vaporize"
+    REVERSE_VAPORIZE = "Reverse Vaporize"
+    FORWARD_MELT = "Forward Melt"
+    REVERSE_MELT = "Reverse Melt"
+    OVERLOAD = "Overload"
+    ELECTRO_CHARGED = "Electro-Charged"
+    SUPERCONDUCT = "Superconduct"
+    PYRO_SWIRL = "Pyro Swirl"
+    HYDRO_SWIRL = "Hydro Swirl"
+    ELECTRO_SWIRL = "Electro Swirl"
+    CRYO_SWIRL = "Cryo Swirl"
+    BLOOM = "Bloom"
+    HYPERBLOOM = "Hyperbloom"
+    BURGEON = "Burgeon"
+    BURNING = "Burning"
+    SHATTER = "Shatter"
+    STASIS = "Stasis"
+    IGNITION = "Ignition"
+    IMPULSE = "Impulse"
+    ANCHOR = "Anchor"
+    SUPERPOSITION = "Superposition"
+    AGGRAVATE = "Aggravate"
+    SPREAD = "Spread"
+
+# kind: "transformative", "amplifying", "quicken" (flat bonus on the triggering hit) or "other";
+# Superposition is both transformative and amplifying. element/aoe_radius describe the
+# transformative hit.
+ReactionMetadata = namedtuple(
+    "ReactionMetadata",
+    "kind element aoe_radius transformative_multiplier amplifying_multiplier quicken_multiplier",
+    defaults=(None, 0.0, 1.0, 1.0, 0.0),
+)
+
+REACTION_METADATA = {
+    Reaction.FORWARD_VAPORIZE: ReactionMetadata("amplifying", amplifying_multiplier=2.0),
+    Reaction.REVERSE_VAPORIZE: ReactionMetadata("amplifying", amplifying_multiplier=1.5),
+    Reaction.FORWARD_MELT: ReactionMetadata("amplifying", amplifying_multiplier=2.0),
+    Reaction.REVERSE_MELT: ReactionMetadata("amplifying", amplifying_multiplier=1.5),
+    Reaction.OVERLOAD: ReactionMetadata("transformative", Element.PYRO, 2.0, 2.75),
+    Reaction.ELECTRO_CHARGED: ReactionMetadata("transformative", Element.ELECTRO, 0.0, 2),
+    Reaction.SUPERCONDUCT: ReactionMetadata("transformative", Element.CRYO, 1.5, 1.5),
+    Reaction.PYRO_SWIRL: ReactionMetadata("transformative", Element.PYRO, 3.0, 0.6),
+    Reaction.HYDRO_SWIRL: ReactionMetadata("transformative", Element.HYDRO, 3.0, 0.2),
+    Reaction.ELECTRO_SWIRL: ReactionMetadata("transformative", Element.ELECTRO, 3.0, 0.6),
+    Reaction.CRYO_SWIRL: ReactionMetadata("transformative", Element.CRYO, 3.0, 0.6),
+    Reaction.BLOOM: ReactionMetadata("transformative", Element.DENDRO, 2.0, 1.0),
+    Reaction.HYPERBLOOM: ReactionMetadata("transformative", Element.DENDRO, 2.0, 3),
+    Reaction.BURGEON: ReactionMetadata("transformative", Element.DENDRO, 2.0, 3),
+    Reaction.BURNING: ReactionMetadata("transformative", Element.PYRO, 2.0, 0.6),
+    Reaction.SHATTER: ReactionMetadata("other", Element.PHYSICAL, 0.0, 3),
+    Reaction.STASIS: ReactionMetadata("transformative", Element.IMAGINARY, 0.0, 2.25),
+    Reaction.IGNITION: ReactionMetadata("transformative", Element.IMAGINARY, 0.0, 2.25),
+    Reaction.IMPULSE: ReactionMetadata("transformative", Element.IMAGINARY, 0.0, 2.25),
+    Reaction.ANCHOR: ReactionMetadata("transformative", Element.IMAGINARY, 0.0, 2.25),
+    # The transformative element is rolled from the aura's source elements
+    Reaction.SUPERPOSITION: ReactionMetadata("both", None, 2.0, 3, 2.25),
+    Reaction.AGGRAVATE: ReactionMetadata("quicken", quicken_multiplier=1.15),
+    Reaction.SPREAD: ReactionMetadata("quicken", quicken_multiplier=1.25),
+}
+
+TRANSFORMATIVE_BASE_DAMAGE = 1446
+QUICKEN_BASE_DAMAGE = 1447
+# Coefficients of the EM curves
+TRANSFORMATIVE_EM_SCALE = 16
+AMPLIFYING_EM_SCALE = 2.78
+SUPERPOSITION_EM_SCALE = 1.28
+QUICKEN_EM_SCALE = 5
+DEFAULT_METADATA = ReactionMetadata("other", Element.PHYSICAL)
+
+REACTION_BY_NAME = {reaction.value: reaction for reaction in Reaction}
+METADATA_BY_NAME = {reaction.value: meta for reaction, meta in REACTION_METADATA.items()}
+TRANSFORMATIVE_REACTIONS = frozenset(name for name, meta in METADATA_BY_NAME.items() if meta.kind in ("transformative", "both"))
+AMPLIFYING_REACTIONS = frozenset(name for name, meta in METADATA_BY_NAME.items() if meta.kind in ("amplifying", "both"))
+
+def reaction_metadata(reaction: str) -> ReactionMetadata:
+    """Metadata for a reaction name; unknown reactions get a physical, 1x placeholder."""
+    return METADATA_BY_NAME.get(reaction, DEFAULT_METADATA)
+
 def is_transformative(reaction: str) -> bool:
-    return reaction in {
-        "Overload", "Electro-Charged", "Superconduct",
-        "Pyro Swirl", "Hydro Swirl", "Electro Swirl", "Cryo Swirl","Bloom", "Hyperbloom", "Burgeon", "Burning", "Stasis", "Ignition", "Impulse", "Anchor", "Superposition",
-        }
+    return reaction in TRANSFORMATIVE_REACTIONS
 
 def is_amplifying(reaction: str) -> bool:
-    return reaction in {
-        "Forward Melt", "Forward Vaporize", "Reverse Melt", "Reverse Vaporize", "Superposition", 
-        }
+    return reaction in AMPLIFYING_REACTIONS
 
 def get_amplifying_multiplier(reaction: str) -> float:
-    return {
-        "Forward Vaporize": 2.0,
-        "Reverse Vaporize": 1.5,
-        "Forward Melt": 2.0,
-        "Reverse Melt": 1.5,
-        "Superposition": 2.25,
-    }.get(reaction, 1.0)
+    return reaction_metadata(reaction).amplifying_multiplier
 
 def get_transformative_multiplier(reaction: str) -> float:
-    return {
-        "Burgeon": 3,
-        "Hyperbloom": 3,
-        "Shatter": 3,
-        "Overload": 2.75,
-        "Electro-Charged": 2,
-        "Superconduct": 1.5,
-        "Pyro Swirl": 0.6,
-        "Cryo Swirl": 0.6,
-        "Hydro Swirl": 0.2,
-        "Electro Swirl": 0.6,
-        "Burning": 0.6,
-        "Stasis": 2.25,
-        "Ignition": 2.25,
-        "Impulse": 2.25,
-        "Anchor": 2.25,
-        "Superposition": 3,
-    }.get(reaction, 1.0)
+    return reaction_metadata(reaction).transformative_multiplier
+
+# EM curves, memoized per (reaction, EM). Attackers keep the same EM for long
+# stretches of a fight, so a small cache covers nearly every reaction.
+
+@lru_cache(maxsize=4096)
+def transformative_damage(reaction: str, em: float) -> int:
+    em_bonus = 1 + (TRANSFORMATIVE_EM_SCALE * em / (em + 2000))
+    return int(TRANSFORMATIVE_BASE_DAMAGE * em_bonus * get_transformative_multiplier(reaction))
+
+@lru_cache(maxsize=4096)
+def amplifying_multiplier(reaction: str, em: float) -> float:
+    meta = reaction_metadata(reaction)
+    em_multi = SUPERPOSITION_EM_SCALE if meta.kind == "both" else AMPLIFYING_EM_SCALE
+    return meta.amplifying_multiplier * (1 + (em_multi * (em)/(1400 + em)))
+
+@lru_cache(maxsize=4096)
+def quicken_bonus(reaction: str, em: float) -> float:
+    """Flat damage Aggravate or Spread adds to the triggering hit."""
+    return reaction_metadata(reaction).quicken_multiplier * QUICKEN_BASE_DAMAGE * (1 + (QUICKEN_EM_SCALE * em / (em + 1200)))
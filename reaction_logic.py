@@ -6,6 +6,8 @@ from reaction_constants import *
 from dendro_core import spawn_dendro_core
 
 class ReactionHit:
+    __slots__ = ("source", "target", "reaction", "damage", "element")
+
     def __init__(self, source: Character, target: Character, reaction: str, damage: float, element: Element):
         self.source = source
         self.target = target
@@ -16,132 +18,168 @@ class ReactionHit:
     def resolve(self):
         print(f"{self.reaction} deals {int(self.damage)} damage to {self.target.name}!")
 
+REACTION_TABLE = {
+    (Element.PYRO, Element.HYDRO): "Reverse Vaporize",
+    (Element.HYDRO, Element.PYRO): "Forward Vaporize",
+    (Element.PYRO, Element.CRYO): "Forward Melt",
+    (Element.CRYO, Element.PYRO): "Reverse Melt",
+    (Element.ELECTRO, Element.PYRO): "Overload",
+    (Element.CRYO, Element.HYDRO): "Freeze",
+    (Element.ELECTRO, Element.HYDRO): "Electro-Charged",
+    (Element.PYRO, Element.DENDRO): "Burning",
+    (Element.CRYO, Element.DENDRO): "Rimegrass",
+    (Element.DENDRO, Element.HYDRO): "Bloom",
+    (Element.ELECTRO, Element.CRYO): "Superconduct",
+    (Element.ELECTRO, Element.DENDRO): "Quicken",
+    (Element.DENDRO, Element.ELECTRO): "Quicken",
+    (Element.CRYO, Element.IMAGINARY): "Stasis",
+    (Element.PYRO, Element.IMAGINARY): "Ignition",
+    (Element.HYDRO, Element.IMAGINARY): "Anchor",
+    (Element.ELECTRO, Element.IMAGINARY): "Impulse",
+    (Element.CRYO, Element.ANEMO): "Cryo Swirl",
+    (Element.PYRO, Element.ANEMO): "Pyro Swirl",
+    (Element.HYDRO, Element.ANEMO): "Anemo Swirl",
+    (Element.ELECTRO, Element.ANEMO): "Electro Swirl",
+}
+
+# Reactions against an existing Quicken aura, keyed by incoming element
+QUICKEN_REACTIONS = {
+    Element.ELECTRO: "Aggravate",
+    Element.DENDRO: "Spread",
+}
+
+def compile_reaction_matrix() -> list[list[Optional[str]]]:
+    """Dense [new element][aura element] table, indexed by Element value.
+
+    Each cell holds the forward lookup, falling back to the reversed pair, which
+    is what check_reaction used to do with two dict lookups per pair.
+    """
+    size = max(e.value for e in Element) + 1
+    matrix = [[None] * size for _ in range(size)]
+    for new_element in Element:
+        for aura_element in Element:
+            matrix[new_element.value][aura_element.value] = (
+                REACTION_TABLE.get((new_element, aura_element))
+                or REACTION_TABLE.get((aura_element, new_element))
+            )
+    return matrix
+
+REACTION_MATRIX = compile_reaction_matrix()
+
+def lookup_reaction(new_element: Element, aura_element: Element) -> Optional[str]:
+    return REACTION_MATRIX[new_element.value][aura_element.value]
+
 def check_reaction(new_element: Element, existing_auras: list, just_applied_elements: Optional[set] = None):
-    if just_applied_elements is None:
-        just_applied_elements = set()
-
-    reaction_table = {
-        (Element.PYRO, Element.HYDRO): "Reverse Vaporize",
-        (Element.HYDRO, Element.PYRO): "Forward Vaporize",
-        (Element.PYRO, Element.CRYO): "Forward Melt",
-        (Element.CRYO, Element.PYRO): "Reverse Melt",
-        (Element.ELECTRO, Element.PYRO): "Overload",
-        (Element.CRYO, Element.HYDRO): "Freeze",
-        (Element.ELECTRO, Element.HYDRO): "Electro-Charged",
-        (Element.PYRO, Element.DENDRO): "Burning",
-        (Element.CRYO, Element.DENDRO): "Rimegrass",
-        (Element.DENDRO, Element.HYDRO): "Bloom",
-        (Element.ELECTRO, Element.CRYO): "Superconduct",
-        (Element.ELECTRO, Element.DENDRO): "Quicken",
-        (Element.DENDRO, Element.ELECTRO): "Quicken",
-        (Element.CRYO, Element.IMAGINARY): "Stasis",
-        (Element.PYRO, Element.IMAGINARY): "Ignition",
-        (Element.HYDRO, Element.IMAGINARY): "Anchor",
-        (Element.ELECTRO, Element.IMAGINARY): "Impulse",
-        (Element.CRYO, Element.ANEMO): "Cryo Swirl",
-        (Element.PYRO, Element.ANEMO): "Pyro Swirl",
-        (Element.HYDRO, Element.ANEMO): "Anemo Swirl",
-        (Element.ELECTRO, Element.ANEMO): "Electro Swirl",
-    }
-    
     if new_element == Element.QUANTUM:
         for aura in existing_auras:
-            if any(tag in aura.tags for tag in AuraTag):
+            if aura.tags:
                 return "Superposition", aura
 
-    if any(aura.name == "Quicken" for aura in existing_auras):
-        if new_element == Element.ELECTRO:
-            print(f"Reaction Aggravate detected with existing Quicken and {new_element.name}")
-            return "Aggravate", "Quicken"
-        elif new_element == Element.DENDRO:
-            print(f"Reaction Spread detected with existing Quicken and {new_element.name}")
-            return "Spread", "Quicken"
+    quicken_reaction = QUICKEN_REACTIONS.get(new_element)
+    if quicken_reaction and any(aura.name == "Quicken" for aura in existing_auras):
+        return quicken_reaction, "Quicken"
 
+    row = REACTION_MATRIX[new_element.value]
     for aura in existing_auras:
-        source_elements = aura.source_elements or {aura.element}
+        source_elements = aura.source_elements or (aura.element,)
+        if len(source_elements) > 1:
+            # Fixed order so composite auras resolve the same way in every process
+            source_elements = sorted(source_elements, key=lambda e: e.value)
         for elem in source_elements:
-            reaction = reaction_table.get((new_element, elem)) or reaction_table.get((elem, new_element))
+            reaction = row[elem.value]
             if reaction:
-                print(f"Reaction {reaction} detected between {new_element.name} and {elem.name}")
                 return reaction, aura
 
     return None, None
 
+def compile_aura_reactions(existing_auras: list) -> list[tuple]:
+    """check_reaction's result for every incoming element against one aura set, indexed by Element value."""
+    size = len(REACTION_MATRIX)
+    results = [None] * size
+    # Walk the auras' source elements in check_reaction's order; each one fills the
+    # elements that react with it from its REACTION_MATRIX column
+    for aura in existing_auras:
+        source_elements = aura.source_elements or (aura.element,)
+        if len(source_elements) > 1:
+            source_elements = sorted(source_elements, key=lambda e: e.value)
+        for elem in source_elements:
+            column = elem.value
+            for value in range(size):
+                if results[value] is None:
+                    reaction = REACTION_MATRIX[value][column]
+                    if reaction:
+                        results[value] = (reaction, aura)
+
+    if any(aura.name == "Quicken" for aura in existing_auras):
+        for element, reaction in QUICKEN_REACTIONS.items():
+            results[element.value] = (reaction, "Quicken")
+    for aura in existing_auras:
+        if aura.tags:
+            results[Element.QUANTUM.value] = ("Superposition", aura)
+            break
+    return [result or (None, None) for result in results]
+
+def check_reactions_bulk(queries) -> list[tuple]:
+    """Resolve many (new element, existing auras) pairs; results line up with `queries`.
+
+    Queries are grouped by aura set (the same aura objects in the same
+    order). Each set is compiled once against REACTION_MATRIX into a table
+    over all incoming elements, and every query in the group is then a
+    single lookup. Results are the same as check_reaction's.
+    """
+    tables = {}
+    results = []
+    for new_element, auras in queries:
+        key = tuple(map(id, auras))
+        table = tables.get(key)
+        if table is None:
+            table = tables[key] = compile_aura_reactions(auras)
+        results.append(table[new_element.value])
+    return results
+
 def calculate_amplifying_damage(reaction: str, attacker: Character) -> float:
-    em = attacker.get_stat(StatType.EM)
-    base_multi = get_amplifying_multiplier(reaction)
-    if reaction == "Superposition":
-        em_multi = 1.28
-    else:
-        em_multi = 2.78
-    return base_multi * (1 + (em_multi * (em)/(1400 + em)))
-
-def calculate_transformative_damage(reaction: str, attacker: Character, source_elements: Optional[frozenset[Element]] = None) -> float:
-    aoe_radius = 0.0
-    em = attacker.get_stat(StatType.EM)
-    base_damage = 1446 
-    em_bonus = 1 + (16 * em / (em + 2000))
-    final_damage = base_damage * em_bonus * get_transformative_multiplier(reaction)
-
-    if reaction in ["Bloom", "Hyperbloom", "Burgeon"]:
-        element = Element.DENDRO
-        aoe_radius = 2.0
-    elif reaction in ["Overload", "Burning"]:
-        element = Element.PYRO
-        aoe_radius = 2.0
-    elif reaction == "Electro-Charged":
-        element = Element.ELECTRO
-        aoe_radius = 0.0
-    elif reaction == "Superconduct":
-        element = Element.CRYO
-        aoe_radius = 1.5
-    elif reaction == "Pyro Swirl":
-        element = Element.PYRO
-        aoe_radius = 3.0
-    elif reaction == "Cryo Swirl":
-        element = Element.CRYO
-        aoe_radius = 3.0
-    elif reaction == "Hydro Swirl":
-        element = Element.HYDRO
-        aoe_radius = 3.0
-    elif reaction == "Electro Swirl":
-        element = Element.ELECTRO
-        aoe_radius = 3.0
-    elif reaction == "Shatter":
-        element = Element.PHYSICAL
-        aoe_radius = 0.0
-    elif reaction in ["Stasis", "Ignition", "Impulse", "Anchor"]:
-        element = Element.IMAGINARY
-        aoe_radius = 0.0
-    elif reaction == "Superposition" and source_elements:
-        element = random.choice(list(source_elements))
-        aoe_radius = 2.0
-        superposition_hit = {
-            "damage": int(final_damage),
-            "element": element,
-            "label": reaction,
-            "crit": True,
-            "aoe_radius": aoe_radius 
-        }
-        return superposition_hit
-    else:
-        element = Element.PHYSICAL  # fallback
+    return amplifying_multiplier(reaction, attacker.get_stat(StatType.EM))
+
+def calculate_transformative_damage(reaction: str, attacker: Character, source_elements: Optional[frozenset[Element]] = None,
+                                    expected: bool = False) -> float:
+    """Damage, element and AoE of a transformative reaction hit.
+
+    Superposition deals the same damage whichever source element it rolls, so
+    with `expected` set it takes the lowest source element instead of rolling.
+    That is a deliberate approximation: the element the hit applies still
+    decides the target's next aura and reaction, and expected mode follows
+    that one branch rather than averaging over every element it could roll.
+    """
+    meta = reaction_metadata(reaction)
+    damage = transformative_damage(reaction, attacker.get_stat(StatType.EM))
+
+    if meta.kind == "both":  # Superposition
+        if source_elements:
+            return {
+                "damage": damage,
+                "element": (min(source_elements, key=lambda e: e.value) if expected
+                            else random.choice(list(source_elements))),
+                "label": reaction,
+                "crit": True,
+                "aoe_radius": meta.aoe_radius
+            }
+        meta = DEFAULT_METADATA
 
     return {
-        "damage": int(final_damage),
-        "element": element,
+        "damage": damage,
+        "element": meta.element or Element.PHYSICAL,
         "label": reaction,
         "crit": False,
-        "aoe_radius": aoe_radius
+        "aoe_radius": meta.aoe_radius
     }
 
 def resolve_reaction_effect(reaction: str, attacker: Character, defender: Character, turn_manager: TurnManager) -> list[ReactionHit]:
     hits = []
     def apply_superconduct(unit, **kwargs):
-        unit.resistances[Element.PHYSICAL] -= 0.4
+        unit.own("resistances")[Element.PHYSICAL] -= 0.4
 
     def remove_superconduct(unit):
-        unit.resistances[Element.PHYSICAL] += 0.4
+        unit.own("resistances")[Element.PHYSICAL] += 0.4
 
     if reaction == "Superconduct":
         debuff = Buff(
@@ -152,15 +190,14 @@ def resolve_reaction_effect(reaction: str, attacker: Character, defender: Charac
             effect=apply_superconduct,
             cleanup_effect=remove_superconduct,
         )
-        defender.buffs.append(debuff)
+        defender.add_buff(debuff)
         print(f"🧊⚡ {defender.name} is affected by Superconduct (−40% Physical RES)!")
     
     elif reaction == "Bloom":
         spawn_dendro_core(attacker, defender, turn_manager)
 
     elif reaction == "Rimegrass":
-        aura = Aura(element=Element.CRYO, name="Frost-Twined", units=5)
-        defender.auras.append(aura)
+        # The Frost-Twined aura itself is added by the aura transition (aura_state.py)
         print(f"🌿❄️ {defender.name} is now Frost-Twined (x5 Cryo/Dendro multiplier)!")
 
     elif reaction == "Stasis":
@@ -217,35 +254,42 @@ def resolve_reaction_effect(reaction: str, attacker: Character, defender: Charac
 def is_consuming_reaction(reaction: str) -> bool:
     return reaction not in ("Quicken", "Aggravate", "Spread", "Freeze", "Electro-Charged", "Burning")
 
-def consume_aura_units(defender: Character, element: Element, reaction: str = None):
+def consume_from_auras(auras: list, element: Element, reaction: str = None) -> float:
+    """Take the reaction's gauge cost from the first aura of `element`, dropping it if emptied.
+
+    Returns the number of units actually consumed.
+    """
     units_to_consume = REACTION_AURA_CONSUMPTION.get(reaction, 1.0)
+    if not isinstance(auras, list):
+        return auras.consume(element, units_to_consume)
 
-    for aura in defender.auras:
-        print(f"[DEBUG] {element.name} aura on {defender.name} has {aura.units:.2f}U before consumption")
+    for aura in auras:
         if aura.element == element:
+            consumed = min(aura.units, units_to_consume)
             aura.units = max(0, aura.units - units_to_consume)
             if aura.units <= 0:
-                print(f"{element.name} aura on {defender.name} fully consumed.")
-                defender.auras.remove(aura)
-            else:
-                print(f"{units_to_consume}U of {element.name} aura consumed. Remaining: {aura.units:.2f}U")
-            break
+                auras.remove(aura)
+            return consumed
+    return 0.0
+
+def consume_aura_units(defender: Character, element: Element, reaction: str = None):
+    consumed = consume_from_auras(defender.own("auras"), element, reaction)
+    if not consumed:
+        return
+    remaining = next((a for a in defender.auras if a.element == element), None)
+    if remaining is None:
+        print(f"{element.name} aura on {defender.name} fully consumed.")
+    else:
+        print(f"{consumed}U of {element.name} aura consumed. Remaining: {remaining.units:.2f}U")
 
 def check_aggravate(attacker: Character, defender: Character, damage_element: Element):
     if damage_element != Element.ELECTRO:
-        print("[DEBUG] Aggravate not triggered. Not Electro attack.")
         return 0
     if not any(a.name == "Quicken" for a in defender.auras):
-        print("[DEBUG] Aggravate not triggered. No Quicken aura.")
         return 0
-    em = attacker.stats.get(StatType.EM, 0)
-    bonus_damage = 1.15 * 1447 * (1 + (5 * em / (em + 1200)))
-    print(f"[DEBUG] Aggravate triggered. EM: {em}, Bonus: {bonus_damage}")
-    return bonus_damage
+    return quicken_bonus("Aggravate", attacker.stats.get(StatType.EM, 0))
 
 def check_spread(attacker: Character, defender: Character, damage_element: Element):
     if damage_element == Element.DENDRO and any(a.name == "Quicken" for a in defender.auras):
-        em = attacker.stats.get(StatType.EM, 0)
-        bonus_damage = 1.25 * 1447 * (1 + (5 * em / (em + 1200)))
-        return bonus_damage
+        return quicken_bonus("Spread", attacker.stats.get(StatType.EM, 0))
     return 0
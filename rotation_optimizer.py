@@ -0,0 +1,250 @@
+"""Rotation search.
+
+Finds the sequence of player actions that deals the most damage to the
+enemy team within an action-value horizon. Each player turn is one
+decision: a normal attack string (played to the end of the chain), a skill
+or burst that `get_action_options` lists and whose cooldown and energy
+allow it right now, or ending the turn when nothing else is possible.
+Battles are played in expected-damage mode, so a rotation always deals the
+same damage and branches can be compared directly.
+
+The search is a beam search over forked battle states. Children that reach
+a state already kept at least as cheaply (the same `transposition.state_key`,
+e.g. two characters' independent actions taken in either order) are dropped
+through a bounded transposition table. To use every core,
+the first few decisions are expanded up front and each resulting subtree
+is beam-searched in its own process; a worker rebuilds its subtree's root
+by replaying the decisions that lead to it.
+
+    python rotation_optimizer.py --horizon 1000 --beam 16
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from battle_state import BattleState
+from core import Character
+from engine import (ActionPolicy, SimplePolicy, get_action_options, get_living, is_talent_ready, play_turn,
+                    quiet_output, setup_battle)
+from transposition import TranspositionTable
+from turn import TurnManager
+
+DEFAULT_TABLE_SIZE = 100_000
+
+# One player turn: (character name, action type, talent name or None)
+Decision = tuple
+
+@dataclass
+class Rotation:
+    damage: int = 0
+    decisions: list = field(default_factory=list)
+
+class ScriptedPolicy(ActionPolicy):
+    """Plays `decisions` in order, one per player turn; a normal attack keeps going until its string ends.
+
+    A decision that is no longer possible ends the turn instead.
+    """
+
+    def __init__(self, decisions: list):
+        self.decisions = list(decisions)
+        self.index = 0
+        self.turn = None
+        self.continuing = False
+
+    def choose_action(self, character: Character, options: list, turn_manager: TurnManager):
+        turn = (id(character), turn_manager.time)
+        if turn == self.turn and self.continuing:
+            return "normal", None
+        self.turn = turn
+        if self.index >= len(self.decisions):
+            return "end", None
+        _, action_type, talent_name = self.decisions[self.index]
+        self.index += 1
+        self.continuing = action_type == "normal"
+        for option in options:
+            if option[0] == action_type and (option[1] is None or option[1].name == talent_name):
+                return option
+        return "end", None
+
+def feasible_decisions(character: Character) -> list[Decision]:
+    """The decisions worth trying for `character` now; ending the turn only if nothing else is ready."""
+    decisions = []
+    for action_type, talent in get_action_options(character):
+        if action_type == "end":
+            continue
+        if talent is not None and not is_talent_ready(character, talent):
+            continue
+        decisions.append((character.name, action_type, talent.name if talent else None))
+    return decisions or [(character.name, "end", None)]
+
+def enemy_damage_taken(state: BattleState) -> int:
+    return sum(enemy.max_hp - max(enemy.current_hp, 0) for enemy in state.enemy_team)
+
+def advance_to_decision(state: BattleState, horizon: float) -> Optional[Character]:
+    """Play turns that need no decision; return the player character about to act, or None once the
+    battle is over or the next turn falls beyond `horizon`."""
+    turn_manager = state.turn_manager
+    policy = SimplePolicy()
+    while get_living(state.player_team) and get_living(state.enemy_team):
+        upcoming = turn_manager.peek_timeline()
+        if upcoming is None or upcoming[0] > horizon:
+            return None
+        unit = upcoming[2]
+        if unit in state.player_team and unit.current_hp > 0:
+            return unit
+        play_turn(turn_manager, state.player_team, state.enemy_team, policy)
+    return None
+
+def play_decision(state: BattleState, decision: Decision, horizon: float) -> Optional[Character]:
+    play_turn(state.turn_manager, state.player_team, state.enemy_team, ScriptedPolicy([decision]))
+    return advance_to_decision(state, horizon)
+
+def start_battle(scenario: Callable) -> BattleState:
+    player_team, enemy_team = scenario()
+    turn_manager = setup_battle(player_team, enemy_team)
+    turn_manager.display = False
+    turn_manager.expected_damage = True
+    return BattleState(turn_manager, player_team, enemy_team)
+
+@dataclass
+class SearchNode:
+    state: BattleState
+    actor: Optional[Character]  # next player character to decide, None once the horizon is reached
+    decisions: list
+
+def expand(node: SearchNode, horizon: float) -> list[SearchNode]:
+    children = []
+    for decision in feasible_decisions(node.actor):
+        state = node.state.fork()
+        actor = play_decision(state, decision, horizon)
+        children.append(SearchNode(state, actor, node.decisions + [decision]))
+    return children
+
+def beam_search(root: SearchNode, horizon: float, beam_width: int,
+                table: Optional[TranspositionTable] = None) -> Rotation:
+    """Best rotation reachable from `root`, keeping the `beam_width` highest-damage nodes per decision.
+
+    With a `table`, a child whose state key already maps to at least its
+    damage is skipped. Keys compare HP exactly unless the table's `hp_bucket`
+    is set, in which case states in the same buckets are merged, keeping the
+    one that has dealt the most damage.
+    """
+    beam = [root]
+    best = root
+    while beam:
+        children = []
+        for node in beam:
+            if node.actor is not None:
+                children.extend(expand(node, horizon))
+        if not children:
+            break
+        # Stable sort: equal damage keeps expansion order, so results are reproducible
+        children.sort(key=lambda child: -enemy_damage_taken(child.state))
+        beam = []
+        for child in children:
+            if table is not None:
+                damage = enemy_damage_taken(child.state)
+                seen = table.lookup(child.state)
+                if seen is not None and seen >= damage:
+                    continue
+                table.record(child.state, damage)
+            beam.append(child)
+            if len(beam) == beam_width:
+                break
+        for node in beam:
+            if enemy_damage_taken(node.state) > enemy_damage_taken(best.state):
+                best = node
+    return Rotation(enemy_damage_taken(best.state), best.decisions)
+
+def search_subtree(scenario: Callable, prefix: list, horizon: float, beam_width: int,
+                   table_size: int = DEFAULT_TABLE_SIZE, hp_bucket: int = 1) -> Rotation:
+    """Rebuild the node reached by `prefix` from a fresh battle and beam-search below it."""
+    table = TranspositionTable(table_size, hp_bucket) if table_size else None
+    with quiet_output(False):
+        state = start_battle(scenario)
+        actor = advance_to_decision(state, horizon)
+        for decision in prefix:
+            actor = play_decision(state, decision, horizon)
+        return beam_search(SearchNode(state, actor, list(prefix)), horizon, beam_width, table)
+
+def split_frontier(scenario: Callable, horizon: float, subtrees: int, max_depth: int = 4) -> list[list]:
+    """Decision prefixes of at least `subtrees` disjoint subtrees (fewer if the tree is smaller)."""
+    with quiet_output(False):
+        state = start_battle(scenario)
+        frontier = [SearchNode(state, advance_to_decision(state, horizon), [])]
+        for _ in range(max_depth):
+            if len(frontier) >= subtrees or all(node.actor is None for node in frontier):
+                break
+            next_frontier = []
+            for node in frontier:
+                next_frontier.extend(expand(node, horizon) if node.actor is not None else [node])
+            frontier = next_frontier
+    return [node.decisions for node in frontier]
+
+def optimize_rotation(scenario: Callable, horizon: float, beam_width: int = 16,
+                      workers: Optional[int] = None, table_size: int = DEFAULT_TABLE_SIZE,
+                      hp_bucket: int = 1) -> Rotation:
+    """Highest-damage rotation for `scenario` up to `horizon` AV.
+
+    `scenario` is a picklable zero-argument callable returning fresh
+    (player_team, enemy_team) lists, e.g. a `montecarlo.TeamScenario`. Pass
+    workers=1 to search in the current process. Each worker keeps its own
+    transposition table of `table_size` entries (0 disables it); see
+    beam_search for `hp_bucket`.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return search_subtree(scenario, [], horizon, beam_width, table_size, hp_bucket)
+
+    prefixes = split_frontier(scenario, horizon, 2 * workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(search_subtree, scenario, prefix, horizon, beam_width, table_size, hp_bucket) for prefix in prefixes]
+        # Ties go to the earliest subtree, not the first to finish
+        best = Rotation()
+        for future in futures:
+            rotation = future.result()
+            if rotation.damage > best.damage or not best.decisions:
+                best = rotation
+    return best
+
+def replay_damage(scenario: Callable, policy: ActionPolicy, horizon: float) -> int:
+    """Damage `policy` deals in expected-damage mode before `horizon`, for comparison."""
+    with quiet_output(False):
+        state = start_battle(scenario)
+        while get_living(state.player_team) and get_living(state.enemy_team):
+            upcoming = state.turn_manager.peek_timeline()
+            if upcoming is None or upcoming[0] > horizon:
+                break
+            play_turn(state.turn_manager, state.player_team, state.enemy_team, policy)
+    return enemy_damage_taken(state)
+
+def main():
+    import characters
+    import lorelaiimpact
+    from montecarlo import TeamScenario
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--horizon", type=float, default=1000, help="action value to search up to")
+    parser.add_argument("--beam", type=int, default=16, help="nodes kept per decision")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--table-size", type=int, default=DEFAULT_TABLE_SIZE,
+                        help="transposition table entries per worker (0 disables)")
+    parser.add_argument("--hp-bucket", type=int, default=1, help="merge states whose HP match to this granularity")
+    args = parser.parse_args()
+
+    scenario = TeamScenario(
+        [characters.shinobu, characters.rosaria, characters.yanfei, characters.gaming],
+        lorelaiimpact.dummies,
+    )
+    rotation = optimize_rotation(scenario, args.horizon, args.beam, args.workers, args.table_size, args.hp_bucket)
+    baseline = replay_damage(scenario, SimplePolicy(), args.horizon)
+
+    print(f"Best rotation over {args.horizon:g} AV: {rotation.damage:,} DMG (SimplePolicy: {baseline:,})")
+    for index, (name, action_type, talent_name) in enumerate(rotation.decisions, 1):
+        print(f" {index:>3}. {name}: {talent_name or action_type}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Stat sensitivity report.
+
+For every character and stat, the damage gained by raising that base stat
+by one step (a substat roll, by default), as forward finite differences of
+full battles played up to an action-value horizon. Every effect of the stat
+is included: SPD through extra turns on the timeline, HP through HP-scaling
+talents and Furina's HP-change Fanfare, EM through reactions.
+
+All perturbed battles of a trial start from the same seed (common random
+numbers), so with rolled crits the differences are not buried in crit
+noise. The (trial chunk, perturbation) runs are spread over a process
+pool like montecarlo.run_monte_carlo. In expected-damage mode (the
+default) battles are deterministic and one trial is exact.
+
+    python sensitivity.py --horizon 1000
+"""
+
+import argparse
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from battle_state import BattleState
+from build_optimizer import roll_values
+from core import StatType
+from engine import ActionPolicy, SimplePolicy, get_living, play_turn, quiet_output, setup_battle
+from montecarlo import trial_seed
+from rotation_optimizer import enemy_damage_taken
+
+# ENERGY_RECHARGE is left out: nothing in the engine reads it yet
+DEFAULT_STATS = (StatType.ATK, StatType.HP, StatType.DEF, StatType.EM, StatType.CRIT_RATE, StatType.CRIT_DMG, StatType.SPD)
+# Stats stored as fractions are reported per percentage point
+STAT_POINTS = {StatType.CRIT_RATE: 0.01, StatType.CRIT_DMG: 0.01, StatType.ENERGY_RECHARGE: 0.01}
+
+# (character name, stat, step); (None, None, 0) is the unperturbed battle
+Perturbation = tuple
+
+@dataclass
+class Sensitivity:
+    character: str
+    stat: StatType
+    step: float
+    gain: float  # mean damage gained per step
+    stderr: float  # standard error of `gain` over the trials
+
+    @property
+    def per_point(self) -> float:
+        return self.gain / self.step * STAT_POINTS.get(self.stat, 1)
+
+def apply_perturbation(player_team: list, perturbation: Perturbation):
+    name, stat, step = perturbation
+    if stat is None:
+        return
+    character = next(unit for unit in player_team if unit.name == name)
+    character.set_base_stat(stat, character.base_stats.get(stat, 0) + step)
+    if stat == StatType.HP:
+        character.max_hp += step
+        character.current_hp += step
+
+def perturbed_damage(scenario: Callable, perturbation: Perturbation, horizon: float, expected: bool,
+                     policy: ActionPolicy) -> int:
+    """Damage dealt to the enemy team up to `horizon` AV with `perturbation` applied."""
+    player_team, enemy_team = scenario()
+    apply_perturbation(player_team, perturbation)
+    turn_manager = setup_battle(player_team, enemy_team)
+    turn_manager.display = False
+    turn_manager.expected_damage = expected
+    while get_living(player_team) and get_living(enemy_team):
+        upcoming = turn_manager.peek_timeline()
+        if upcoming is None or upcoming[0] > horizon:
+            break
+        play_turn(turn_manager, player_team, enemy_team, policy)
+    return enemy_damage_taken(BattleState(turn_manager, player_team, enemy_team))
+
+def run_perturbations(scenario: Callable, perturbations: list, horizon: float, expected: bool,
+                      seed: int, start: int, stop: int, policy: Optional[ActionPolicy] = None) -> np.ndarray:
+    """Damage for trials [start, stop) x perturbations; every perturbation of a trial uses the trial's seed."""
+    policy = policy or SimplePolicy()
+    damage = np.zeros((stop - start, len(perturbations)))
+    with quiet_output(False):
+        for row, index in enumerate(range(start, stop)):
+            for column, perturbation in enumerate(perturbations):
+                random.seed(trial_seed(seed, index))
+                damage[row, column] = perturbed_damage(scenario, perturbation, horizon, expected, policy)
+    return damage
+
+def stat_sensitivity(scenario: Callable, horizon: float, stats=DEFAULT_STATS, character_names: Optional[list] = None,
+                     steps: Optional[dict] = None, trials: int = 1, expected: bool = True, seed: int = 0,
+                     policy: Optional[ActionPolicy] = None, workers: Optional[int] = None,
+                     chunk_size: int = 8) -> list[Sensitivity]:
+    """Damage gained per step of each stat for each player character.
+
+    `steps` maps a stat to its step; the default is one substat roll for
+    that character (see build_optimizer.SUBSTAT_ROLLS). With `expected` off
+    the crits are rolled and `trials` seeded battles are averaged.
+    """
+    template_team, _ = scenario()
+    names = character_names or [unit.name for unit in template_team]
+    perturbations = [(None, None, 0)]
+    for character in template_team:
+        if character.name not in names:
+            continue
+        rolls = roll_values(character, stats)
+        for stat, roll in zip(stats, rolls):
+            perturbations.append((character.name, stat, (steps or {}).get(stat, float(roll))))
+
+    chunks = [(start, min(start + chunk_size, trials)) for start in range(0, trials, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        damage = np.vstack([run_perturbations(scenario, perturbations, horizon, expected, seed, start, stop, policy)
+                            for start, stop in chunks])
+    else:
+        # Split by perturbation as well as by trial so a single trial still spreads over the pool
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [[executor.submit(run_perturbations, scenario, [perturbation], horizon, expected, seed,
+                                        start, stop, policy) for perturbation in perturbations]
+                       for start, stop in chunks]
+            damage = np.vstack([np.hstack([future.result() for future in row]) for row in futures])
+
+    differences = damage[:, 1:] - damage[:, :1]
+    report = []
+    for column, (name, stat, step) in enumerate(perturbations[1:]):
+        gains = differences[:, column]
+        stderr = float(gains.std(ddof=1) / math.sqrt(len(gains))) if len(gains) > 1 else 0.0
+        report.append(Sensitivity(name, stat, step, float(gains.mean()), stderr))
+    return report
+
+def main():
+    import characters
+    import lorelaiimpact
+    from montecarlo import TeamScenario
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--horizon", type=float, default=1000, help="action value each battle runs for")
+    parser.add_argument("--trials", type=int, default=1)
+    parser.add_argument("--rolled", action="store_true", help="roll crits instead of using expected damage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args()
+
+    scenario = TeamScenario(
+        [characters.shinobu, characters.rosaria, characters.yanfei, characters.gaming],
+        lorelaiimpact.dummies,
+    )
+    report = stat_sensitivity(scenario, args.horizon, trials=args.trials, expected=not args.rolled,
+                              seed=args.seed, workers=args.workers)
+
+    print(f"{'character':<12}{'stat':<16}{'step':>10}{'DMG/step':>14}{'DMG/point':>12}{'stderr':>10}")
+    for entry in report:
+        print(f"{entry.character:<12}{entry.stat.name:<16}{entry.step:>10.4g}{entry.gain:>14,.0f}"
+              f"{entry.per_point:>12,.1f}{entry.stderr:>10,.0f}")
+
+if __name__ == "__main__":
+    main()
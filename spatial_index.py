@@ -0,0 +1,130 @@
+"""Uniform-grid spatial index over units and field objects.
+
+Objects are bucketed by the grid cell their `position` falls in, so radius and
+nearest-neighbour queries only look at nearby cells. All distance checks use
+squared distances. Results come back in insertion order (or, for `nearest`,
+insertion order breaks distance ties) so they match a linear scan over
+`TurnManager.units` / `field_objects`.
+"""
+
+import itertools
+import math
+from collections import defaultdict
+from typing import Callable, Optional
+
+class SpatialGrid:
+    def __init__(self, cell_size: float = 2.0):
+        self.cell_size = cell_size
+        self.cells = defaultdict(dict)  # (cx, cy) -> {id(obj): (seq, obj)}
+        self.locations = {}  # id(obj) -> (cell, seq)
+        self.counter = itertools.count()
+        self.bounds = None  # (min_cx, min_cy, max_cx, max_cy) of every cell ever used
+
+    def cell_of(self, position) -> tuple[int, int]:
+        return self.cell_of_coords(position.x, position.y)
+
+    def cell_of_coords(self, x: float, y: float) -> tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def __contains__(self, obj) -> bool:
+        return id(obj) in self.locations
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def insert(self, obj):
+        """Add `obj`, or re-bucket it if its position changed. Objects without a position are ignored."""
+        position = getattr(obj, "position", None)
+        if position is None:
+            return
+        cell = self.cell_of(position)
+        location = self.locations.get(id(obj))
+        if location is not None:
+            old_cell, seq = location
+            if old_cell == cell:
+                return
+            self.discard_from_cell(old_cell, obj)
+        else:
+            seq = next(self.counter)
+
+        self.cells[cell][id(obj)] = (seq, obj)
+        self.locations[id(obj)] = (cell, seq)
+        cx, cy = cell
+        if self.bounds is None:
+            self.bounds = (cx, cy, cx, cy)
+        else:
+            min_cx, min_cy, max_cx, max_cy = self.bounds
+            self.bounds = (min(min_cx, cx), min(min_cy, cy), max(max_cx, cx), max(max_cy, cy))
+
+    update = insert
+
+    def remove(self, obj):
+        location = self.locations.pop(id(obj), None)
+        if location is not None:
+            self.discard_from_cell(location[0], obj)
+
+    def discard_from_cell(self, cell, obj):
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.pop(id(obj), None)
+            if not bucket:
+                del self.cells[cell]
+
+    def query_radius(self, position, radius: float, predicate: Optional[Callable] = None) -> list:
+        """Every object within `radius` of `position` that passes `predicate`."""
+        radius_sq = radius * radius
+        min_cx, min_cy = self.cell_of_coords(position.x - radius, position.y - radius)
+        max_cx, max_cy = self.cell_of_coords(position.x + radius, position.y + radius)
+
+        found = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = self.cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for seq, obj in bucket.values():
+                    dx = obj.position.x - position.x
+                    dy = obj.position.y - position.y
+                    if dx * dx + dy * dy <= radius_sq and (predicate is None or predicate(obj)):
+                        found.append((seq, obj))
+        found.sort(key=lambda item: item[0])
+        return [obj for _, obj in found]
+
+    def nearest(self, position, predicate: Optional[Callable] = None):
+        """The closest object to `position` passing `predicate`, or None."""
+        if self.bounds is None:
+            return None
+        cx, cy = self.cell_of(position)
+        min_cx, min_cy, max_cx, max_cy = self.bounds
+        max_ring = max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy, 0)
+
+        best = None  # (distance_sq, seq, obj)
+        for ring in range(max_ring + 1):
+            for cell in ring_cells(cx, cy, ring):
+                bucket = self.cells.get(cell)
+                if not bucket:
+                    continue
+                for seq, obj in bucket.values():
+                    if predicate is not None and not predicate(obj):
+                        continue
+                    dx = obj.position.x - position.x
+                    dy = obj.position.y - position.y
+                    candidate = (dx * dx + dy * dy, seq)
+                    if best is None or candidate < best[:2]:
+                        best = (candidate[0], seq, obj)
+            # Cells on the next ring out are at least `ring` cells away
+            reach = ring * self.cell_size
+            if best is not None and best[0] < reach * reach:
+                break
+        return best[2] if best else None
+
+def ring_cells(cx: int, cy: int, ring: int):
+    if ring == 0:
+        yield (cx, cy)
+        return
+    for dx in range(-ring, ring + 1):
+        yield (cx + dx, cy - ring)
+        yield (cx + dx, cy + ring)
+    for dy in range(-ring + 1, ring):
+        yield (cx - ring, cy + dy)
+        yield (cx + ring, cy + dy)
@@ -0,0 +1,140 @@
+"""SPD breakpoint solver.
+
+A unit that is not shifted acts every BASE_TURN_VALUE / SPD action value,
+so the number of turns it gets within an AV budget, and the SPD at which
+it gains one more, follow in closed form. Turn k (k = 1, 2, ...) of a
+schedule falls at
+
+    start + (k - 1 + lead) * BASE_TURN_VALUE / SPD
+
+where `start` is when the unit joined the timeline and `lead` is how many
+cycles pass before its first turn: 1 for a character at the start of a
+battle, a new summon or a new buff timer (whose start then includes
+TurnManager.BUFF_TIMER_DELAY), and 0 for a unit already on a live
+timeline, whose start is its scheduled time. `delay_by_percent` shifts
+add their percent to `lead`. A turn at exactly the budget is counted, as
+rotation_optimizer's horizon does.
+
+Counts are computed in exact rational arithmetic on the given SPD values,
+so they assume SPD does not change during the budget. The turn manager
+adds cycles up in floats, so a turn that lands exactly on the budget can
+fall a rounding error either side of it in a simulated battle.
+
+    python speed_breakpoints.py --horizon 1000 --speed Gaming=140
+"""
+
+import argparse
+import math
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Optional
+
+from core import get_speed
+from turn import BuffTimerUnit, TurnManager, scheduled_turns_left
+
+BASE_TURN_VALUE = TurnManager.BASE_TURN_VALUE
+
+@dataclass
+class UnitSchedule:
+    name: str
+    speed: float
+    start: float = 0  # AV the unit's cycle counts from
+    lead: float = 1  # cycles before its first turn, including delay_by_percent shifts
+    max_turns: Optional[int] = None  # summon duration or buff timer ticks left
+
+@dataclass
+class SpeedReport:
+    name: str
+    speed: float
+    turns: int
+    keep_speed: Optional[Fraction]  # lowest SPD that still gets `turns`; None when any SPD does
+    next_speed: Optional[Fraction]  # SPD needed for one more turn; None when no SPD gets it
+
+def character_schedule(name: str, speed: float, shift: float = 0) -> UnitSchedule:
+    """A character from the start of a battle; `shift` is its net delay_by_percent (negative advances)."""
+    return UnitSchedule(name, speed, 0, 1 + shift)
+
+def summon_schedule(name: str, speed: float, summoned_at: float, duration: Optional[int] = None) -> UnitSchedule:
+    return UnitSchedule(name, speed, summoned_at, 1, None if duration is None else max(duration, 1))
+
+def buff_timer_schedule(name: str, speed: float, applied_at: float, duration: int) -> UnitSchedule:
+    # The timer ticks `duration` times and is removed on the tick that reaches 0
+    return UnitSchedule(name, speed, applied_at + TurnManager.BUFF_TIMER_DELAY, 1, max(duration, 1))
+
+def timeline_schedules(turn_manager: TurnManager) -> list[UnitSchedule]:
+    """Schedules of every unit on a live timeline and every pending buff timer, counting from their next turn or tick."""
+    schedules = []
+    for time, unit in turn_manager.forecast(len(turn_manager.timeline_entries), fast_forward=False):
+        schedules.append(UnitSchedule(unit.name, get_speed(unit), time, 0, scheduled_turns_left(unit)))
+    for time, _, _, timer in turn_manager.timer_wheel.entries():
+        if isinstance(timer, BuffTimerUnit):
+            schedules.append(UnitSchedule(timer.name, get_speed(timer), time, 0, max(timer.buff.remaining_turns, 1)))
+    return schedules
+
+def turns_within(schedule: UnitSchedule, budget: float) -> int:
+    """Turns `schedule` gets at or before `budget` AV."""
+    cycles = (Fraction(budget) - Fraction(schedule.start)) * Fraction(max(1, schedule.speed)) / BASE_TURN_VALUE
+    elapsed = cycles - Fraction(schedule.lead)
+    if elapsed < 0:
+        return 0
+    turns = math.floor(elapsed) + 1
+    return turns if schedule.max_turns is None else min(turns, schedule.max_turns)
+
+def speed_for_turns(schedule: UnitSchedule, budget: float, turns: int) -> Optional[Fraction]:
+    """Lowest SPD at which `schedule` gets at least `turns` turns within `budget`; None if no SPD does."""
+    if turns <= 0:
+        return Fraction(1)
+    if schedule.max_turns is not None and turns > schedule.max_turns:
+        return None
+    cycles = turns - 1 + Fraction(schedule.lead)
+    if cycles <= 0:
+        return Fraction(1) if budget >= schedule.start else None
+    window = Fraction(budget) - Fraction(schedule.start)
+    if window <= 0:
+        return None
+    return max(Fraction(1), BASE_TURN_VALUE * cycles / window)
+
+def breakpoints(schedule: UnitSchedule, budget: float, max_turns: int) -> list[tuple[int, Fraction]]:
+    """(turns, lowest SPD for that many turns) for 1..`max_turns` turns, stopping at the first unreachable count."""
+    result = []
+    for turns in range(1, max_turns + 1):
+        speed = speed_for_turns(schedule, budget, turns)
+        if speed is None:
+            break
+        result.append((turns, speed))
+    return result
+
+def speed_report(schedules: list[UnitSchedule], budget: float) -> list[SpeedReport]:
+    report = []
+    for schedule in schedules:
+        turns = turns_within(schedule, budget)
+        keep = speed_for_turns(schedule, budget, turns) if turns else None
+        report.append(SpeedReport(
+            schedule.name, schedule.speed, turns,
+            None if keep == 1 else keep,
+            speed_for_turns(schedule, budget, turns + 1),
+        ))
+    return report
+
+def main():
+    import characters
+    import lorelaiimpact
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--horizon", type=float, default=1000, help="action value budget")
+    parser.add_argument("--speed", nargs="*", default=[], metavar="NAME=SPD", help="override a unit's SPD")
+    args = parser.parse_args()
+
+    overrides = {name: float(value) for name, value in (item.split("=") for item in args.speed)}
+    units = [characters.shinobu, characters.rosaria, characters.yanfei, characters.gaming] + lorelaiimpact.dummies
+    schedules = [character_schedule(unit.name, overrides.get(unit.name, get_speed(unit))) for unit in units]
+
+    print(f"Turns within {args.horizon:g} AV:")
+    print(f"{'unit':<12}{'SPD':>8}{'turns':>7}{'keep at':>10}{'next at':>10}")
+    for entry in speed_report(schedules, args.horizon):
+        keep = f"{float(entry.keep_speed):.2f}" if entry.keep_speed is not None else "-"
+        next_speed = f"{float(entry.next_speed):.2f}" if entry.next_speed is not None else "-"
+        print(f"{entry.name:<12}{entry.speed:>8g}{entry.turns:>7}{keep:>10}{next_speed:>10}")
+
+if __name__ == "__main__":
+    main()
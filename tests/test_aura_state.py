@@ -0,0 +1,45 @@
+import random
+
+from aura_state import AuraStore, apply_aura_transition, aura_transition, freeze_auras
+from core import Character, Element, create_aura
+
+HIT_ELEMENTS = [element for element in Element if element is not Element.PHYSICAL]
+
+def random_hits(rng, count):
+    return [(rng.choice(HIT_ELEMENTS), rng.choice([1.0, 1.0, 2.0])) for _ in range(count)]
+
+def test_cached_transitions_match_uncached():
+    rng = random.Random(0)
+    aura_transition.cache_clear()
+    for _ in range(200):
+        state = ()
+        for element, units in random_hits(rng, 8):
+            expected = aura_transition.__wrapped__(state, element, units)
+            assert aura_transition(state, element, units) == expected
+            assert aura_transition(state, element, units) == expected  # served from the cache
+            state = expected.state
+    assert aura_transition.cache_info().hits > 0
+
+def test_store_and_list_follow_the_same_transitions():
+    rng = random.Random(1)
+    for _ in range(200):
+        stored = Character("Stored", {}, Element.PHYSICAL)
+        listed = Character("Listed", {}, Element.PHYSICAL)
+        listed.auras = []
+        assert isinstance(stored.auras, AuraStore)
+        for element, units in random_hits(rng, 8):
+            store_transition, _ = apply_aura_transition(stored, element, units)
+            list_transition, _ = apply_aura_transition(listed, element, units)
+            assert store_transition == list_transition
+            assert stored.auras.state_key() == freeze_auras(listed.auras)
+            if rng.random() < 0.3:
+                stored.decay_auras()
+                listed.decay_auras()
+                assert stored.auras.state_key() == freeze_auras(listed.auras)
+
+def test_source_elements_freeze_the_same_way():
+    plain = create_aura("PYRO", Element.PYRO)
+    assert plain.source_elements is None
+    store = AuraStore.from_auras([plain])
+    assert store.state_key() == freeze_auras([plain])
+    assert store[0].source_elements == frozenset()
@@ -0,0 +1,50 @@
+import itertools
+import random
+
+import pytest
+
+from combat_helpers import HitOutcome
+from damage_distribution import damage_distribution, record_rotation
+
+def brute_force(hits):
+    """{total: probability} over every crit / no-crit combination."""
+    totals = {}
+    for crits in itertools.product((False, True), repeat=len(hits)):
+        probability = 1.0
+        total = 0
+        for hit, crit in zip(hits, crits):
+            probability *= hit.crit_rate if crit else 1 - hit.crit_rate
+            total += hit.crit_damage if crit else hit.damage
+        totals[total] = totals.get(total, 0.0) + probability
+    return totals
+
+def test_matches_enumeration_on_integer_bins():
+    rng = random.Random(0)
+    for _ in range(30):
+        hits = []
+        for _ in range(rng.randint(1, 9)):
+            damage = rng.randint(0, 50)
+            hits.append(HitOutcome(None, None, damage, damage + rng.randint(0, 40), rng.choice([0.0, 0.05, 0.5, 1.0])))
+        distribution = damage_distribution(hits, bin_width=1)
+        exact = brute_force(hits)
+        for value, probability in zip(distribution.values, distribution.probabilities):
+            assert probability == pytest.approx(exact.get(round(value), 0.0), abs=1e-12)
+        assert distribution.probabilities.sum() == pytest.approx(1.0)
+        threshold = rng.randint(0, 300)
+        assert distribution.kill_probability(threshold) == pytest.approx(
+            sum(p for total, p in exact.items() if total >= threshold), abs=1e-9)
+
+def test_wide_bins_keep_the_mean():
+    rng = random.Random(1)
+    hits = [HitOutcome(None, None, 1000 * rng.random(), 3000 * rng.random() + 1000, rng.random()) for _ in range(200)]
+    expected = sum(hit.damage + hit.crit_rate * (hit.crit_damage - hit.damage) for hit in hits)
+    for max_bins in (64, 1024):
+        assert damage_distribution(hits, max_bins=max_bins).mean() == pytest.approx(expected, rel=1e-9)
+
+@pytest.mark.parametrize("team", ["gaming_team", "furina_team"])
+def test_mean_matches_expected_mode_damage(team, request):
+    player_team, enemy_team = request.getfixturevalue(team)()
+    hits = [hit for hit in record_rotation(player_team, enemy_team, 60) if hit.target in enemy_team]
+    dealt = sum(enemy.max_hp - enemy.current_hp for enemy in enemy_team)
+    # Expected mode rounds each hit's expected damage; the distribution does not
+    assert abs(damage_distribution(hits).mean() - dealt) <= len(hits)
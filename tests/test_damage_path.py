@@ -0,0 +1,27 @@
+import copy
+
+import pytest
+
+from core import DamageInstance, Element, StatType
+from damage_distribution import record_rotation
+from elemental_enums import DamageType
+
+def test_damage_instances_are_immutable_and_shared():
+    instance = DamageInstance(1.0, StatType.ATK, DamageType.NORMAL_ATTACK, element=Element.PYRO)
+    with pytest.raises(AttributeError):
+        instance.multiplier = 2.0
+    with pytest.raises(AttributeError):
+        del instance.multiplier
+    assert copy.copy(instance) is instance
+    assert copy.deepcopy(instance) is instance
+
+@pytest.mark.parametrize("team", ["gaming_team", "furina_team"])
+def test_every_hit_is_applied_once(team, request):
+    # Each hit through calculate_damage records one outcome; in expected mode it deals its
+    # expected value, rounded, so the HP the dummies lost must match the outcomes hit for hit
+    player_team, enemy_team = request.getfixturevalue(team)()
+    hits = [hit for hit in record_rotation(player_team, enemy_team, 60) if hit.target in enemy_team]
+    expected = sum(hit.damage + hit.crit_rate * (hit.crit_damage - hit.damage) for hit in hits)
+    lost = sum(enemy.max_hp - enemy.current_hp for enemy in enemy_team)
+    assert hits
+    assert abs(lost - expected) <= len(hits)
@@ -0,0 +1,49 @@
+from combat import heal, take_damage
+from core import Character, Element, Passive, StatType
+from engine import run_battle
+from event_system import coalesced_hp_changes
+
+def watched_team():
+    """Two characters and the on_hp_change events a per-hit and a per-action passive on the first one see."""
+    seen = {"hit": [], "action": []}
+    team = [Character(name, {StatType.HP: 1000}, Element.PYRO) for name in ("A", "B")]
+    for delivery in seen:
+        def record(observer, event, log=seen[delivery]):
+            log.append((event.unit.name, event.old_hp, event.new_hp))
+        team[0].add_passive(Passive(delivery, "", "on_hp_change", record, delivery=delivery))
+    return team, seen
+
+def play_action(team):
+    first, second = team
+    take_damage(first, 100, team=team)
+    take_damage(second, 50, team=team)
+    take_damage(first, 30, team=team)
+    heal(first, 20, team=team)
+    take_damage(second, 10, team=team)
+    heal(second, 60, team=team)  # back where it started
+
+def test_action_subscribers_get_one_net_change_per_unit():
+    team, seen = watched_team()
+    with coalesced_hp_changes():
+        play_action(team)
+        assert seen["action"] == []
+    assert seen["action"] == [("A", 1000, 890)]
+
+    reference_team, reference = watched_team()
+    play_action(reference_team)
+    assert seen["hit"] == reference["hit"] == reference["action"]
+    assert len(seen["hit"]) == 6
+
+def test_disabled_block_delivers_every_change():
+    team, seen = watched_team()
+    with coalesced_hp_changes(False):
+        play_action(team)
+    assert seen["action"] == seen["hit"]
+    assert len(seen["action"]) == 6
+
+def test_coalescing_without_action_subscribers_changes_nothing(gaming_team):
+    player_team, enemy_team = gaming_team()
+    plain = run_battle(player_team, enemy_team, max_turns=60, expected_damage=True)
+    player_team, enemy_team = gaming_team()
+    coalesced = run_battle(player_team, enemy_team, max_turns=60, expected_damage=True, coalesce_hp_changes=True)
+    assert plain == coalesced
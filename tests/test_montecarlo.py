@@ -0,0 +1,23 @@
+import random
+
+from engine import run_battle
+from montecarlo import MonteCarloSummary, run_monte_carlo, trial_seed
+
+def test_summary_does_not_depend_on_workers_or_chunks(gaming_team):
+    serial = run_monte_carlo(gaming_team, 6, seed=3, max_turns=40, workers=1, chunk_size=4)
+    pooled = run_monte_carlo(gaming_team, 6, seed=3, max_turns=40, workers=2, chunk_size=2)
+    assert serial == pooled
+    assert serial.trials == 6
+
+def test_summary_matches_trials_run_one_by_one(gaming_team):
+    expected = MonteCarloSummary()
+    for index in range(4):
+        random.seed(trial_seed(5, index))
+        player_team, enemy_team = gaming_team()
+        expected.add_result(run_battle(player_team, enemy_team, max_turns=40))
+    assert run_monte_carlo(gaming_team, 4, seed=5, max_turns=40, workers=1) == expected
+
+def test_seed_changes_the_rolls(gaming_team):
+    first = run_monte_carlo(gaming_team, 3, seed=0, max_turns=40, workers=1)
+    second = run_monte_carlo(gaming_team, 3, seed=1, max_turns=40, workers=1)
+    assert first.damage_dealt != second.damage_dealt
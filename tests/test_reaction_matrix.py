@@ -0,0 +1,43 @@
+import random
+
+from core import Aura, AuraTag, Element
+from reaction_logic import QUICKEN_REACTIONS, REACTION_TABLE, check_reaction, check_reactions_bulk
+
+def reference_check_reaction(new_element, auras):
+    """check_reaction before the matrix: two dict lookups per pair, composite sources in Element order."""
+    if new_element == Element.QUANTUM:
+        for aura in auras:
+            if aura.tags:
+                return "Superposition", aura
+    if new_element in QUICKEN_REACTIONS and any(aura.name == "Quicken" for aura in auras):
+        return QUICKEN_REACTIONS[new_element], "Quicken"
+    for aura in auras:
+        for element in sorted(aura.source_elements or {aura.element}, key=lambda e: e.value):
+            reaction = REACTION_TABLE.get((new_element, element)) or REACTION_TABLE.get((element, new_element))
+            if reaction:
+                return reaction, aura
+    return None, None
+
+def random_aura_sets(rng, count):
+    elements = list(Element)
+    sets = []
+    for _ in range(count):
+        auras = []
+        for _ in range(rng.randint(0, 3)):
+            tags = {rng.choice(list(AuraTag))} if rng.random() < 0.3 else set()
+            auras.append(Aura(rng.choice(["Quicken", "PYRO", "Frozen"]), rng.choice(elements),
+                              source_elements=set(rng.sample(elements, rng.randint(0, 3))), tags=tags))
+        sets.append(auras)
+    return sets
+
+def test_check_reaction_matches_reference():
+    rng = random.Random(0)
+    for auras in random_aura_sets(rng, 300):
+        for element in Element:
+            assert check_reaction(element, auras) == reference_check_reaction(element, auras)
+
+def test_bulk_matches_check_reaction():
+    rng = random.Random(1)
+    sets = random_aura_sets(rng, 200)
+    queries = [(rng.choice(list(Element)), rng.choice(sets)) for _ in range(5000)]
+    assert check_reactions_bulk(queries) == [check_reaction(element, auras) for element, auras in queries]
@@ -0,0 +1,23 @@
+from rotation_optimizer import (SearchNode, ScriptedPolicy, advance_to_decision, enemy_damage_taken, expand,
+                                optimize_rotation, quiet_output, replay_damage, start_battle)
+
+HORIZON = 200  # small enough to enumerate every rotation
+
+def best_by_enumeration(scenario, horizon: float) -> int:
+    def best(node):
+        if node.actor is None:
+            return enemy_damage_taken(node.state)
+        return max(best(child) for child in expand(node, horizon))
+    with quiet_output(False):
+        state = start_battle(scenario)
+        return best(SearchNode(state, advance_to_decision(state, horizon), []))
+
+def test_unbounded_beam_finds_the_best_rotation(gaming_team):
+    exhaustive = best_by_enumeration(gaming_team, HORIZON)
+    assert optimize_rotation(gaming_team, HORIZON, beam_width=10**6, workers=1).damage == exhaustive
+    assert optimize_rotation(gaming_team, HORIZON, beam_width=10**6, workers=1, table_size=0).damage == exhaustive
+
+def test_replaying_a_rotation_deals_its_reported_damage(gaming_team):
+    rotation = optimize_rotation(gaming_team, 600, beam_width=4, workers=1)
+    assert rotation.decisions
+    assert replay_damage(gaming_team, ScriptedPolicy(rotation.decisions), 600) == rotation.damage
@@ -0,0 +1,42 @@
+import random
+
+from core import Position
+from spatial_index import SpatialGrid
+
+class Thing:
+    def __init__(self, name: str, position: Position):
+        self.name = name
+        self.position = position
+
+def distance_sq(obj, position) -> float:
+    return (obj.position.x - position.x) ** 2 + (obj.position.y - position.y) ** 2
+
+def test_queries_match_linear_scan():
+    rng = random.Random(0)
+    for cell_size in (0.5, 2.0, 7.0):
+        grid = SpatialGrid(cell_size)
+        live = []  # insertion order, which is the order a linear scan sees
+        things = [Thing(f"t{i}", Position(0, 0)) for i in range(40)]
+        for step in range(1500):
+            thing = rng.choice(things)
+            op = rng.random()
+            if op < 0.4:
+                thing.position = Position(rng.randint(-15, 15), rng.randint(-15, 15))
+                grid.insert(thing)
+                if thing not in live:
+                    live.append(thing)
+            elif op < 0.5:
+                grid.remove(thing)
+                if thing in live:
+                    live.remove(thing)
+            else:
+                center = Position(rng.randint(-20, 20), rng.randint(-20, 20))
+                radius = rng.choice([0, 1, 1.5, 3, 10, 40])
+                predicate = rng.choice([None, lambda obj: obj.name.endswith(("1", "3", "5"))])
+                expected = [obj for obj in live if distance_sq(obj, center) <= radius * radius
+                            and (predicate is None or predicate(obj))]
+                assert grid.query_radius(center, radius, predicate) == expected
+                candidates = [obj for obj in live if predicate is None or predicate(obj)]
+                nearest = min(candidates, key=lambda obj: distance_sq(obj, center), default=None)
+                assert grid.nearest(center, predicate) is nearest
+            assert len(grid) == len(live)
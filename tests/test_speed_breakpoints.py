@@ -0,0 +1,106 @@
+import dataclasses
+import random
+from fractions import Fraction
+
+from core import Summon
+from speed_breakpoints import (BASE_TURN_VALUE, buff_timer_schedule, character_schedule, speed_for_turns,
+                               summon_schedule, timeline_schedules, turns_within)
+from turn import Buff, TurnManager
+
+class Unit:
+    def __init__(self, name: str, speed: float):
+        self.name = name
+        self.spd = speed
+        self.buffs = []
+
+    def get_stat(self, stat):
+        return self.spd
+
+    def set_buffs(self, buffs: list):
+        self.buffs = buffs
+
+def on_boundary(schedule, budget: float) -> bool:
+    """Whether a turn lands exactly on the budget, where the float timeline may fall either side."""
+    elapsed = (Fraction(budget) - Fraction(schedule.start)) * Fraction(schedule.speed) / BASE_TURN_VALUE - Fraction(schedule.lead)
+    return abs(elapsed - round(elapsed)) < 1e-9
+
+def simulate(turn_manager: TurnManager, budget: float, limits: dict, counts: dict):
+    """Play turns up to `budget`, counting them per unit and taking summons off after `limits` turns."""
+    while True:
+        upcoming = turn_manager.peek_timeline()
+        if upcoming is None or upcoming[0] > budget:
+            break
+        unit = turn_manager.next_turn()
+        counts[unit.name] = counts.get(unit.name, 0) + 1
+        if counts[unit.name] >= limits.get(unit.name, float("inf")):
+            turn_manager.unschedule(unit)
+    turn_manager.run_timers(budget)
+
+def assert_counts(schedules, budget: float, counts: dict):
+    for schedule in schedules:
+        expected = turns_within(schedule, budget)
+        got = counts.get(schedule.name, 0)
+        assert expected == got or (abs(expected - got) == 1 and on_boundary(schedule, budget)), (schedule, got)
+
+def random_speed(rng: random.Random) -> float:
+    return rng.choice([rng.randint(60, 180), round(rng.uniform(60, 180), 1)])
+
+def test_turns_within_matches_a_simulated_timeline():
+    for trial in range(200):
+        rng = random.Random(trial)
+        units = [Unit(f"u{i}", random_speed(rng)) for i in range(4)]
+        turn_manager = TurnManager(units)
+        turn_manager.display = False
+        budget = rng.choice([500, 1000, 1234.5, 2000])
+        shift = rng.choice([-0.6, -0.25, 0.25, 0.6])
+        turn_manager.delay_by_percent(units[0], shift)
+        schedules = [character_schedule(units[0].name, units[0].spd, shift)]
+        schedules += [character_schedule(unit.name, unit.spd) for unit in units[1:]]
+
+        counts = {}
+        joined_at = rng.uniform(0, 300)
+        simulate(turn_manager, joined_at, {}, counts)
+        turn_manager.time = joined_at
+        summon = Summon("Summon", units[1], {}, 10, {}, duration=3, speed=rng.randint(70, 150))
+        turn_manager.add_summon(summon)
+        buff = Buff("Buff", "", duration=4)
+        timer_speed = rng.randint(40, 120)
+        turn_manager.add_buff_timer(buff, units[1], speed=timer_speed)
+        schedules.append(summon_schedule(summon.name, summon.speed, joined_at, 3))
+        schedules.append(buff_timer_schedule("Buff Timer", timer_speed, joined_at, 4))
+
+        simulate(turn_manager, budget, {summon.name: 3}, counts)
+        counts["Buff Timer"] = 4 - max(buff.remaining_turns, 0)
+        assert_counts(schedules, budget, counts)
+
+def test_timeline_schedules_count_from_the_next_turn():
+    for trial in range(100):
+        rng = random.Random(trial)
+        units = [Unit(f"u{i}", random_speed(rng)) for i in range(4)]
+        turn_manager = TurnManager(units)
+        turn_manager.display = False
+        now = rng.uniform(0, 400)
+        simulate(turn_manager, now, {}, {})
+        turn_manager.time = now
+        budget = now + rng.uniform(100, 1500)
+        schedules = timeline_schedules(turn_manager)
+        counts = {}
+        simulate(turn_manager, budget, {}, counts)
+        assert_counts(schedules, budget, counts)
+
+def test_speed_for_turns_is_the_lowest_speed():
+    rng = random.Random(0)
+    schedules = [character_schedule("c", 0, rng.choice([0, 0.3, -0.4])) for _ in range(20)]
+    schedules += [summon_schedule("s", 0, rng.uniform(0, 500), 3) for _ in range(20)]
+    schedules += [buff_timer_schedule("b", 0, rng.uniform(0, 500), 2) for _ in range(20)]
+    for schedule in schedules:
+        budget = rng.choice([300, 1000, 1234.5])
+        for turns in range(1, 8):
+            speed = speed_for_turns(schedule, budget, turns)
+            if speed is None:
+                assert schedule.max_turns is not None and turns > schedule.max_turns or budget <= schedule.start
+                continue
+            assert turns_within(dataclasses.replace(schedule, speed=speed), budget) >= turns
+            if speed > 1:
+                below = dataclasses.replace(schedule, speed=speed - Fraction(1, 10**9))
+                assert turns_within(below, budget) < turns
@@ -0,0 +1,57 @@
+import random
+
+from timer_wheel import TimerWheel
+from turn import Buff, TurnManager
+
+def ignore(owner, arg):
+    pass
+
+class Owner:
+    def __init__(self):
+        self.buffs = []
+
+    def set_buffs(self, buffs: list):
+        self.buffs = buffs
+
+def test_wheel_fires_like_a_sorted_list():
+    for trial in range(100):
+        rng = random.Random(trial)
+        wheel = TimerWheel(rng.choice([1.0, 0.5, 7.0, 0.01]))
+        reference = {}  # handle -> (time, handle)
+        now = 0.0
+        for _ in range(200):
+            op = rng.random()
+            if op < 0.5:
+                time = now + rng.choice([0, rng.uniform(0, 100), rng.uniform(0, 1e5), rng.uniform(0, 3e7)])
+                handle = wheel.schedule(time, ignore)
+                reference[handle] = (time, handle)
+            elif op < 0.6 and reference:
+                handle = rng.choice(list(reference))
+                assert wheel.cancel(handle)
+                assert not wheel.cancel(handle)
+                del reference[handle]
+            else:
+                until = now + rng.choice([0, rng.uniform(0, 200), rng.uniform(0, 2e6)])
+                fired = []
+                for time, handle, _, _ in wheel.expire(until):
+                    assert reference.pop(handle) == (time, handle)
+                    fired.append((time, handle))
+                    if rng.random() < 0.2:  # a callback scheduling another timer
+                        later = time + rng.uniform(0, until - time + 50)
+                        new_handle = wheel.schedule(later, ignore)
+                        reference[new_handle] = (later, new_handle)
+                assert fired == sorted(fired)
+                assert all(time > until for time, _ in reference.values())
+                now = until
+            assert len(wheel) == len(reference)
+            assert [entry[:2] for entry in wheel.entries()] == sorted(reference.values())
+
+def test_buff_timers_tick_until_they_expire():
+    turn_manager = TurnManager([])
+    buffs = [Buff(f"b{i}", "", duration=duration) for i, duration in enumerate((1, 3, 5))]
+    for buff in buffs:
+        turn_manager.add_buff_timer(buff, Owner())
+    turn_manager.run_timers(400)  # ticks at 150, 250 and 350 AV
+    assert [buff.remaining_turns for buff in buffs] == [0, 0, 2]
+    assert [timer.buff for timer in turn_manager.buff_timers] == [buffs[2]]
+    assert len(turn_manager.timer_wheel) == 1
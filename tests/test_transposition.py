@@ -0,0 +1,61 @@
+import transposition
+from rotation_optimizer import (SearchNode, advance_to_decision, expand, feasible_decisions, optimize_rotation,
+                                play_decision, quiet_output, start_battle)
+from transposition import TranspositionTable, fast_state_hash, state_key
+
+def searched_states(scenario, depth: int = 6, width: int = 40) -> list:
+    """States reached by expanding the first `width` nodes of each level, transpositions included."""
+    with quiet_output(False):
+        state = start_battle(scenario)
+        frontier = [SearchNode(state, advance_to_decision(state, 1000), [])]
+        states = []
+        for _ in range(depth):
+            children = [child for node in frontier if node.actor is not None for child in expand(node, 1000)]
+            states.extend(child.state for child in children)
+            frontier = children[:width]
+    return states
+
+def test_keys_equal_across_fork_and_differ_after_a_move(furina_team):
+    with quiet_output(False):
+        state = start_battle(furina_team)
+        actor = advance_to_decision(state, 1000)
+        for _ in range(6):
+            actor = play_decision(state, feasible_decisions(actor)[-1], 1000)
+        fork = state.fork()
+        assert state_key(fork) == state_key(state)
+        assert fast_state_hash(fork) == fast_state_hash(state)
+        play_decision(fork, feasible_decisions(advance_to_decision(fork, 1000))[0], 1000)
+    assert state_key(fork) != state_key(state)
+    assert fast_state_hash(fork) != fast_state_hash(state)
+
+def test_fast_hash_is_equal_whenever_keys_are(gaming_team):
+    for hp_bucket in (1, 1000):
+        states = searched_states(gaming_team)
+        hashes = {}
+        for state in states:
+            key = state_key(state, hp_bucket)
+            assert hashes.setdefault(key, fast_state_hash(state, hp_bucket)) == fast_state_hash(state, hp_bucket)
+        assert 100 < len(hashes) < len(states)  # some states were reached twice
+        assert len(set(hashes.values())) == len(hashes)
+
+def test_table_only_matches_equal_keys(gaming_team, monkeypatch):
+    states = searched_states(gaming_team, depth=3)
+    # Every state on one hash: each lookup has to fall back to the full keys
+    monkeypatch.setattr(transposition, "fast_state_hash", lambda state, hp_bucket=1: 0)
+    table = TranspositionTable(retain=8)
+    reference = {}
+    for value, state in enumerate(states):
+        key = state_key(state)
+        assert table.lookup(state) == reference.get(key)
+        table.record(state, value)
+        reference[key] = value
+    assert len(table) == len(reference)
+    assert table.collisions > 0
+
+def test_search_results_do_not_depend_on_the_hash(gaming_team, monkeypatch):
+    expected = optimize_rotation(gaming_team, 600, beam_width=8, workers=1, table_size=0)
+    pruned = optimize_rotation(gaming_team, 600, beam_width=8, workers=1)
+    monkeypatch.setattr(transposition, "fast_state_hash", lambda state, hp_bucket=1: 0)
+    colliding = optimize_rotation(gaming_team, 600, beam_width=8, workers=1)
+    assert pruned == colliding
+    assert pruned.damage == expected.damage
@@ -0,0 +1,35 @@
+import random
+
+from turn import TurnManager
+
+class Unit:
+    def __init__(self, name: str):
+        self.name = name
+
+def test_timeline_matches_sorted_reference():
+    rng = random.Random(0)
+    units = [Unit(f"u{i}") for i in range(12)]
+    turn_manager = TurnManager([])
+    reference = {}  # unit -> (time, order)
+    for step in range(5000):
+        op = rng.random()
+        if op < 0.5:
+            unit = rng.choice(units)
+            time = rng.choice([rng.uniform(0, 1000), float(rng.randint(0, 20))])
+            order = rng.choice([None, rng.randint(0, 5)])
+            turn_manager.schedule(unit, time, order=order)
+            entry = turn_manager.timeline_entries[id(unit)]
+            reference[unit] = (time, entry[1])
+        elif op < 0.7:
+            unit = rng.choice(units)
+            assert turn_manager.unschedule(unit) == (unit in reference)
+            reference.pop(unit, None)
+        elif reference:
+            expected = min(reference.items(), key=lambda item: (item[1], turn_manager.timeline_entries[id(item[0])][2]))
+            assert turn_manager.peek_timeline()[2] is expected[0]
+            time, order, unit = turn_manager.pop_timeline()
+            assert unit is expected[0] and (time, order) == expected[1]
+            del reference[unit]
+        live = sorted((time, order, unit.name) for time, order, unit in turn_manager.iter_timeline())
+        assert live == sorted((time, order, unit.name) for unit, (time, order) in reference.items())
+    assert len(turn_manager.timeline) <= 2 * len(reference) + 40
@@ -0,0 +1,118 @@
+"""Hierarchical timer wheel keyed on action value.
+
+Timers are (time, handle, callback, arg) entries. Times are cut into ticks
+of `resolution` AV. Level 0 has one slot per tick for the next 64 ticks.
+Each level above covers 64 times the span of the one below, and the last
+level spills into an overflow list. A timer sits in the level of the
+highest base-64 digit where its tick differs from the current tick. When
+the current tick reaches the start of that slot's range, the timer is
+cascaded down a level. Scheduling and cancelling are O(1). Advancing skips
+spans the wheel holds nothing for. Timers that fall in the same tick fire
+in (time, handle) order, so a timer fires in time order and ties go to the
+one scheduled first.
+"""
+
+import heapq
+from typing import Callable
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+LEVELS = 4
+
+class TimerWheel:
+    def __init__(self, resolution: float = 1.0):
+        self.resolution = resolution
+        self.tick = 0  # every timer in an earlier tick has fired
+        self.levels = [[[] for _ in range(SLOTS)] for _ in range(LEVELS)]
+        self.counts = [0] * LEVELS  # entries per level, cancelled ones included
+        self.overflow = []
+        self.due = []  # heap of the entries whose tick has been reached
+        self.pending = {}  # handle -> live entry; an entry missing here was cancelled
+        self.next_handle = 0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def schedule(self, time: float, callback: Callable, arg=None) -> int:
+        """Call callback(owner, arg) at `time` AV, where `owner` is whoever runs expire(). Returns a handle for cancel()."""
+        handle = self.next_handle
+        self.next_handle += 1
+        entry = (time, handle, callback, arg)
+        self.pending[handle] = entry
+        self.place(entry)
+        return handle
+
+    def cancel(self, handle: int) -> bool:
+        """Drop a pending timer. Returns False if it already fired or was cancelled."""
+        return self.pending.pop(handle, None) is not None
+
+    def entries(self) -> list[tuple]:
+        """Pending (time, handle, callback, arg) entries in the order they will fire."""
+        return sorted(self.pending.values(), key=lambda entry: entry[:2])
+
+    def place(self, entry: tuple):
+        tick = max(int(entry[0] // self.resolution), self.tick)
+        if tick == self.tick:
+            heapq.heappush(self.due, entry)
+            return
+        level = ((tick ^ self.tick).bit_length() - 1) // SLOT_BITS
+        if level >= LEVELS:
+            self.overflow.append(entry)
+            return
+        self.levels[level][(tick >> (SLOT_BITS * level)) & (SLOTS - 1)].append(entry)
+        self.counts[level] += 1
+
+    def next_tick(self, target: int) -> int:
+        """The next tick, no later than `target`, at which a timer may fall due or cascade."""
+        for level in range(LEVELS):
+            if self.counts[level]:
+                shift = SLOT_BITS * level
+                return min(((self.tick >> shift) + 1) << shift, target)
+        if self.overflow:
+            shift = SLOT_BITS * LEVELS
+            return min(((self.tick >> shift) + 1) << shift, target)
+        return target
+
+    def cascade(self):
+        """Move the timers whose slot range starts at the current tick down towards level 0."""
+        tick = self.tick
+        for level in range(LEVELS, 0, -1):
+            shift = SLOT_BITS * level
+            if tick & ((1 << shift) - 1):
+                continue
+            if level == LEVELS:
+                entries, self.overflow = self.overflow, []
+            else:
+                slots = self.levels[level]
+                slot = (tick >> shift) & (SLOTS - 1)
+                entries, slots[slot] = slots[slot], []
+                self.counts[level] -= len(entries)
+            for entry in entries:
+                if self.pending.get(entry[1]) is entry:
+                    self.place(entry)
+        slots = self.levels[0]
+        slot = tick & (SLOTS - 1)
+        entries, slots[slot] = slots[slot], []
+        self.counts[0] -= len(entries)
+        for entry in entries:
+            if self.pending.get(entry[1]) is entry:
+                heapq.heappush(self.due, entry)
+
+    def expire(self, until: float):
+        """Yield (time, handle, callback, arg) for every timer at or before `until`, in firing order.
+
+        Timers scheduled while iterating are yielded too if they fall at or
+        before `until`.
+        """
+        target = int(until // self.resolution)
+        while True:
+            due = self.due
+            while due and due[0][0] <= until:
+                entry = heapq.heappop(due)
+                if self.pending.get(entry[1]) is entry:
+                    del self.pending[entry[1]]
+                    yield entry
+            if self.tick >= target:
+                return
+            self.tick = self.next_tick(target)
+            self.cascade()
@@ -0,0 +1,224 @@
+"""Canonical battle-state keys and a bounded transposition table.
+
+`state_key` reduces a battle to a tuple that is equal for two battles that
+will play out the same from here, however they got there:
+
+- the current action value, and the timeline as an ordered list of who
+  acts next and how far ahead (the raw tie-break counters differ between
+  branches, so only their order is kept);
+- per character: HP (optionally bucketed), auras (as aura_state freezes
+  them), buffs, stat modifiers and derived stats, cooldowns, ICD hit
+  counters, energy, combo index, form, and any ad-hoc scalar attributes
+  such as fanfare_points;
+- summons and Dendro Cores, and the pending buff timers on the timer
+  wheel (by how far ahead they fire).
+
+Units are named rather than identified, so keys compare across forks of
+the same battle. `Character`'s own hash only covers name, element, level and
+position, so it cannot stand in for this.
+
+Building that key walks every unit, so `fast_state_hash` gives a cheap
+hash that is equal whenever the keys are, from Zobrist-style parts the
+battle keeps up as it changes: each character's `stat_hash` (updated in
+recompute_stat) and `buff_hash` (add_buff / set_buffs), each AuraStore's
+cached state hash (updated on aura transitions) and the turn manager's
+`timeline_hash` (schedule / unschedule / pop_timeline). HP (whose bucket
+size is a parameter), combo index, cooldowns and energy are small enough to
+hash when asked for. ICD counters, summons, timers and the like are left to
+the full key.
+
+`TranspositionTable` maps states to a search's result, keyed by the fast
+hash, and evicts the least recently used hash once it is full. Two states
+only count as the same once their full keys match; a stored state's key is
+built only when another state lands on its hash.
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import fields
+
+from aura_state import freeze_auras
+from core import Character, Summon
+from dendro_core import DendroCore
+from turn import BuffTimerUnit
+
+CHARACTER_FIELDS = frozenset(f.name for f in fields(Character)) | {"team", "turn_manager"}
+SCALAR_TYPES = (bool, int, float, str)
+
+def aura_key(auras) -> tuple:
+    return freeze_auras(auras) if isinstance(auras, list) else auras.state_key()
+
+def buff_key(buff) -> tuple:
+    source = getattr(buff.source, "name", None)
+    return (buff.name, buff.remaining_turns, buff.applied, source)
+
+def extra_attributes(unit) -> tuple:
+    """Scalar attributes set on a character outside its dataclass fields (fanfare_points, revelry_active...)."""
+    return tuple(sorted(
+        (name, value) for name, value in vars(unit).items()
+        if name not in CHARACTER_FIELDS and isinstance(value, SCALAR_TYPES)
+    ))
+
+def hp_key(hp: int, hp_bucket: int) -> int:
+    return hp if hp_bucket <= 1 else hp // hp_bucket
+
+def character_key(unit: Character, hp_bucket: int = 1) -> tuple:
+    return (
+        unit.name,
+        hp_key(unit.current_hp, hp_bucket),
+        (unit.position.x, unit.position.y) if unit.position else None,
+        aura_key(unit.auras),
+        tuple(buff_key(buff) for buff in unit.buffs),
+        tuple(sorted((stat.value, value) for stat, value in unit.stats.items())),
+        tuple(sorted(unit.cooldowns.items())),
+        tuple(sorted((str(kind), amount) for kind, amount in unit.energy_pool.items())),
+        unit.combo_index,
+        unit.current_form,
+        unit.frozen,
+        unit.general_dmg_bonus,
+        unit.dmg_reduction_taken,
+        tuple(sorted((element.value, res) for element, res in unit.resistances.items())),
+        tuple(sorted((defender.name, tag, tracker.hit_counter) for (defender, tag), tracker in unit.icd_trackers.items())),
+        extra_attributes(unit),
+    )
+
+def unit_key(unit, hp_bucket: int = 1) -> tuple:
+    if isinstance(unit, Character):
+        return character_key(unit, hp_bucket)
+    if isinstance(unit, Summon):
+        return ("summon", unit.name, unit.owner.name, unit.current_hp, unit.remaining_duration, unit.frozen)
+    return (type(unit).__name__, getattr(unit, "name", None))
+
+def timer_key(arg) -> tuple:
+    if isinstance(arg, BuffTimerUnit):
+        return ("timer", arg.owner.name, buff_key(arg.buff))
+    return (type(arg).__name__, getattr(arg, "name", None))
+
+def field_object_key(obj) -> tuple:
+    if isinstance(obj, DendroCore):
+        return ("Dendro Core", obj.creator.name, obj.position.x, obj.position.y, obj.turns_remaining, obj.active)
+    return (type(obj).__name__, getattr(obj, "name", None))
+
+def state_key(state, hp_bucket: int = 1) -> tuple:
+    """Canonical key of a `battle_state.BattleState`. With `hp_bucket` > 1, HP is compared in buckets of that size."""
+    turn_manager = state.turn_manager
+    now = turn_manager.time
+    timeline = tuple(
+        (getattr(unit, "name", None), round(time - now, 6))
+        for time, unit in turn_manager.forecast(len(turn_manager.timeline_entries), fast_forward=False)
+    )
+    return (
+        round(now, 6),
+        timeline,
+        tuple(unit_key(unit, hp_bucket) for unit in turn_manager.units),
+        tuple(field_object_key(obj) for obj in turn_manager.field_objects),
+        tuple((round(time - now, 6), callback.__name__, timer_key(arg))
+              for time, _, callback, arg in turn_manager.timer_wheel.entries()),
+    )
+
+def state_hash(state, hp_bucket: int = 1) -> int:
+    return hash(state_key(state, hp_bucket))
+
+def aura_hash(auras) -> int:
+    return hash(freeze_auras(auras)) if isinstance(auras, list) else auras.state_hash()
+
+def fast_state_hash(state, hp_bucket: int = 1) -> int:
+    """A hash that is equal for any two states whose `state_key`s are equal, in O(units)."""
+    turn_manager = state.turn_manager
+    parts = [round(turn_manager.time, 6), turn_manager.timeline_hash]
+    for unit in turn_manager.units:
+        if isinstance(unit, Character):
+            parts.append((unit.name, hp_key(unit.current_hp, hp_bucket), unit.stat_hash, unit.buff_hash,
+                          aura_hash(unit.auras), unit.combo_index, frozenset(unit.cooldowns.items()),
+                          frozenset((str(kind), amount) for kind, amount in unit.energy_pool.items())))
+        else:
+            parts.append(getattr(unit, "name", None))
+    return hash(tuple(parts))
+
+class TranspositionTable:
+    """Bounded map from battle states to search results, evicting the least recently used entry.
+
+    Entries are chained per `fast_state_hash` as [value, state, key]. An entry
+    keeps its state and builds the state's `state_key` only when another
+    state lands on the same hash. Holding states costs memory, so once more
+    than `retain` entries hold one, the oldest of them builds its key and lets
+    its state go.
+    """
+
+    def __init__(self, capacity: int = 100_000, hp_bucket: int = 1, retain: int = 1024):
+        self.capacity = capacity
+        self.hp_bucket = hp_bucket
+        self.retain = retain
+        self.buckets = OrderedDict()  # fast_state_hash -> entries with that hash
+        self.size = 0
+        self.holding = deque()  # entries that may still hold their state, oldest first
+        self.probe = None  # (state,) + find(state) of the last lookup, reused by record
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.collisions = 0
+        self.keys_built = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def entry_key(self, entry: list) -> tuple:
+        if entry[2] is None:
+            entry[2] = self.state_key(entry[1])
+            entry[1] = None
+        return entry[2]
+
+    def state_key(self, state) -> tuple:
+        self.keys_built += 1
+        return state_key(state, self.hp_bucket)
+
+    def find(self, state) -> tuple:
+        """(hash, the entry for an equal state or None, and `state`'s key if it had to be built)."""
+        fast = fast_state_hash(state, self.hp_bucket)
+        bucket = self.buckets.get(fast)
+        if bucket is None:
+            return fast, None, None
+        key = self.state_key(state)
+        for entry in bucket:
+            if self.entry_key(entry) == key:
+                return fast, entry, key
+        self.collisions += 1
+        return fast, None, key
+
+    def lookup(self, state, default=None):
+        """The value recorded for a state with the same `state_key` as `state`, or `default`."""
+        self.probe = (state,) + self.find(state)
+        _, fast, entry, _ = self.probe
+        if entry is None:
+            self.misses += 1
+            return default
+        self.buckets.move_to_end(fast)
+        self.hits += 1
+        return entry[0]
+
+    def record(self, state, value):
+        """Record `value` for `state`, replacing the value of an equal state already recorded."""
+        probe, self.probe = self.probe, None
+        if probe is None or probe[0] is not state:
+            probe = (state,) + self.find(state)
+        _, fast, found, key = probe
+        if found is not None:
+            found[0] = value
+            self.buckets.move_to_end(fast)
+            return
+        entry = [value, None, key] if key is not None else [value, state, None]
+        bucket = self.buckets.get(fast)
+        if bucket is None:
+            bucket = self.buckets[fast] = []
+        bucket.append(entry)
+        self.buckets.move_to_end(fast)
+        self.size += 1
+        if entry[1] is not None:
+            self.holding.append(entry)
+            if len(self.holding) > self.retain:
+                oldest = self.holding.popleft()
+                if oldest[1] is not None:
+                    self.entry_key(oldest)
+        while self.size > self.capacity:
+            _, evicted = self.buckets.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += len(evicted)
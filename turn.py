@@ -10,9 +10,14 @@ from core import Character, StatType, Summon, get_speed
 from constants import ELEMENT_EMOJIS
 from dendro_core import update_dendro_cores
 from grid_utils import print_grid
+from spatial_index import SpatialGrid
+from timer_wheel import TimerWheel
 
 class Buff:
-    def __init__(self, name, description, stat=None, amount=0, duration=0, source=None, trigger="on_turn_start", reversible=False, effect=None, cleanup_effect=None):
+    __slots__ = ("name", "description", "stat", "amount", "duration", "remaining_turns", "trigger",
+                 "reversible", "source", "effect", "cleanup_effect", "applied", "delivery")
+
+    def __init__(self, name, description, stat=None, amount=0, duration=0, source=None, trigger="on_turn_start", reversible=False, effect=None, cleanup_effect=None, delivery="hit"):
         self.name = name
         self.description = description
         self.stat = stat  # e.g., StatType.ATK
@@ -25,43 +30,243 @@ class Buff:
         self.effect = effect
         self.cleanup_effect = cleanup_effect
         self.applied = False
+        self.delivery = delivery  # "hit", or "action" to get one coalesced on_hp_change per action
 
 class BuffTimerUnit:
+    """A buff's countdown. It ticks from TurnManager.timer_wheel every 10000 / speed AV, off the action timeline."""
+    __slots__ = ("buff", "owner", "name", "speed")
+
     def __init__(self, buff: Buff, owner, speed: int = 100):
         self.buff = buff
         self.owner = owner  # Who the buff affects
         self.name = f"{buff.name} Timer"
         self.speed = speed
-        self.current_hp = 1  # Not used, just for compatibility
 
     def get_stat(self):
         # Only SPD matters
         return self.speed
 
+def entry_digest(entry: tuple) -> int:
+    """A timeline entry's part of TurnManager.timeline_hash: who acts and when."""
+    return hash((getattr(entry[3], "name", None), round(entry[0], 6)))
+
 class TurnManager:
     BASE_TURN_VALUE = 10000
+    BUFF_TIMER_DELAY = 50  # extra AV before a new buff timer's first tick
     
     def __init__(self, characters: list[Character]):
-        self.timeline = []
+        self.timeline = []  # heap of (time, order, seq, unit); stale entries are skipped lazily
+        self.timeline_entries = {}  # id(unit) -> the unit's live timeline entry
+        self.timeline_hash = 0  # XOR of entry_digest over the live entries
+        self.stale_entries = 0
         self.counter = itertools.count()
+        self.entry_seq = itertools.count()
         self.time = 0
-        self.buff_timers = []
+        self.buff_timers = {}  # live BuffTimerUnit -> handle of its next tick on timer_wheel
+        self.timer_wheel = TimerWheel()  # buff timer ticks, fired before the first actor at or after them
         self.units = list(characters)
-        self.player_team_size = len([c for c in characters if isinstance(c, Character)]) // 2
+        self.team_ids = {}  # id(unit) -> team id; 0 is the player side, 1 the enemy side
+        self.team_views = {}
         self.field_objects = []
+        self.spatial_index = SpatialGrid()
+        self.display = True
+        self.coalesce_hp_changes = False  # deliver on_hp_change once per action to "action" subscribers
+        self.expected_damage = False  # expected crits and fixed targeting instead of RNG
+        self.hit_outcomes = None  # list collecting each hit's crit outcomes in expected mode
+        self.hit_traces = None  # list collecting each hit's stat-independent inputs in expected mode
+
+        for unit in self.units:
+            self.spatial_index.insert(unit)
+        self.player_team_size = len([c for c in characters if isinstance(c, Character)]) // 2
 
         for char in characters:
             speed = char.get_stat(StatType.SPD)
             initial_time = self.BASE_TURN_VALUE / speed
+            self.schedule(char, initial_time)
+
+    @property
+    def player_team_size(self) -> int:
+        return self._player_team_size
+
+    @player_team_size.setter
+    def player_team_size(self, size: int):
+        """Characters in `units` before the cutoff form team 0, the rest team 1."""
+        self._player_team_size = size
+        chars = [u for u in self.units if isinstance(u, Character)]
+        for index, char in enumerate(chars):
+            self.assign_team(char, 0 if index < size else 1)
+
+    def assign_team(self, unit, team_id: int):
+        self.team_ids[id(unit)] = team_id
+        unit.turn_manager = self
+        self.invalidate_team_views()
+
+    def team_of(self, unit) -> Optional[int]:
+        return self.team_ids.get(id(unit))
+
+    def same_team(self, unit1, unit2) -> bool:
+        team1 = self.team_ids.get(id(unit1))
+        return team1 is not None and team1 == self.team_ids.get(id(unit2))
+
+    def invalidate_team_views(self):
+        """Drop cached team lists; called when membership or a unit's HP-zero status changes."""
+        self.team_views.clear()
+
+    def get_team_members(self, team_id: Optional[int], living: bool = False, opponents: bool = False) -> list[Character]:
+        """Characters on `team_id` (or on every other team if `opponents` is set).
+
+        The returned list is cached and shared between callers, so do not mutate it.
+        """
+        key = (team_id, living, opponents)
+        view = self.team_views.get(key)
+        if view is None:
+            view = [
+                unit for unit in self.units
+                if isinstance(unit, Character)
+                and (self.team_ids.get(id(unit)) == team_id) != opponents
+                and (not living or unit.current_hp > 0)
+            ]
+            self.team_views[key] = view
+        return view
+
+    def add_unit(self, unit, team_id: Optional[int] = None):
+        self.units.append(unit)
+        self.spatial_index.insert(unit)
+        if team_id is not None:
+            self.assign_team(unit, team_id)
+
+    def remove_unit(self, unit):
+        """Drop `unit` from the battle: unit list, team index and timeline."""
+        if unit in self.units:
+            self.units.remove(unit)
+        self.team_ids.pop(id(unit), None)
+        self.spatial_index.remove(unit)
+        self.unschedule(unit)
+        self.invalidate_team_views()
+
+    def add_field_object(self, obj):
+        self.field_objects.append(obj)
+        self.spatial_index.insert(obj)
+
+    def schedule(self, unit, time: float, order: Optional[int] = None):
+        """Put `unit` on the timeline at `time`, replacing any entry it already has."""
+        if order is None:
             order = next(self.counter)
-            heapq.heappush(self.timeline, (initial_time, order, char))
-    
+        old_entry = self.timeline_entries.get(id(unit))
+        if old_entry is not None:
+            self.stale_entries += 1
+            self.timeline_hash ^= entry_digest(old_entry)
+        entry = (time, order, next(self.entry_seq), unit)
+        self.timeline_entries[id(unit)] = entry
+        self.timeline_hash ^= entry_digest(entry)
+        heapq.heappush(self.timeline, entry)
+        self.compact_timeline()
+
+    def unschedule(self, unit) -> bool:
+        """Take `unit` off the timeline. Returns False if it was not on it."""
+        entry = self.timeline_entries.pop(id(unit), None)
+        if entry is None:
+            return False
+        self.timeline_hash ^= entry_digest(entry)
+        self.stale_entries += 1
+        self.compact_timeline()
+        return True
+
+    def is_scheduled(self, unit) -> bool:
+        return id(unit) in self.timeline_entries
+
+    def scheduled_time(self, unit) -> Optional[float]:
+        entry = self.timeline_entries.get(id(unit))
+        return entry[0] if entry else None
+
+    def iter_timeline(self):
+        """Yield (time, order, unit) for every live entry, in heap order."""
+        for entry in self.timeline:
+            if self.timeline_entries.get(id(entry[3])) is entry:
+                yield entry[0], entry[1], entry[3]
+
+    def peek_timeline(self):
+        """(time, order, unit) of the entry pop_timeline would return next, or None if the timeline is empty."""
+        while self.timeline:
+            entry = self.timeline[0]
+            if self.timeline_entries.get(id(entry[3])) is entry:
+                return entry[0], entry[1], entry[3]
+            heapq.heappop(self.timeline)
+            self.stale_entries -= 1
+        return None
+
+    def pop_timeline(self):
+        while self.timeline:
+            entry = heapq.heappop(self.timeline)
+            if self.timeline_entries.get(id(entry[3])) is entry:
+                del self.timeline_entries[id(entry[3])]
+                self.timeline_hash ^= entry_digest(entry)
+                return entry[0], entry[1], entry[3]
+            self.stale_entries -= 1
+        raise IndexError("pop from an empty timeline")
+
+    def forecast(self, count: int, fast_forward: bool = True) -> list[tuple[float, object]]:
+        """The next `count` turns as (time, unit), without changing the timeline.
+
+        With `fast_forward`, a unit that acts is projected to act again one
+        cycle later at its current SPD, as next_turn reschedules it (summons
+        only for the turns they have left). Otherwise
+        each unit on the timeline is listed once. The heap is walked from
+        its root, so only about `count` entries are looked at.
+        """
+        timeline = self.timeline
+        entries = self.timeline_entries
+        # (time, rank, order, seq, heap index, unit); rank 1 marks projected turns, which
+        # next_turn would give a fresh order after every entry already on the timeline
+        frontier = [(entry[0], 0, entry[1], entry[2], 0, entry[3]) for entry in timeline[:1]]
+        projected = itertools.count()
+        turns_left = {}
+        result = []
+        while frontier and len(result) < count:
+            time, rank, _, _, index, unit = heapq.heappop(frontier)
+            if rank == 0:
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(timeline):
+                        entry = timeline[child]
+                        heapq.heappush(frontier, (entry[0], 0, entry[1], entry[2], child, entry[3]))
+                if entries.get(id(unit)) is not timeline[index]:
+                    continue  # stale
+            result.append((time, unit))
+            if not fast_forward:
+                continue
+            left = turns_left[id(unit)] if id(unit) in turns_left else scheduled_turns_left(unit)
+            if left is not None:
+                left -= 1
+                turns_left[id(unit)] = left
+                if left <= 0:
+                    continue
+            seq = next(projected)
+            heapq.heappush(frontier, (time + self.BASE_TURN_VALUE / get_speed(unit), 1, seq, seq, -1, unit))
+        return result
+
+    def compact_timeline(self):
+        # Rebuild only once stale entries dominate, so removal stays amortised O(log n)
+        if self.stale_entries > 32 and self.stale_entries * 2 > len(self.timeline):
+            self.timeline = list(self.timeline_entries.values())
+            heapq.heapify(self.timeline)
+            self.stale_entries = 0
+
+    def run_timers(self, until: float):
+        """Fire every timer on the timer wheel at or before `until`, with `time` set to each one's AV."""
+        for time, _, callback, arg in self.timer_wheel.expire(until):
+            self.time = time
+            callback(self, arg)
+
     def next_turn(self):
-        current_time, _, char = heapq.heappop(self.timeline)
+        upcoming = self.peek_timeline()
+        if upcoming is not None:
+            self.run_timers(upcoming[0])
+        current_time, _, char = self.pop_timeline()
         self.time = current_time
         update_dendro_cores(self)
 
-        print_grid(self.units, self.field_objects)
+        if self.display:
+            print_grid(self.units, self.field_objects)
 
         if hasattr(char, "turn_shifted"):
             char.turn_shifted = False
@@ -69,8 +274,7 @@ class TurnManager:
         speed = get_speed(char)
         next_time = current_time + (self.BASE_TURN_VALUE / speed)
 
-        order = next(self.counter)
-        heapq.heappush(self.timeline, (next_time, order, char))
+        self.schedule(char, next_time)
 
         update_dendro_cores(self)
 
@@ -80,7 +284,10 @@ class TurnManager:
         seen = set()
         result = []
 
-        for time, _, char in sorted(self.timeline):
+        timers = [(time, timer) for time, _, _, timer in self.timer_wheel.entries() if isinstance(timer, BuffTimerUnit)]
+        actors = self.forecast(len(self.timeline_entries), fast_forward=False)
+        # Timers fire before an actor at the same AV
+        for time, char in heapq.merge(timers, actors, key=lambda entry: entry[0]):
             if isinstance(char, BuffTimerUnit):
                 #result.append((f"[{char.buff.name}] (on {char.owner.name})", int(time)))
                 label = f"[{char.buff.name}] (on {char.owner.name})"
@@ -121,36 +328,23 @@ class TurnManager:
 
     def add_summon(self, summon: Summon):
         speed = getattr(summon, "speed", 100)
-        order = next(self.counter)
         initial_time = self.time + (self.BASE_TURN_VALUE / speed)
-        heapq.heappush(self.timeline, (initial_time, order, summon))
-        self.units.append(summon)
+        self.schedule(summon, initial_time)
+        self.add_unit(summon, self.team_of(summon.owner))
 
     def add_buff_timer(self, buff: Buff, owner: Character, speed: int = 100):
         timer = BuffTimerUnit(buff, owner, speed)
-        self.buff_timers.append(timer)
-        self.units.append(timer)
-        initial_time = self.time + 50 + (self.BASE_TURN_VALUE / speed)
-        order = next(self.counter)
-        heapq.heappush(self.timeline, (initial_time, order, timer))
+        initial_time = self.time + self.BUFF_TIMER_DELAY + (self.BASE_TURN_VALUE / speed)
+        self.buff_timers[timer] = self.timer_wheel.schedule(initial_time, tick_buff_timer, timer)
 
     def adjust_turn(self, unit, offset: float):
         """Advance or delay a unit's next turn by `offset` AV units."""
-        new_timeline = []
-        adjusted = False
-
-        for time, order, char in self.timeline:
-            if char == unit and not adjusted:
-                new_time = max(0, time + offset)
-                new_entry = (new_time, order, char)
-                new_timeline.append(new_entry)
-                unit.turn_shifted = True  # ✅ mark the shift
-                adjusted = True
-            else:
-                new_timeline.append((time, order, char))
+        entry = self.timeline_entries.get(id(unit))
+        if entry is not None:
+            time, order = entry[0], entry[1]
+            self.schedule(unit, max(0, time + offset), order=order)
+            unit.turn_shifted = True  # ✅ mark the shift
 
-        heapq.heapify(new_timeline)
-        self.timeline = new_timeline
         print(f"{unit.name}'s action time adjusted by {offset:+.0f} AV.")
         
     def delay_by_percent(self, unit, percent: float):
@@ -160,6 +354,36 @@ class TurnManager:
         offset = cycle * percent
         self.adjust_turn(unit, offset)
 
+def tick_buff_timer(turn_manager: TurnManager, timer: BuffTimerUnit):
+    buff = timer.buff
+
+    # Apply effect if needed
+    buff.applied = True
+
+    buff.remaining_turns -= 1
+
+    if buff.remaining_turns <= 0:
+        print(f"[Countdown] {buff.name} ticked. (0 turns remaining)")
+        print(f"[Countdown] {buff.name} has expired.")
+        if buff.cleanup_effect:
+            buff.cleanup_effect(timer.owner)
+        timer.owner.set_buffs([
+            b for b in timer.owner.buffs
+            if not (b.name == buff.name and b.source == buff.source)
+        ])
+
+        del turn_manager.buff_timers[timer]
+    else:
+        print(f"[Countdown] {buff.name} ticked. ({buff.remaining_turns} turns remaining)")
+        turn_manager.buff_timers[timer] = turn_manager.timer_wheel.schedule(
+            turn_manager.time + turn_manager.BASE_TURN_VALUE / get_speed(timer), tick_buff_timer, timer)
+
+def scheduled_turns_left(unit) -> Optional[int]:
+    """Turns a summon has left before it leaves the timeline; None for units that stay."""
+    if isinstance(unit, Summon) and unit.duration is not None:
+        return max(unit.remaining_duration, 1)
+    return None
+
 def get_hp_status_bar(current: int, maximum: int) -> str:
     if maximum == 0:
         return "❓"
@@ -176,45 +400,26 @@ def get_hp_status_bar(current: int, maximum: int) -> str:
         return "💀"
 
 def get_allies(attacker: Character, turn_manager: TurnManager) -> list[Character]:
-    return [
-        unit for unit in turn_manager.units
-        if isinstance(unit, Character)
-        and is_same_team(attacker, unit, turn_manager)
-    ]
+    team_id = turn_manager.team_of(attacker)
+    if team_id is None:
+        return []
+    return turn_manager.get_team_members(team_id)
 
 def get_enemies(attacker: Character, turn_manager: TurnManager) -> list[Character]:
-    return [
-        unit for unit in turn_manager.units
-        if isinstance(unit, Character)
-        and not is_same_team(attacker, unit, turn_manager)
-    ]
+    return turn_manager.get_team_members(turn_manager.team_of(attacker), opponents=True)
 
 def is_same_team(char1: Character, char2: Character, turn_manager: TurnManager) -> bool:
-    chars = [u for u in turn_manager.units if isinstance(u, Character)]
-    cutoff = getattr(turn_manager, "player_team_size", len(chars) // 2)
-
-    try:
-        idx1 = chars.index(char1)
-        idx2 = chars.index(char2)
-    except ValueError:
-        return False  # One or both chars no longer in list
-
-    return (idx1 < cutoff and idx2 < cutoff) or (idx1 >= cutoff and idx2 >= cutoff)
+    return turn_manager.same_team(char1, char2)
 
 def get_teams(turn_manager):
-    """Splits characters into two teams using stored player_team_size."""
-    chars = [u for u in turn_manager.units if isinstance(u, Character)]
-    size = getattr(turn_manager, "player_team_size", len(chars) // 2)
-    return chars[:size], chars[size:]
+    """Returns the Characters on team 0 and team 1."""
+    return turn_manager.get_team_members(0), turn_manager.get_team_members(1)
 
 def get_living_allies(attacker: Character, turn_manager: TurnManager) -> list[Character]:
-    return [
-        ally for ally in get_allies(attacker, turn_manager)
-        if isinstance(ally, Character) and ally.current_hp > 0
-    ]
+    team_id = turn_manager.team_of(attacker)
+    if team_id is None:
+        return []
+    return turn_manager.get_team_members(team_id, living=True)
 
 def get_living_enemies(attacker: Character, turn_manager: TurnManager) -> list[Character]:
-    return [
-        enemy for enemy in get_enemies(attacker, turn_manager)
-        if isinstance(enemy, Character) and enemy.current_hp > 0
-    ]
+    return turn_manager.get_team_members(turn_manager.team_of(attacker), living=True, opponents=True)